@@ -0,0 +1,582 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:47:05 2026
+
+asyncio runtime of the network : the whole network runs in a single event loop,
+each node is a coroutine consuming its inbox and waits are asyncio sleeps, cut short
+when the network drains at the end of a run.
+"""
+
+import asyncio
+import random
+from Node import RaymondNode
+from Network import Network, RunResult
+from Simulator import Flag, NOLOCK
+
+
+def wake(future):
+
+    if not future.done() :
+
+        future.set_result(None)
+
+
+class AsyncNode(RaymondNode):
+    """
+    This class is used to simulate a node as coroutines of an event loop.
+
+    The node consumes its inbox in run() and asks for privilege in think(). The node
+    never runs concurrently with another one, so its state needs no lock.
+
+    Attributes
+    ----------
+    See RaymondNode for the attributes of the algorithm.
+
+    network : AsyncNetwork
+        The network the node belongs to.
+
+    inbox : asyncio.Queue
+        The messages (msgType, senderId, advice) received by the node.
+
+    inRecovery : Flag
+        A flag that indicates if the node is in recovery state or not
+
+    epoch : int
+        Incremented at each failure, to drop the waits started before it.
+
+    Methods
+    -------
+    run()
+        Consumes the inbox of the node.
+
+    think()
+        Asks for privilege after think times sampled from Exp(askingPrivRate).
+    """
+
+    def __init__(self, network, id, holderId = None, askingPrivRate = .05):
+
+        RaymondNode.__init__(self, id, holderId, askingPrivRate, network.metrics)
+
+        self.network = network
+
+        self.rng = network.rng
+
+        self.inbox = asyncio.Queue()
+
+        self.inRecovery = Flag()
+
+        self.canWork = NOLOCK
+
+        self.epoch = 0
+
+
+    async def run(self):
+        """
+        Extended description of function.
+
+        Consumes the inbox of the node, until it is cancelled.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        inbox = self.inbox
+
+        while True :
+
+            msgType, senderId, advice = await inbox.get()
+
+            self.on_message(msgType, senderId, advice)
+
+
+    async def think(self):
+        """
+        Extended description of function.
+
+        After waiting a time sampled from Exp(askingPrivRate), the node asks for privilege,
+        until it is cancelled.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        if self.askingPrivRate <= 0 :
+
+            return
+
+        while True :
+
+            await asyncio.sleep(self.next_time())
+
+            self.ask()
+
+
+    def ask(self):
+
+        #the network is draining, a saturated node does not ask again
+        if self.network.terminate :
+
+            return False
+
+        return RaymondNode.ask(self)
+
+
+    def transmit(self, msgType, dest, advice):
+
+        self.network.nodes[dest].inbox.put_nowait((msgType, self.id, advice))
+
+
+    def enter_critical_section(self):
+
+        if self.network.terminate :
+
+            #the network is draining, the node leaves at once
+            self.leave_critical_section()
+
+        else :
+
+            self.network.spawn(self.hold_critical_section(self.epoch))
+
+
+    async def hold_critical_section(self, epoch):
+
+        await self.network.sleep(self.service_time()) #consume ressource
+
+        if epoch == self.epoch :
+
+            self.leave_critical_section()
+
+
+    def fail(self):
+
+        self.epoch += 1
+
+        if self.using :
+
+            #the node fails inside the critical section, the ressource is freed
+            self.ressource.release()
+
+        RaymondNode.fail(self)
+
+
+    def wait_restart(self):
+
+        self.network.spawn(self.downtime_then_restart(self.epoch))
+
+
+    async def downtime_then_restart(self, epoch):
+
+        await self.network.sleep(self.down_time())
+
+        if epoch == self.epoch :
+
+            self.restart()
+
+
+    def wait_advise(self, delay):
+
+        self.network.spawn(self.advise_wait(delay, self.epoch))
+
+
+    async def advise_wait(self, delay, epoch):
+
+        await self.network.sleep(delay)
+
+        if epoch == self.epoch :
+
+            self.advise_timeout()
+
+
+    def wait_hold(self, delay, hold):
+
+        self.network.spawn(self.hold_wait(delay, hold))
+
+
+    async def hold_wait(self, delay, hold):
+
+        await self.network.sleep(delay)
+
+        self.release_hold(hold)
+
+
+    def recover(self):
+
+        RaymondNode.recover(self)
+
+        self.network.node_recovered(self)
+
+
+
+class AsyncNetwork(Network):
+    """
+    This class simulates the network in a single asyncio event loop.
+
+    It is built like a Network (addNode). Every node runs as two coroutines, one
+    consuming its inbox and one asking for privilege, and the failures are injected by
+    a third coroutine, so one process can host tens of thousands of nodes.
+
+    Attributes
+    ----------
+    See Network.
+
+    rng : random.Random
+        The random generator of the network.
+
+    tasks : set
+        The running tasks of the network.
+
+    sleeping : dict
+        The timer handle of each future awaited by sleep.
+
+    Methods
+    -------
+    run() :
+        Coroutine running the network.
+
+    sleep() :
+        Coroutine waiting for the timers of the nodes, cut short by expedite.
+
+    drain() :
+        Coroutine draining the network at the end of a run.
+
+    start():
+        Runs the network in a new event loop.
+
+    stop():
+        Stops the network and returns the complexity data.
+    """
+    #no event log by default, see Network.log_events
+    logLevel = None
+
+    def __init__(self, failureRate = 1e-4, activityRate = .05, seed = None):
+
+        Network.__init__(self, failureRate, activityRate)
+
+        self.rng = random.Random(seed)
+
+        self.tasks = set()
+
+        self.sleeping = {}
+
+        self.stopped = None
+
+        self.reason = 'stop'
+
+
+    def make_node(self, nodeId, holderId, askingPrivRate):
+
+        return AsyncNode(self, nodeId, holderId, askingPrivRate)
+
+
+    def schedule(self, delay, action, *args):
+
+        #the deferred failures, see Network.node_recovered
+        asyncio.get_running_loop().call_later(delay, action, *args)
+
+
+    def spawn(self, coroutine):
+        """
+        Extended description of function.
+
+        Runs a coroutine as a task of the network, the task is cancelled when the network stops.
+
+        Parameters
+        ----------
+        coroutine : coroutine
+            The coroutine to run.
+
+        Returns
+        -------
+        This function returns the task.
+
+        """
+        task = asyncio.get_running_loop().create_task(coroutine)
+
+        #the loop only keeps weak references to the tasks
+        self.tasks.add(task)
+
+        task.add_done_callback(self.tasks.discard)
+
+        return task
+
+
+    async def sleep(self, delay):
+        """
+        Extended description of function.
+
+        Waits for a timer of a node, like asyncio.sleep, at once if the network drains.
+
+        Parameters
+        ----------
+        delay : float
+            The time to wait in seconds.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        if self.terminate :
+
+            return
+
+        future = asyncio.get_running_loop().create_future()
+
+        self.sleeping[future] = asyncio.get_running_loop().call_later(delay, wake, future)
+
+        try :
+
+            await future
+
+        finally :
+
+            del self.sleeping[future]
+
+
+    def expedite(self):
+
+        #the pending timers of the nodes expire at once
+        for future, handle in list(self.sleeping.items()) :
+
+            handle.cancel()
+
+            wake(future)
+
+
+    async def inject_failures(self):
+        """
+        Extended description of function.
+
+        Makes a random node fail from time to time, see Network.inject_failure.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        self.nodesIds = list( self.nodes.keys() )
+
+        while True :
+
+            await asyncio.sleep(self.next_time())
+
+            if not self.fail_node() :
+
+                self.deferredFailures += 1
+
+
+    async def run(self, duration = None, max_requests = None, until = None):
+        """
+        Extended description of function.
+
+        Coroutine running the network until stop() is called or one of the stop conditions
+        is met. The network is then drained, see drain, and its remaining tasks are 
+        cancelled. The result is measured when the run stops, before the drain.
+
+        Parameters
+        ----------
+        duration : float
+            The duration of the run in seconds, None to run until stop() is called.
+
+        max_requests : int
+            The run stops once this number of privilege requests is made.
+
+        until : callable
+            The run stops once until(network) returns True.
+
+        Returns
+        -------
+        This function returns a RunResult.
+
+        """
+        self.terminate = False
+
+        self.reason = 'stop'
+
+        loop = asyncio.get_running_loop()
+
+        begin = loop.time()
+
+        self.stopped = asyncio.Event()
+
+        #the usage of the ressource is measured from the start
+        self.ressource.start()
+
+        #the tasks making new requests and failures, stopped before the drain
+        sources = []
+
+        for node in self.nodes.values() :
+
+            self.spawn(node.run())
+
+            sources.append(self.spawn(node.think()))
+
+        if self.failureRate :
+
+            sources.append(self.spawn(self.inject_failures()))
+
+        if max_requests is not None or until is not None :
+
+            sources.append(self.spawn(self.watch(max_requests, until)))
+
+        reason = 'stop'
+
+        try :
+
+            await asyncio.wait_for(self.stopped.wait(), duration)
+
+            reason = self.reason
+
+        except asyncio.TimeoutError :
+
+            reason = 'duration'
+
+        finally :
+
+            usage = self.ressource.usage()
+
+            elapsed = loop.time() - begin
+
+            counters = self.metrics.snapshot()
+
+            for task in sources :
+
+                task.cancel()
+
+            await self.drain()
+
+            for task in list(self.tasks) :
+
+                task.cancel()
+
+            await asyncio.gather(*self.tasks, return_exceptions = True)
+
+            #a node may have been cancelled in the critical section after a drain timeout
+            self.ressource.release()
+
+        return RunResult(reason, elapsed, counters, usage)
+
+
+    async def drain(self):
+        """
+        Extended description of function.
+
+        Coroutine draining the network, as Network.shutdown : the nodes stop asking, the
+        timers of the nodes expire at once, so the requests already made are served with
+        empty critical sections, until no message is in flight and no node is in the
+        critical section, holding the privilege or in recovery (unless out of retries, see
+        RaymondNode.stalled), or for drainTimeout seconds.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns True if the network was quiescent.
+
+        """
+        self.terminate = True
+
+        loop = asyncio.get_running_loop()
+
+        deadline = loop.time() + self.drainTimeout
+
+        nodes = list(self.nodes.values())
+
+        while True :
+
+            self.expedite()
+
+            #the messages in flight are in the inboxes, a hold ends in a task maybe not started
+            quiescent = not self.sleeping and not any(node.inbox.qsize() or node.using or node.holding or node.inRecovery.is_set() and not node.stalled for node in nodes)
+
+            if quiescent or loop.time() >= deadline :
+
+                return quiescent
+
+            await asyncio.sleep(1e-3)
+
+
+    async def watch(self, max_requests, until):
+
+        while True :
+
+            await asyncio.sleep(self.pollInterval)
+
+            if max_requests is not None and self.metrics.asks() >= max_requests :
+
+                self.reason = 'max_requests'
+
+            elif until is not None and until(self) :
+
+                self.reason = 'until'
+
+            else :
+
+                continue
+
+            self.stopped.set()
+
+            return
+
+
+    def start(self, duration = None):
+        """
+        Extended description of function.
+
+        Runs the network in a new event loop until stop() is called or for duration seconds.
+
+        Parameters
+        ----------
+        duration : float
+            The duration of the run in seconds, None to run until stop() is called.
+
+        Returns
+        -------
+        This function returns the number of messages sent and the number of privilege requests.
+
+        """
+        asyncio.run(self.run(duration))
+
+        return self.metrics.messages(), self.metrics.asks()
+
+
+    def stop(self):
+        """
+        Extended description of function.
+
+        This function stops the network, it must be called from the event loop.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns the number of messages sent and the number of privilege requests.
+
+        """
+        self.terminate = True
+
+        self.reason = 'stop'
+
+        if self.stopped is not None :
+
+            self.stopped.set()
+
+        return self.metrics.messages(), self.metrics.asks()
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:52:40 2026
+
+Parameter sweeps. A batch is a grid of simulations (topology, activityRate, failureRate,
+askingPrivRates, seed, duration) run by Simulator in a pool of processes. Every finished
+run is cached in a JSON file, so an interrupted batch resumes where it stopped, and the
+results of the whole grid are written to one columnar file, .csv or .npz.
+
+    runs = grid(['kary:1000:2', 'star:1000'], activityRates = [.01, .1], failureRates = [0, 1e-3], seeds = range(5))
+
+    BatchRunner('results.csv').run(runs)
+
+or, from a JSON file holding the arguments of grid :
+
+    python BatchRunner.py sweep.json results.csv
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+import Topology
+from Simulator import Simulator
+
+#generators of Topology usable in a topology spec 'name:arg:arg'
+GENERATORS = {'kary' : Topology.kary, 'random' : Topology.random_recursive, 'star' : Topology.star,
+              'chain' : Topology.chain, 'caterpillar' : Topology.caterpillar}
+
+COLUMNS = ('topology', 'nodes', 'activityRate', 'failureRate', 'askingPrivRates', 'seed', 'duration',
+           'messages', 'requests', 'grants', 'complexity', 'REQUEST', 'ASSIGN', 'RESTART', 'ADVISE',
+           'latencyMean', 'latencyP50', 'latencyP99', 'failures', 'recoveryMean', 'recoveryP99', 'wallTime')
+
+#the modules the results of a run depend on, their sources are part of the cache keys so
+#that a resumed batch never reuses results computed by another version of the engine
+ENGINE = ('BatchRunner', 'Simulator', 'Network', 'Node', 'Scheduler', 'Metrics', 'Topology', 'Workload', 'EventLog', 'Wire')
+
+
+def grid(topologies, activityRates, failureRates, askingPrivRates = (None,), seeds = (0,), durations = (3600.,)):
+    """
+    Extended description of function.
+
+    Builds the runs of the cartesian product of the parameters.
+
+    Parameters
+    ----------
+    topologies : list
+        Topology specs, see build_tree.
+
+    activityRates, failureRates : lists of float
+        The rates of the networks.
+
+    askingPrivRates : list
+        The asking privilege rates of the nodes : None for the activityRate of the network,
+        'zipf:s' for rates decreasing as 1 / rank ** s with the activityRate as mean, or a
+        list with a rate by node.
+
+    seeds : list of int
+        The seeds of the simulations.
+
+    durations : list of float
+        The simulated durations in seconds.
+
+    Returns
+    -------
+    This function returns a list of run dictionaries.
+
+    """
+    return [{'topology' : topology, 'activityRate' : activityRate, 'failureRate' : failureRate,
+             'askingPrivRates' : rates, 'seed' : seed, 'duration' : duration}
+            for topology, activityRate, failureRate, rates, seed, duration
+            in itertools.product(topologies, activityRates, failureRates, askingPrivRates, seeds, durations)]
+
+
+def build_tree(topology, seed = None):
+    """
+    Extended description of function.
+
+    Builds the parent array of a topology spec : a generator of Topology with its integer
+    arguments, like 'kary:1000:2', 'random:1000', 'star:100', 'chain:100' or
+    'caterpillar:10:5' (random trees use the seed of the run), the path of a tree file
+    (see Topology.load), or a parent array.
+
+    Returns
+    -------
+    This function returns the parent array and the ids of the nodes.
+
+    """
+    if not isinstance(topology, str) :
+
+        return list(topology), None
+
+    name, _, arguments = topology.partition(':')
+
+    if name in GENERATORS and arguments :
+
+        arguments = [int(argument) for argument in arguments.split(':')]
+
+        if name == 'random' :
+
+            arguments.append(seed)
+
+        return GENERATORS[name](*arguments), None
+
+    parents, ids, _ = Topology.load(topology)
+
+    return parents, ids
+
+
+def build_rates(askingPrivRates, n, activityRate):
+
+    if askingPrivRates is None or isinstance(askingPrivRates, (list, tuple)) :
+
+        return askingPrivRates
+
+    name, _, exponent = askingPrivRates.partition(':')
+
+    if name != 'zipf' :
+
+        raise ValueError('unknown askingPrivRates spec : ' + askingPrivRates)
+
+    weights = [1. / (rank + 1) ** float(exponent or 1) for rank in range(n)]
+
+    scale = activityRate * n / sum(weights)
+
+    return [weight * scale for weight in weights]
+
+
+def label(value):
+
+    if value is None or isinstance(value, str) :
+
+        return value or ''
+
+    #parent arrays and rate lists are too long for a column
+    return 'sha1:' + hashlib.sha1(json.dumps(list(value)).encode()).hexdigest()[:12]
+
+
+def engine_version():
+    """
+    Extended description of function.
+
+    Hashes the sources of the ENGINE modules.
+
+    Parameters
+    ----------
+    This function takes no argument.
+
+    Returns
+    -------
+    This function returns the hash as a str.
+
+    """
+    digest = hashlib.sha1()
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    for name in ENGINE :
+
+        with open(os.path.join(directory, name + '.py'), 'rb') as sourceFile :
+
+            digest.update(sourceFile.read())
+
+    return digest.hexdigest()
+
+
+def tree_digest(topology):
+
+    #a tree file is known by its contents, not by its path
+    if not isinstance(topology, str) or topology.partition(':')[0] in GENERATORS :
+
+        return None
+
+    with open(topology, 'rb') as treeFile :
+
+        return hashlib.sha1(treeFile.read()).hexdigest()
+
+
+def run_key(run, version):
+
+    key = {'run' : run, 'engine' : version, 'tree' : tree_digest(run['topology'])}
+
+    return hashlib.sha1(json.dumps(key, sort_keys = True).encode()).hexdigest()
+
+
+def simulate(run):
+    """
+    Extended description of function.
+
+    Runs one simulation of a batch. It is executed in the processes of the pool.
+
+    Parameters
+    ----------
+    run : dict
+        A run, see grid.
+
+    Returns
+    -------
+    This function returns a dictionary with the COLUMNS of the results file.
+
+    """
+    wallTime = time.perf_counter()
+
+    parents, ids = build_tree(run['topology'], run['seed'])
+
+    simulator = Simulator(run['failureRate'], run['activityRate'], seed = run['seed'])
+
+    simulator.addTree(parents, ids, build_rates(run['askingPrivRates'], len(parents), run['activityRate']))
+
+    simulator.start(run['duration'])
+
+    snapshot = simulator.metrics.snapshot()
+
+    latency = snapshot['latency']
+
+    recovery = snapshot['recovery']
+
+    result = {'topology' : label(run['topology']), 'nodes' : len(parents), 'activityRate' : run['activityRate'],
+              'failureRate' : run['failureRate'], 'askingPrivRates' : label(run['askingPrivRates']),
+              'seed' : run['seed'], 'duration' : run['duration'], 'messages' : snapshot['messages'],
+              'requests' : snapshot['asks'], 'grants' : snapshot['grants'], 'complexity' : snapshot['complexity'],
+              'latencyMean' : latency.sum / latency.count if latency.count else None,
+              'latencyP50' : latency.quantile(.5), 'latencyP99' : latency.quantile(.99), 'failures' : snapshot['failures'],
+              'recoveryMean' : recovery.sum / recovery.count if recovery.count else None,
+              'recoveryP99' : recovery.quantile(.99)}
+
+    result.update(snapshot['byType'])
+
+    result['wallTime'] = time.perf_counter() - wallTime
+
+    return result
+
+
+class BatchRunner():
+    """
+    This class runs batches of simulations in a pool of processes.
+
+    Attributes
+    ----------
+    output : str
+        The results file, .csv or .npz (requires numpy).
+
+    cacheDir : str
+        The directory of the results of the finished runs, one JSON file by run named
+        after a hash of its parameters, of its tree file and of the engine, see engine_version,
+        output + '.cache' by default.
+
+    workers : int
+        The number of processes, the number of CPUs by default.
+
+    Methods
+    -------
+    run() :
+        Runs a batch and writes its results.
+    """
+
+    def __init__(self, output, cacheDir = None, workers = None):
+
+        self.output = output
+
+        self.cacheDir = output + '.cache' if cacheDir is None else cacheDir
+
+        self.workers = workers
+
+
+    def cached(self, key):
+
+        path = os.path.join(self.cacheDir, key + '.json')
+
+        if not os.path.exists(path) :
+
+            return None
+
+        with open(path) as cacheFile :
+
+            return json.load(cacheFile)
+
+
+    def cache(self, key, result):
+
+        path = os.path.join(self.cacheDir, key + '.json')
+
+        with open(path + '.tmp', 'w') as cacheFile :
+
+            json.dump(result, cacheFile)
+
+        #a run killed while writing leaves no partial result
+        os.replace(path + '.tmp', path)
+
+
+    def run(self, runs, progress = None):
+        """
+        Extended description of function.
+
+        Runs the runs that are not cached yet, in the pool, then writes the results of all
+        the runs to the output, in the order of runs.
+
+        Parameters
+        ----------
+        runs : list of dict
+            The runs, see grid.
+
+        progress : callable
+            Called with (done, total) after each finished run.
+
+        Returns
+        -------
+        This function returns the list of the results.
+
+        """
+        os.makedirs(self.cacheDir, exist_ok = True)
+
+        version = engine_version()
+
+        keys = [run_key(run, version) for run in runs]
+
+        results = {key : self.cached(key) for key in set(keys)}
+
+        pending = {key : run for key, run in zip(keys, runs) if results[key] is None}
+
+        done = len(results) - len(pending)
+
+        if pending :
+
+            with ProcessPoolExecutor(self.workers) as executor :
+
+                futures = {executor.submit(simulate, run) : key for key, run in pending.items()}
+
+                for future in as_completed(futures) :
+
+                    key = futures[future]
+
+                    results[key] = future.result()
+
+                    self.cache(key, results[key])
+
+                    done += 1
+
+                    if progress is not None :
+
+                        progress(done, len(results))
+
+        results = [results[key] for key in keys]
+
+        write(self.output, results)
+
+        return results
+
+
+def write(path, results):
+    """
+    Extended description of function.
+
+    Writes results in a columnar file : a .csv with a column by field, or a .npz with
+    an array by field.
+
+    Returns
+    -------
+    This function returns no value.
+
+    """
+    if path.endswith('.npz') :
+
+        import numpy
+
+        columns = {}
+
+        for column in COLUMNS :
+
+            #results cached by an older version lack the newer columns
+            values = [result.get(column) for result in results]
+
+            if any(isinstance(value, str) for value in values) :
+
+                columns[column] = numpy.array(values, dtype = str)
+
+            else :
+
+                columns[column] = numpy.array([numpy.nan if value is None else value for value in values])
+
+        numpy.savez(path, **columns)
+
+    else :
+
+        with open(path, 'w', newline = '') as csvFile :
+
+            writer = csv.writer(csvFile)
+
+            writer.writerow(COLUMNS)
+
+            for result in results :
+
+                writer.writerow(['' if result.get(column) is None else result[column] for column in COLUMNS])
+
+
+if __name__ == '__main__' :
+
+    if len(sys.argv) < 3 :
+
+        print('usage : python BatchRunner.py sweep.json results.csv [workers]')
+
+        sys.exit(1)
+
+    with open(sys.argv[1]) as sweepFile :
+
+        runs = grid(**json.load(sweepFile))
+
+    BatchRunner(sys.argv[2], workers = int(sys.argv[3]) if len(sys.argv) > 3 else None).run(
+        runs, lambda done, total : print(done, '/', total, 'runs'))
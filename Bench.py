@@ -0,0 +1,477 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:12:37 2026
+
+Benchmarks of the mutual exclusion core, with stored baselines to catch the performance
+regressions of the engine and of the transports :
+
+    callback : messages handled by second by Node.callback (decoding, state machine,
+               encoding and sending of the answer through the in memory transport).
+
+    grants : grants by second of wall time of assign_privilege under saturation, every
+             node of a star asking again as soon as it leaves the critical section.
+
+    build : time of Network.addTree by node, for growing trees.
+
+    recovery : time from the failure of a node (fail) to the end of its recovery in a
+               threaded network, with no downtime.
+
+    complexity : messages by request of seeded simulations of standard topologies, and
+                 their simulation speed.
+
+Every benchmark gives named measures, a value with its unit and the better direction. The
+timings are the best of a few repeats, the simulated measures are deterministic.
+
+    python Bench.py [save|compare] [baseline.json] [benchmark ...]
+
+runs the benchmarks (all by default), and saves them as the baseline, or compares them to
+the baseline (Bench.json by default) and prints the report, exiting with 1 on a regression
+or a measure of the baseline missing. The timings of a shared machine vary by up to 40%
+from a run to the next, their tolerance is wide : they catch the large regressions only.
+"""
+
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import Topology
+from Network import Network
+from Simulator import Simulator
+from Wire import encode
+from Workload import Constant
+
+BASELINE = 'Bench.json'
+
+#relative change tolerated before a measure is worse or better : the timings are noisy,
+#the latencies of the threads even more, the simulated measures are exact for a given seed
+#and version of Python
+TOLERANCES = {'time' : .5, 'latency' : 1., 'exact' : .01}
+
+#the kinds of measures whose worsening is a regression, failing the comparison
+GATED = frozenset({'time', 'latency', 'exact'})
+
+#the statuses failing the comparison
+FAILURES = ('regression', 'missing')
+
+
+def measure(value, unit, better, kind = 'time'):
+    """
+    Extended description of function.
+
+    Builds a measure.
+
+    Parameters
+    ----------
+    value : float
+        The measured value.
+
+    unit : str
+        The unit of the value.
+
+    better : str
+        'higher' or 'lower', the direction of an improvement.
+
+    kind : str
+        'time' for a timing, 'latency' for a latency of the threads, 'exact' for a
+        deterministic value, see TOLERANCES.
+
+    Returns
+    -------
+    This function returns the measure as a dict.
+
+    """
+    return {'value' : value, 'unit' : unit, 'better' : better, 'kind' : kind}
+
+
+def best_of(repeat, function, *args, key = None):
+
+    runs = []
+
+    for _ in range(repeat) :
+
+        #the garbage of a run is not collected during the next one
+        gc.collect()
+
+        runs.append(function(*args))
+
+    #the fastest run is the one least disturbed by the rest of the machine
+    return min(runs, key = key)
+
+
+def quiet_network(*args, **kwargs):
+
+    network = Network(*args, **kwargs)
+
+    network.log_events(None)
+
+    return network
+
+
+def time_callback(rounds):
+
+    network = quiet_network(0., 0.)
+
+    network.addNode(0)
+
+    network.addNode(1, 0)
+
+    first, second = network.nodes[0], network.nodes[1]
+
+    for node in (first, second) :
+
+        node.endpoint = network.transport.endpoint(node.id)
+
+    #the privilege goes back and forth : each node receives the request of the other and
+    #sends it the privilege, received from its inbox
+    requestFromSecond, requestFromFirst = encode('R', 1), encode('R', 0)
+
+    firstInbox, secondInbox = first.endpoint.inbox, second.endpoint.inbox
+
+    begin = time.perf_counter()
+
+    for _ in range(rounds) :
+
+        first.callback(requestFromSecond)
+
+        second.callback(secondInbox.get_nowait())
+
+        second.callback(requestFromFirst)
+
+        first.callback(firstInbox.get_nowait())
+
+    return time.perf_counter() - begin
+
+
+def bench_callback(repeat = 3, rounds = 20000):
+
+    elapsed = best_of(repeat, time_callback, rounds)
+
+    return {'callback.throughput' : measure(4 * rounds / elapsed, 'messages/s', 'higher')}
+
+
+def time_grants(n, grants):
+
+    simulator = Simulator(0., 1e3, latency = 1e-4, seed = 1)
+
+    simulator.addTree(Topology.star(n))
+
+    simulator.set_workload(Constant(1e-3))
+
+    begin = time.perf_counter()
+
+    result = simulator.run(1e9, max_requests = grants)
+
+    return time.perf_counter() - begin, result
+
+
+def bench_grants(repeat = 3, n = 50, grants = 20000):
+
+    elapsed, result = best_of(repeat, time_grants, n, grants, key = lambda run : run[0])
+
+    return {'grants.throughput' : measure(result.grants / elapsed, 'grants/s', 'higher'),
+            'grants.utilization' : measure(result.usage['utilization'], 'ratio', 'higher', 'exact')}
+
+
+def time_build(n):
+
+    parents = Topology.random_recursive(n, 1)
+
+    network = quiet_network(0., .05)
+
+    begin = time.perf_counter()
+
+    network.addTree(parents)
+
+    return time.perf_counter() - begin
+
+
+def bench_build(repeat = 5, sizes = (1000, 4000, 16000)):
+
+    results = {}
+
+    for n in sizes :
+
+        results['build.n%d' % n] = measure(best_of(repeat, time_build, n) / n * 1e6, 'us/node', 'lower')
+
+    return results
+
+
+def time_recovery(duration, failureRate, n):
+
+    network = quiet_network(failureRate, 2.)
+
+    network.addTree(Topology.kary(n, 2))
+
+    network.set_workload(Constant(1e-3))
+
+    network.set_downtime(0.)
+
+    return network.run(duration).recovery
+
+
+def bench_recovery(repeat = 2, duration = 3., failureRate = 20., n = 31):
+
+    recovery = best_of(repeat, time_recovery, duration, failureRate, n, key = lambda recovery : recovery.sum / recovery.count)
+
+    #the quantiles are bounds of the buckets of the histogram, the mean is exact
+    return {'recovery.mean' : measure(recovery.sum / recovery.count * 1e3, 'ms', 'lower', 'latency'),
+            'recovery.p99' : measure(recovery.quantile(.99) * 1e3, 'ms', 'lower', 'latency')}
+
+
+#the standard topologies of the complexity benchmark
+TOPOLOGIES = {'chain' : lambda : Topology.chain(64), 'star' : lambda : Topology.star(256),
+              'kary' : lambda : Topology.kary(1023, 2), 'random' : lambda : Topology.random_recursive(1000, 1),
+              'caterpillar' : lambda : Topology.caterpillar(32, 8)}
+
+
+def time_simulation(parents, duration, activityRate):
+
+    simulator = Simulator(1e-3, activityRate, latency = 1e-3, seed = 1)
+
+    simulator.addTree(parents)
+
+    begin = time.perf_counter()
+
+    result = simulator.run(duration)
+
+    return time.perf_counter() - begin, result
+
+
+def bench_complexity(repeat = 3, duration = 10000., activityRate = .01):
+
+    results = {}
+
+    for name, build in TOPOLOGIES.items() :
+
+        #the runs are seeded, only their speed changes
+        elapsed, result = best_of(repeat, time_simulation, build(), duration, activityRate, key = lambda run : run[0])
+
+        results['complexity.' + name] = measure(result.complexity, 'messages/request', 'lower', 'exact')
+
+        results['complexity.%s.speed' % name] = measure(result.messages / elapsed, 'messages/s', 'higher')
+
+    return results
+
+
+BENCHMARKS = {'callback' : bench_callback, 'grants' : bench_grants, 'build' : bench_build,
+              'recovery' : bench_recovery, 'complexity' : bench_complexity}
+
+
+def run(names = None, output = None):
+    """
+    Extended description of function.
+
+    Runs benchmarks.
+
+    Parameters
+    ----------
+    names : list of str
+        The benchmarks to run, keys of BENCHMARKS, all of them by default.
+
+    output : file
+        Where the progress is written, None to write nothing.
+
+    Returns
+    -------
+    This function returns the results : the machine they were measured on and the measures
+    by name.
+
+    """
+    measures = {}
+
+    for name in (BENCHMARKS if names is None else names) :
+
+        begin = time.perf_counter()
+
+        measures.update(BENCHMARKS[name]())
+
+        if output is not None :
+
+            print('%s : %.1f s' % (name, time.perf_counter() - begin), file = output)
+
+    return {'machine' : machine(), 'measures' : measures}
+
+
+def machine():
+
+    return {'python' : platform.python_version(), 'implementation' : platform.python_implementation(),
+            'system' : platform.system(), 'processor' : platform.machine(), 'cpus' : os.cpu_count()}
+
+
+def save(results, path = BASELINE):
+
+    with open(path, 'w') as baselineFile :
+
+        json.dump(results, baselineFile, indent = 1, sort_keys = True)
+
+
+def load(path = BASELINE):
+
+    with open(path) as baselineFile :
+
+        return json.load(baselineFile)
+
+
+def compare(baseline, results, tolerances = TOLERANCES, gated = GATED):
+    """
+    Extended description of function.
+
+    Compares results to a baseline, measure by measure.
+
+    Parameters
+    ----------
+    baseline, results : dict
+        Results of run.
+
+    tolerances : dict
+        The relative change tolerated by kind of measure.
+
+    gated : set
+        The kinds of measures whose worsening is a regression.
+
+    Returns
+    -------
+    This function returns a list of rows (name, baseline value, value, change, status), the
+    change is relative and positive for an improvement, the status is 'ok', 'better', 'worse',
+    'regression' (worse and gated), 'new' or 'missing' (a failure too).
+
+    """
+    rows = []
+
+    old, new = baseline['measures'], results['measures']
+
+    for name in sorted(set(old) | set(new)) :
+
+        if name not in new :
+
+            rows.append((name, old[name]['value'], None, None, 'missing'))
+
+            continue
+
+        if name not in old :
+
+            rows.append((name, None, new[name]['value'], None, 'new'))
+
+            continue
+
+        before, after = old[name]['value'], new[name]['value']
+
+        change = (after - before) / abs(before) if before else float(after != before)
+
+        if new[name]['better'] == 'lower' :
+
+            change = -change
+
+        kind = new[name]['kind']
+
+        tolerance = tolerances[kind]
+
+        status = 'worse' if change < -tolerance else 'better' if change > tolerance else 'ok'
+
+        if status == 'worse' and kind in gated :
+
+            status = 'regression'
+
+        rows.append((name, before, after, change, status))
+
+    return rows
+
+
+def report(baseline, results, rows):
+    """
+    Extended description of function.
+
+    Formats the rows of compare as a table.
+
+    Returns
+    -------
+    This function returns the report as a str.
+
+    """
+    lines = []
+
+    if baseline['machine'] != results['machine'] :
+
+        lines.append('the baseline was measured on another machine : %s' % baseline['machine'])
+
+    units = {name : measure['unit'] for name, measure in list(baseline['measures'].items()) + list(results['measures'].items())}
+
+    width = max([len(name) for name in units] + [7])
+
+    lines.append('%-*s %14s %14s %8s  %-18s %s' % (width, 'measure', 'baseline', 'current', 'change', 'unit', 'status'))
+
+    for name, before, after, change, status in rows :
+
+        lines.append('%-*s %14s %14s %8s  %-18s %s' % (width, name, '-' if before is None else '%.6g' % before,
+                                                         '-' if after is None else '%.6g' % after,
+                                                         '-' if change is None else '%+.1f%%' % (100 * change),
+                                                         units[name], status.upper() if status in FAILURES else status))
+
+    regressions = sum(row[4] == 'regression' for row in rows)
+
+    missing = sum(row[4] == 'missing' for row in rows)
+
+    lines.append('%d regressions and %d missing measures out of %d measures' % (regressions, missing, len(rows)))
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__' :
+
+    arguments = sys.argv[1:]
+
+    action = arguments.pop(0) if arguments and arguments[0] in ('save', 'compare') else 'compare'
+
+    path = arguments.pop(0) if arguments and arguments[0].endswith('.json') else BASELINE
+
+    unknown = [name for name in arguments if name not in BENCHMARKS]
+
+    if unknown :
+
+        print('usage : python Bench.py [save|compare] [baseline.json] [%s ...]' % '|'.join(BENCHMARKS))
+
+        sys.exit(1)
+
+    results = run(arguments or None, sys.stderr)
+
+    if action == 'save' :
+
+        if arguments and os.path.exists(path) :
+
+            #the benchmarks not run keep their baseline
+            saved = load(path)
+
+            saved['measures'].update(results['measures'])
+
+            saved['machine'] = results['machine']
+
+            results = saved
+
+        save(results, path)
+
+        print('baseline saved to', path)
+
+    elif not os.path.exists(path) :
+
+        print(json.dumps(results['measures'], indent = 1, sort_keys = True))
+
+        print('no baseline, save one with python Bench.py save', path)
+
+    else :
+
+        baseline = load(path)
+
+        if arguments :
+
+            #only the benchmarks run are compared
+            prefixes = tuple(name + '.' for name in arguments)
+
+            baseline['measures'] = {name : value for name, value in baseline['measures'].items() if name.startswith(prefixes)}
+
+        rows = compare(baseline, results)
+
+        print(report(baseline, results, rows))
+
+        sys.exit(1 if any(row[4] in FAILURES for row in rows) else 0)
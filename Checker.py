@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:03:26 2026
+
+Invariant checker of the traces recorded by Trace.Tracer. It runs offline on a trace file,
+or while the network runs as the sink of the tracer :
+
+    checker = Checker(maxWait = 600)
+
+    network.trace(Tracer(sink = checker.feed))
+
+    ...
+
+    checker.finish()
+
+    python Checker.py trace.jsonl [tree file] [maxWait]
+
+Every event is checked in constant time, so a trace is checked in linear time :
+
+single token : the token is held by a node from the ASSIGN it receives to the ASSIGN it
+sends, a node enters the critical section only while holding it and never while another
+node is inside. Out of the recoveries, exactly one token exists, held or carried by an
+ASSIGN in flight : none is a lost token, two are a duplicated one.
+
+no starvation : every request is granted within maxWait seconds, unless its node fails.
+
+acyclic holders : the holder pointers are tree edges, so a cycle is two neighbors holding
+each other, which is allowed only while an ASSIGN crosses the edge.
+"""
+
+from collections import deque
+import sys
+import Topology
+from Trace import FIELDS, read
+
+
+class Checker():
+    """
+    This class checks the invariants of Raymond's algorithm on a stream of trace events.
+
+    Attributes
+    ----------
+    maxWait : float
+        The longest time in seconds a request may wait for the privilege, None to only
+        report the requests never granted.
+
+    violations : list
+        The violations found, tuples (time, invariant, node, description).
+
+    holds : set
+        The nodes holding the token.
+
+    inflight : dict
+        The number of ASSIGN messages in flight, by edge.
+
+    holder : dict
+        The holder of each node, as far as the trace tells.
+
+    pending : dict
+        The requests not granted yet, (time, node) by causal id, oldest first.
+
+    Methods
+    -------
+    feed() :
+        Checks an event.
+
+    finish() :
+        Checks the end of the trace.
+    """
+
+    def __init__(self, maxWait = None, root = None, parents = None, ids = None, strict = False):
+
+        self.maxWait = maxWait
+
+        self.strict = strict
+
+        self.violations = []
+
+        self.holds = set()
+
+        self.inflight = {}
+
+        self.inflightTotal = 0
+
+        self.holder = {}
+
+        self.recovering = set()
+
+        self.using = None
+
+        self.pending = {}
+
+        self.pendingByNode = {}
+
+        #causal ids of the requests by time, the served ones are skipped lazily
+        self.order = deque()
+
+        self.starved = set()
+
+        #the first token is the one of the root, found in the tree or at its first use
+        self.bootstrapped = False
+
+        self.events = 0
+
+        self.now = None
+
+        if parents is not None :
+
+            ids = list(range(len(parents))) if ids is None else list(ids)
+
+            for i, parent in enumerate(parents) :
+
+                self.holder[ids[i]] = ids[parent] if parent >= 0 else ids[i]
+
+            root = ids[Topology.check_tree(parents)]
+
+        if root is not None :
+
+            self.holds.add(root)
+
+            self.holder[root] = root
+
+            self.bootstrapped = True
+
+
+    def violation(self, invariant, node, description):
+
+        self.violations.append((self.now, invariant, node, description))
+
+        if self.strict :
+
+            raise AssertionError('%s at %s, node %s : %s' % (invariant, self.now, node, description))
+
+
+    def take_token(self, node, description):
+
+        #a node acts as the holder of the token
+        if node in self.holds :
+
+            return True
+
+        if not self.bootstrapped and not self.inflightTotal :
+
+            self.bootstrapped = True
+
+            self.holds.add(node)
+
+            return True
+
+        self.violation('single token', node, description)
+
+        return False
+
+
+    def set_holder(self, node, holderId):
+
+        self.holder[node] = holderId
+
+        if holderId is not None and holderId != node and self.holder.get(holderId) == node :
+
+            if not self.inflight.get((node, holderId)) and not self.inflight.get((holderId, node)) :
+
+                self.violation('acyclic holders', node, 'holds and is held by ' + str(holderId))
+
+
+    def feed(self, event):
+        """
+        Extended description of function.
+
+        Checks an event of the trace.
+
+        Parameters
+        ----------
+        event : tuple
+            The event (time, kind, node, peer, msgType, cause), see Tracer.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        eventTime, kind, node, peer, msgType, cause = event
+
+        self.now = eventTime
+
+        self.events += 1
+
+        if kind == 'send' :
+
+            if msgType == 'A' :
+
+                self.take_token(node, 'sends an ASSIGN without the token')
+
+                self.holds.discard(node)
+
+                edge = (node, peer)
+
+                self.inflight[edge] = self.inflight.get(edge, 0) + 1
+
+                self.inflightTotal += 1
+
+                self.set_holder(node, peer)
+
+        elif kind == 'receive' :
+
+            if msgType == 'A' :
+
+                edge = (peer, node)
+
+                count = self.inflight.get(edge, 0)
+
+                if count :
+
+                    self.inflight[edge] = count - 1
+
+                    self.inflightTotal -= 1
+
+                if node in self.holds :
+
+                    self.violation('single token', node, 'receives a second token from ' + str(peer))
+
+                self.holds.add(node)
+
+                self.set_holder(node, node)
+
+        elif kind == 'ask' :
+
+            self.pending[cause] = (eventTime, node)
+
+            self.order.append(cause)
+
+            self.pendingByNode[node] = cause
+
+        elif kind == 'grant' :
+
+            self.take_token(node, 'enters the critical section without the token')
+
+            if self.using is not None :
+
+                self.violation('single token', node, 'enters the critical section held by ' + str(self.using))
+
+            self.using = node
+
+            self.serve(node, cause)
+
+        elif kind == 'release' :
+
+            if self.using == node :
+
+                self.using = None
+
+        elif kind == 'fail' :
+
+            #the token of a failed node is lost, its recovery regenerates it
+            self.holds.discard(node)
+
+            if self.using == node :
+
+                self.using = None
+
+            self.serve(node, self.pendingByNode.get(node))
+
+            self.holder[node] = None
+
+            self.recovering.add(node)
+
+        elif kind == 'recover' :
+
+            self.recovering.discard(node)
+
+            if peer == node :
+
+                self.holds.add(node)
+
+            else :
+
+                self.holds.discard(node)
+
+            self.set_holder(node, peer)
+
+        if self.bootstrapped and not self.recovering :
+
+            tokens = len(self.holds) + self.inflightTotal
+
+            if tokens != 1 :
+
+                self.violation('single token', node, ('no token left' if tokens == 0 else str(tokens) + ' tokens') + ' after ' + kind)
+
+                #report once, then go on from the tokens found
+                self.bootstrapped = tokens != 0
+
+        if self.maxWait is not None and self.pending :
+
+            order = self.order
+
+            while order[0] not in self.pending :
+
+                order.popleft()
+
+            cause = order[0]
+
+            askTime, asker = self.pending[cause]
+
+            if eventTime - askTime > self.maxWait and cause not in self.starved :
+
+                self.starved.add(cause)
+
+                self.violation('no starvation', asker, 'waits for the privilege since ' + str(askTime))
+
+
+    def serve(self, node, cause):
+
+        if cause is not None and self.pending.pop(cause, None) is not None :
+
+            self.starved.discard(cause)
+
+            if self.pendingByNode.get(node) == cause :
+
+                del self.pendingByNode[node]
+
+
+    def finish(self):
+        """
+        Extended description of function.
+
+        Checks the requests still waiting at the end of the trace : they starve if they
+        waited more than maxWait.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns the list of the violations.
+
+        """
+        for cause, (askTime, node) in self.pending.items() :
+
+            if cause not in self.starved and self.maxWait is not None and self.now - askTime > self.maxWait :
+
+                self.starved.add(cause)
+
+                self.violation('no starvation', node, 'waits for the privilege since ' + str(askTime))
+
+        return self.violations
+
+
+def check(events, maxWait = None, parents = None, ids = None):
+    """
+    Extended description of function.
+
+    Checks a trace offline.
+
+    Parameters
+    ----------
+    events : iterable
+        The events, tuples or dictionaries as returned by Trace.read.
+
+    maxWait : float
+        See Checker.
+
+    parents, ids : lists
+        The initial tree of the network (see Topology), its root holds the first token.
+
+    Returns
+    -------
+    This function returns the Checker, with its violations.
+
+    """
+    checker = Checker(maxWait, parents = parents, ids = ids)
+
+    feed = checker.feed
+
+    for event in events :
+
+        feed(tuple(event[field] for field in FIELDS) if isinstance(event, dict) else event)
+
+    checker.finish()
+
+    return checker
+
+
+if __name__ == '__main__' :
+
+    if len(sys.argv) < 2 :
+
+        print('usage : python Checker.py trace.jsonl [tree file] [maxWait]')
+
+        sys.exit(1)
+
+    parents, ids = None, None
+
+    if len(sys.argv) > 2 and sys.argv[2] :
+
+        parents, ids, _ = Topology.load(sys.argv[2])
+
+    checker = check(read(sys.argv[1]), float(sys.argv[3]) if len(sys.argv) > 3 else None, parents, ids)
+
+    print(checker.events, 'events checked,', len(checker.violations), 'violations')
+
+    for violation in checker.violations[:100] :
+
+        print('   ', *violation)
+
+    sys.exit(1 if checker.violations else 0)
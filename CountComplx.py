@@ -1,11 +0,0 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Sun Nov 25 14:18:29 2018
-
-@author: ordi
-"""
- 
-class CountComplx:
-    countMsg = 0
-    countAskP = 0
-       
\ No newline at end of file
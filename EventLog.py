@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:07:12 2026
+
+Leveled event log of the nodes and networks, replacing the prints of the first versions.
+
+An event is a level, the id of the node (None for the network), an event name and a few
+fields. The nodes only test an integer before building an event : a node whose level is
+above the level of an event, or that is filtered out, pays a comparison. Enabled events
+are appended to a buffer and written by a background thread, so the nodes never wait on
+the output. The output is text lines, or a compact binary format read back by read().
+
+    network.log_events(EventLog('raymond.log', DEBUG, nodes = {3, 5}))
+
+    network.log_events(EventLog('raymond.bin', DEBUG, nodes = {5, 7}, binary = True))
+"""
+
+from collections import deque
+import struct
+import sys
+import threading
+import time
+
+DEBUG = 10
+
+INFO = 20
+
+WARNING = 30
+
+ERROR = 40
+
+#level of the nodes that log nothing
+OFF = 100
+
+LEVEL_NAMES = {DEBUG : 'DEBUG', INFO : 'INFO', WARNING : 'WARNING', ERROR : 'ERROR'}
+
+#binary format : time, level, node + tagged fields
+HEADER = struct.Struct('<dBq')
+
+NO_NODE = -1 << 63
+
+NONE_TAG, INT_TAG, FLOAT_TAG, STR_TAG = range(4)
+
+INT = struct.Struct('<q')
+
+FLOAT = struct.Struct('<d')
+
+
+class EventLog():
+    """
+    This class is a buffered event log with levels and a filter on the nodes.
+
+    Attributes
+    ----------
+    level : int
+        The lowest level written.
+
+    nodes : set
+        The ids of the nodes whose events are written, all the nodes if None. The events
+        of the network itself are always written.
+
+    binary : bool
+        Writes the binary format instead of text lines.
+
+    interval : float
+        Time in seconds between two writes of the buffer.
+
+    clock : callable
+        The clock of the network, set by Network.log_events.
+
+    Methods
+    -------
+    node_level() :
+        The level of a node, see RaymondNode.log.
+
+    write() :
+        Buffers an event.
+
+    flush() :
+        Writes the buffered events.
+
+    close() :
+        Stops the writer and closes the output.
+    """
+
+    def __init__(self, output = None, level = INFO, nodes = None, binary = False, interval = .1, capacity = 1 << 16):
+
+        self.level = level
+
+        self.nodes = None if nodes is None else set(nodes)
+
+        self.binary = binary
+
+        self.interval = interval
+
+        self.capacity = capacity
+
+        self.clock = time.monotonic
+
+        if output is None :
+
+            output = sys.stdout.buffer if binary else sys.stdout
+
+        self.owned = isinstance(output, str)
+
+        self.output = open(output, 'ab' if binary else 'a') if self.owned else output
+
+        #deque.append is atomic, the nodes append without lock
+        self.buffer = deque()
+
+        self.lock = threading.Lock()
+
+        self.wakeup = threading.Event()
+
+        self.terminate = False
+
+        self.writer = threading.Thread(target = self.run)
+
+        self.writer.daemon = True
+
+        self.writer.start()
+
+
+    def node_level(self, nodeId):
+
+        if self.nodes is None or nodeId in self.nodes :
+
+            return self.level
+
+        return OFF
+
+
+    def write(self, level, nodeId, event, fields = ()):
+        """
+        Extended description of function.
+
+        Buffers an event, the caller has checked its level.
+
+        Parameters
+        ----------
+        level : int
+            The level of the event.
+
+        nodeId : int
+            The id of the node, None for the network.
+
+        event : str
+            The name of the event.
+
+        fields : tuple
+            The fields of the event : None, int, float or str.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        buffer = self.buffer
+
+        buffer.append((self.clock(), level, nodeId, event, fields))
+
+        if len(buffer) >= self.capacity :
+
+            self.wakeup.set()
+
+
+    def run(self):
+
+        while not self.terminate :
+
+            self.wakeup.wait(self.interval)
+
+            self.wakeup.clear()
+
+            self.flush()
+
+
+    def flush(self):
+        """
+        Extended description of function.
+
+        Writes the buffered events to the output.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns the number of events written.
+
+        """
+        buffer = self.buffer
+
+        with self.lock :
+
+            events = []
+
+            while buffer :
+
+                events.append(buffer.popleft())
+
+            if not events :
+
+                return 0
+
+            if self.binary :
+
+                self.output.write(b''.join(encode(event) for event in events))
+
+            else :
+
+                self.output.write(''.join(format_event(event) for event in events))
+
+            self.output.flush()
+
+        return len(events)
+
+
+    def close(self):
+
+        self.terminate = True
+
+        self.wakeup.set()
+
+        self.writer.join()
+
+        self.flush()
+
+        if self.owned :
+
+            self.output.close()
+
+
+def format_event(event):
+
+    eventTime, level, nodeId, name, fields = event
+
+    return '%.6f %s %s %s%s\n' % (eventTime, LEVEL_NAMES.get(level, level), 'network' if nodeId is None else nodeId,
+                                  name, ''.join(' ' + str(field) for field in fields))
+
+
+def encode(event):
+    """
+    Extended description of function.
+
+    Encodes an event in the binary format :
+
+        time (float64) | level (uint8) | node id (int64) | name | field count (uint8) | fields
+
+    the name is a length prefixed utf-8 string, and every field a tag byte followed by an
+    int64, a float64 or a length prefixed utf-8 string.
+
+    Parameters
+    ----------
+    event : tuple
+        The (time, level, nodeId, event, fields) of the event.
+
+    Returns
+    -------
+    This function returns bytes.
+
+    """
+    eventTime, level, nodeId, name, fields = event
+
+    parts = [HEADER.pack(eventTime, level, NO_NODE if nodeId is None else nodeId), string(name), bytes((len(fields),))]
+
+    for field in fields :
+
+        if field is None :
+
+            parts.append(bytes((NONE_TAG,)))
+
+        elif isinstance(field, bool) or not isinstance(field, (int, float)) :
+
+            parts.append(bytes((STR_TAG,)) + string(str(field)))
+
+        elif isinstance(field, int) :
+
+            parts.append(bytes((INT_TAG,)) + INT.pack(field))
+
+        else :
+
+            parts.append(bytes((FLOAT_TAG,)) + FLOAT.pack(field))
+
+    return b''.join(parts)
+
+
+def string(value):
+
+    value = value.encode()
+
+    return struct.pack('<H', len(value)) + value
+
+
+def read(path):
+    """
+    Extended description of function.
+
+    Reads the events of a binary log.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    Returns
+    -------
+    This function returns a generator of (time, level, nodeId, event, fields) tuples.
+
+    """
+    with open(path, 'rb') as logFile :
+
+        data = logFile.read()
+
+    position = 0
+
+    def read_string():
+
+        nonlocal position
+
+        length, = struct.unpack_from('<H', data, position)
+
+        position += 2 + length
+
+        return data[position - length:position].decode()
+
+    while position < len(data) :
+
+        eventTime, level, nodeId = HEADER.unpack_from(data, position)
+
+        position += HEADER.size
+
+        name = read_string()
+
+        count = data[position]
+
+        position += 1
+
+        fields = []
+
+        for _ in range(count) :
+
+            tag = data[position]
+
+            position += 1
+
+            if tag == NONE_TAG :
+
+                fields.append(None)
+
+            elif tag == INT_TAG :
+
+                fields.append(INT.unpack_from(data, position)[0])
+
+                position += INT.size
+
+            elif tag == FLOAT_TAG :
+
+                fields.append(FLOAT.unpack_from(data, position)[0])
+
+                position += FLOAT.size
+
+            else :
+
+                fields.append(read_string())
+
+        yield eventTime, level, None if nodeId == NO_NODE else nodeId, name, tuple(fields)
+
+
+if __name__ == '__main__' :
+
+    if len(sys.argv) < 2 :
+
+        print('usage : python EventLog.py raymond.bin')
+
+        sys.exit(1)
+
+    for event in read(sys.argv[1]) :
+
+        sys.stdout.write(format_event(event))
@@ -0,0 +1,682 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:31:52 2026
+
+Metrics of a network : messages by type, by node and by edge, privilege requests and
+grants, the histogram of the request-to-grant latency, and the failures with the histogram
+of the recovery time, from the failure of a node to the end of its recovery.
+
+Every thread counts in its own shard, so counting takes no lock and is never lost to a
+race. Snapshots merge the shards and can be taken, or exported periodically, while the
+network runs :
+
+    MetricsExporter(network.metrics, 'metrics.prom', 10).start()
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+#names of the MsgType constants
+TYPE_NAMES = {'R' : 'REQUEST', 'A' : 'ASSIGN', 'S' : 'RESTART', 'D' : 'ADVISE'}
+
+
+class Histogram():
+    """
+    This class is a histogram with exponential buckets.
+
+    Attributes
+    ----------
+    bounds : list
+        The upper bounds of the buckets, the last bucket has no upper bound.
+
+    counts : list
+        The number of observations in each bucket.
+
+    count : int
+        The number of observations.
+
+    sum : float
+        The sum of the observations.
+
+    Methods
+    -------
+    observe() :
+        Adds an observation.
+
+    merge() :
+        Adds the observations of another histogram.
+
+    quantile() :
+        Estimates a quantile from the buckets.
+    """
+    BOUNDS = [1e-3 * 2 ** k for k in range(24)]
+
+    def __init__(self, bounds = None):
+
+        self.bounds = self.BOUNDS if bounds is None else bounds
+
+        self.counts = [0] * (len(self.bounds) + 1)
+
+        self.count = 0
+
+        self.sum = 0.
+
+
+    def observe(self, value):
+
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+
+        self.count += 1
+
+        self.sum += value
+
+
+    def merge(self, other):
+
+        for i, count in enumerate(other.counts) :
+
+            self.counts[i] += count
+
+        self.count += other.count
+
+        self.sum += other.sum
+
+
+    def copy(self):
+
+        histogram = Histogram(self.bounds)
+
+        histogram.merge(self)
+
+        return histogram
+
+
+    def quantile(self, q):
+        """
+        Extended description of function.
+
+        Estimates a quantile, interpolating linearly inside the bucket that contains it.
+
+        Parameters
+        ----------
+        q : float
+            The quantile, between 0 and 1.
+
+        Returns
+        -------
+        This function returns a float, None if the histogram is empty.
+
+        """
+        if not self.count :
+
+            return None
+
+        rank = q * self.count
+
+        seen = 0
+
+        for i, count in enumerate(self.counts) :
+
+            if count and seen + count >= rank :
+
+                low = self.bounds[i - 1] if i > 0 else 0.
+
+                high = self.bounds[i] if i < len(self.bounds) else low * 2
+
+                return low + (high - low) * (rank - seen) / count
+
+            seen += count
+
+        return self.bounds[-1]
+
+
+    def to_dict(self):
+
+        return {'count' : self.count, 'sum' : self.sum, 'bounds' : self.bounds, 'counts' : self.counts,
+                'mean' : self.sum / self.count if self.count else None,
+                'p50' : self.quantile(.5), 'p99' : self.quantile(.99)}
+
+
+def jain_fairness(counts):
+    """
+    Extended description of function.
+
+    Jain's fairness index of counts, (sum x) ** 2 / (n * sum x ** 2) : 1 when all the
+    counts are equal, 1 / n when one count has all.
+
+    Parameters
+    ----------
+    counts : list
+        The counts, for instance the grants of every node, those of 0 included.
+
+    Returns
+    -------
+    This function returns a float, None if all the counts are 0.
+
+    """
+    squares = sum(count * count for count in counts)
+
+    return sum(counts) ** 2 / (len(counts) * squares) if squares else None
+
+
+class Shard():
+    """
+    The counters of one thread.
+    """
+
+    def __init__(self):
+
+        self.byType = dict.fromkeys(TYPE_NAMES, 0)
+
+        self.byNode = {}
+
+        self.byEdge = {}
+
+        self.asks = 0
+
+        self.grants = {}
+
+        self.latency = Histogram()
+
+        self.failures = 0
+
+        self.retries = 0
+
+        self.recovery = Histogram()
+
+
+class Metrics():
+    """
+    This class collects the metrics of a network.
+
+    Attributes
+    ----------
+    clock : callable
+        Returns the current time in seconds, time.monotonic by default, the virtual
+        clock for simulations.
+
+    askTimes : dict
+        The time of the pending privilege request of each node.
+
+    failTimes : dict
+        The time of the failure of each node in recovery.
+
+    Methods
+    -------
+    message() :
+        Counts a message.
+
+    ask() :
+        Counts a privilege request.
+
+    grant() :
+        Counts the entry of a node in the critical section.
+
+    fail(), recover(), retry() :
+        Count the failures, the recoveries and their time, and the restart retries.
+
+    snapshot() :
+        Returns the merged metrics.
+
+    to_json(), to_prometheus() :
+        Exports a snapshot.
+    """
+
+    def __init__(self, clock = time.monotonic):
+
+        self.clock = clock
+
+        self.askTimes = {}
+
+        self.failTimes = {}
+
+        self.local = threading.local()
+
+        self.shards = []
+
+        self.lock = threading.Lock()
+
+
+    def shard(self):
+
+        try :
+
+            return self.local.shard
+
+        except AttributeError :
+
+            shard = self.local.shard = Shard()
+
+            with self.lock :
+
+                self.shards.append(shard)
+
+            return shard
+
+
+    def message(self, msgType, senderId, dest):
+        """
+        Extended description of function.
+
+        Counts a message sent by senderId to dest.
+
+        Parameters
+        ----------
+        msgType : str
+            A constant of MsgType.
+
+        senderId : int
+            The id of the sender.
+
+        dest : int
+            The id of the receiver.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        shard = self.shard()
+
+        shard.byType[msgType] += 1
+
+        byNode = shard.byNode
+
+        byNode[senderId] = byNode.get(senderId, 0) + 1
+
+        edge = (senderId, dest)
+
+        byEdge = shard.byEdge
+
+        byEdge[edge] = byEdge.get(edge, 0) + 1
+
+
+    def ask(self, nodeId):
+        """
+        Extended description of function.
+
+        Counts a privilege request of a node and remembers its time.
+
+        Parameters
+        ----------
+        nodeId : int
+            The id of the node.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        self.shard().asks += 1
+
+        self.askTimes[nodeId] = self.clock()
+
+
+    def grant(self, nodeId):
+        """
+        Extended description of function.
+
+        Counts the entry of a node in the critical section and the latency since its request.
+
+        Parameters
+        ----------
+        nodeId : int
+            The id of the node.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        shard = self.shard()
+
+        shard.grants[nodeId] = shard.grants.get(nodeId, 0) + 1
+
+        askTime = self.askTimes.pop(nodeId, None)
+
+        if askTime is not None :
+
+            shard.latency.observe(self.clock() - askTime)
+
+
+    def drop(self, nodeId):
+        """
+        Extended description of function.
+
+        Forgets the pending request of a node, lost in a failure.
+
+        """
+        self.askTimes.pop(nodeId, None)
+
+
+    def fail(self, nodeId):
+        """
+        Extended description of function.
+
+        Counts the failure of a node and remembers its time.
+
+        Parameters
+        ----------
+        nodeId : int
+            The id of the node.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        self.shard().failures += 1
+
+        self.failTimes[nodeId] = self.clock()
+
+
+    def recover(self, nodeId):
+        """
+        Extended description of function.
+
+        Counts the time a node took to recover since its failure : its downtime and the
+        collection of the advise messages of its neighbors.
+
+        Parameters
+        ----------
+        nodeId : int
+            The id of the node.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        failTime = self.failTimes.pop(nodeId, None)
+
+        if failTime is not None :
+
+            self.shard().recovery.observe(self.clock() - failTime)
+
+
+    def retry(self, nodeId):
+
+        self.shard().retries += 1
+
+
+    def snapshot(self):
+        """
+        Extended description of function.
+
+        Merges the shards of all the threads. It can be called while the network runs.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns a dictionary.
+
+        """
+        with self.lock :
+
+            shards = list(self.shards)
+
+        byType = dict.fromkeys(TYPE_NAMES.values(), 0)
+
+        byNode = {}
+
+        byEdge = {}
+
+        grants = {}
+
+        latency = Histogram()
+
+        recovery = Histogram()
+
+        asks = failures = retries = 0
+
+        for shard in shards :
+
+            #dict.copy is atomic, the owner thread can keep counting
+            for msgType, count in shard.byType.copy().items() :
+
+                byType[TYPE_NAMES[msgType]] += count
+
+            for counts, total in ((shard.byNode.copy(), byNode), (shard.byEdge.copy(), byEdge), (shard.grants.copy(), grants)) :
+
+                for key, count in counts.items() :
+
+                    total[key] = total.get(key, 0) + count
+
+            latency.merge(shard.latency.copy())
+
+            asks += shard.asks
+
+            recovery.merge(shard.recovery.copy())
+
+            failures += shard.failures
+
+            retries += shard.retries
+
+        messages = sum(byType.values())
+
+        return {'time' : self.clock(), 'messages' : messages, 'byType' : byType, 'byNode' : byNode,
+                'byEdge' : byEdge, 'asks' : asks, 'grants' : sum(grants.values()), 'grantsByNode' : grants,
+                'pending' : len(self.askTimes), 'latency' : latency,
+                'complexity' : messages / asks if asks else None, 'failures' : failures,
+                'down' : len(self.failTimes), 'retries' : retries, 'recovery' : recovery}
+
+
+    def messages(self):
+
+        with self.lock :
+
+            return sum(sum(shard.byType.values()) for shard in self.shards)
+
+
+    def asks(self):
+
+        with self.lock :
+
+            return sum(shard.asks for shard in self.shards)
+
+
+    def merge(self, snapshot):
+        """
+        Extended description of function.
+
+        Adds the counters of a snapshot of another Metrics, to gather the metrics of
+        several networks or processes.
+
+        Parameters
+        ----------
+        snapshot : dict
+            A snapshot, as returned by snapshot().
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        shard = Shard()
+
+        names = {name : msgType for msgType, name in TYPE_NAMES.items()}
+
+        for name, count in snapshot['byType'].items() :
+
+            shard.byType[names[name]] += count
+
+        shard.byNode.update(snapshot['byNode'])
+
+        shard.byEdge.update(snapshot['byEdge'])
+
+        shard.grants.update(snapshot['grantsByNode'])
+
+        shard.asks = snapshot['asks']
+
+        shard.latency.merge(snapshot['latency'])
+
+        shard.failures = snapshot['failures']
+
+        shard.retries = snapshot['retries']
+
+        shard.recovery.merge(snapshot['recovery'])
+
+        with self.lock :
+
+            self.shards.append(shard)
+
+
+    def to_json(self, snapshot = None):
+
+        snapshot = self.snapshot() if snapshot is None else snapshot
+
+        snapshot = dict(snapshot)
+
+        snapshot['byEdge'] = {str(src) + '->' + str(dest) : count for (src, dest), count in snapshot['byEdge'].items()}
+
+        snapshot['latency'] = snapshot['latency'].to_dict()
+
+        snapshot['recovery'] = snapshot['recovery'].to_dict()
+
+        return json.dumps(snapshot, default = str)
+
+
+    def to_prometheus(self, snapshot = None):
+
+        snapshot = self.snapshot() if snapshot is None else snapshot
+
+        lines = ['# TYPE raymond_messages_total counter']
+
+        for name, count in snapshot['byType'].items() :
+
+            lines.append('raymond_messages_total{type="%s"} %d' % (name, count))
+
+        lines.append('# TYPE raymond_node_messages_total counter')
+
+        for nodeId, count in snapshot['byNode'].items() :
+
+            lines.append('raymond_node_messages_total{node="%s"} %d' % (nodeId, count))
+
+        lines.append('# TYPE raymond_edge_messages_total counter')
+
+        for (src, dest), count in snapshot['byEdge'].items() :
+
+            lines.append('raymond_edge_messages_total{src="%s",dst="%s"} %d' % (src, dest, count))
+
+        lines.append('# TYPE raymond_requests_total counter')
+
+        lines.append('raymond_requests_total %d' % snapshot['asks'])
+
+        lines.append('# TYPE raymond_grants_total counter')
+
+        lines.append('raymond_grants_total %d' % snapshot['grants'])
+
+        latency = snapshot['latency']
+
+        lines.append('# TYPE raymond_grant_latency_seconds histogram')
+
+        cumulated = 0
+
+        for bound, count in zip(latency.bounds + ['+Inf'], latency.counts) :
+
+            cumulated += count
+
+            lines.append('raymond_grant_latency_seconds_bucket{le="%s"} %d' % (bound, cumulated))
+
+        lines.append('raymond_grant_latency_seconds_sum %r' % latency.sum)
+
+        lines.append('raymond_grant_latency_seconds_count %d' % latency.count)
+
+        lines.append('# TYPE raymond_failures_total counter')
+
+        lines.append('raymond_failures_total %d' % snapshot['failures'])
+
+        lines.append('# TYPE raymond_nodes_down gauge')
+
+        lines.append('raymond_nodes_down %d' % snapshot['down'])
+
+        lines.append('# TYPE raymond_restart_retries_total counter')
+
+        lines.append('raymond_restart_retries_total %d' % snapshot['retries'])
+
+        recovery = snapshot['recovery']
+
+        lines.append('# TYPE raymond_recovery_seconds histogram')
+
+        cumulated = 0
+
+        for bound, count in zip(recovery.bounds + ['+Inf'], recovery.counts) :
+
+            cumulated += count
+
+            lines.append('raymond_recovery_seconds_bucket{le="%s"} %d' % (bound, cumulated))
+
+        lines.append('raymond_recovery_seconds_sum %r' % recovery.sum)
+
+        lines.append('raymond_recovery_seconds_count %d' % recovery.count)
+
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter(threading.Thread):
+    """
+    This class is a thread writing snapshots of metrics to a file periodically, in
+    JSON, or in the Prometheus text format if the file name ends with .prom.
+
+    Attributes
+    ----------
+    metrics : Metrics
+        The metrics to export.
+
+    path : str
+        The file written, it is replaced atomically at each export.
+
+    interval : float
+        Time in seconds between two exports.
+
+    terminate : threading.Event
+        Stops the exporter, after a last export.
+    """
+
+    def __init__(self, metrics, path, interval = 10.):
+
+        threading.Thread.__init__(self)
+
+        self.daemon = True
+
+        self.metrics = metrics
+
+        self.path = path
+
+        self.interval = interval
+
+        self.terminate = threading.Event()
+
+
+    def export(self):
+
+        if self.path.endswith('.prom') :
+
+            content = self.metrics.to_prometheus()
+
+        else :
+
+            content = self.metrics.to_json()
+
+        temporary = self.path + '.tmp'
+
+        with open(temporary, 'w') as exportFile :
+
+            exportFile.write(content)
+
+        os.replace(temporary, self.path)
+
+
+    def run(self):
+
+        while not self.terminate.wait(self.interval) :
+
+            self.export()
+
+        self.export()
@@ -0,0 +1,541 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:14:05 2026
+
+Monte Carlo estimation of the message complexity and of the waiting time of a tree,
+with many independent replicas of the network simulated at once in NumPy.
+
+The state of all the replicas is kept in arrays of shape (replicas, nodes), flattened, and
+time advances by steps of one message latency : the messages sent during a step are
+delivered at the next one, the steps where nothing happens are skipped. A node handles
+the messages, requests and end of critical section of a step as a batch, then assigns
+and requests the privilege once, like RaymondNode.on_batch, so every step is a handful
+of array operations over the active nodes of all the replicas.
+
+    estimator = MonteCarlo(Topology.kary(100), activityRate = .05, replicas = 1000, seed = 1)
+
+    result = estimator.run(3600)
+
+    print(result.complexity, result.waiting)
+
+    print(MonteCarlo.from_network(network, replicas = 1000, latency = 5e-5).run(3600))
+
+The replicas run without failures. The asks of a node follow a Poisson process of rate
+askingPrivRate, an ask made while the node waits for the privilege is dropped, as in Node.
+"""
+
+import math
+import random
+from statistics import NormalDist
+import numpy as np
+from Node import RaymondNode
+from Topology import check_tree
+from Workload import Constant, Exponential, LogNormal
+
+
+class Estimate():
+    """
+    This class holds the estimate of a mean over the replicas and its confidence interval.
+
+    Attributes
+    ----------
+    mean : float
+        The mean over the replicas.
+
+    low, high : float
+        The bounds of the confidence interval.
+
+    std : float
+        The standard deviation over the replicas.
+
+    samples : numpy.ndarray
+        The value of each replica.
+    """
+
+    def __init__(self, samples, confidence = .95):
+
+        samples = np.asarray(samples, dtype = np.float64)
+
+        self.samples = samples = samples[~np.isnan(samples)]
+
+        self.mean = samples.mean() if len(samples) else math.nan
+
+        self.std = samples.std(ddof = 1) if len(samples) > 1 else math.nan
+
+        halfWidth = NormalDist().inv_cdf((1 + confidence) / 2) * self.std / math.sqrt(len(samples)) if len(samples) > 1 else math.nan
+
+        self.low = self.mean - halfWidth
+
+        self.high = self.mean + halfWidth
+
+
+    def __repr__(self):
+
+        return '%.4f [%.4f, %.4f]' % (self.mean, self.low, self.high)
+
+
+class MonteCarloResult():
+    """
+    This class holds the results of a Monte Carlo run.
+
+    Attributes
+    ----------
+    replicas : int
+        The number of replicas.
+
+    elapsed : float
+        The simulated duration in seconds.
+
+    complexity : Estimate
+        The number of messages by privilege request.
+
+    waiting : Estimate
+        The mean time in seconds from a privilege request to its grant.
+
+    messages, requests, grants : numpy.ndarray
+        The counts of each replica.
+
+    byType : dict
+        The number of messages by type, over all the replicas.
+    """
+
+    def __init__(self, elapsed, messages, requests, grants, waitSum, byType, confidence = .95):
+
+        self.replicas = len(messages)
+
+        self.elapsed = elapsed
+
+        self.messages = messages
+
+        self.requests = requests
+
+        self.grants = grants
+
+        self.byType = byType
+
+        with np.errstate(divide = 'ignore', invalid = 'ignore') :
+
+            self.complexity = Estimate(messages / requests, confidence)
+
+            self.waiting = Estimate(waitSum / grants, confidence)
+
+
+    def __repr__(self):
+
+        return 'MonteCarloResult(replicas = %d, elapsed = %.3f, requests = %d, complexity = %r, waiting = %r)' % (
+            self.replicas, self.elapsed, self.requests.sum(), self.complexity, self.waiting)
+
+
+def samples(workload, rng, size):
+    """
+    Extended description of function.
+
+    Draws size samples of a workload with a NumPy generator, the workloads without a
+    NumPy equivalent are sampled one by one.
+
+    Returns
+    -------
+    This function returns a numpy.ndarray.
+
+    """
+    if isinstance(workload, Constant) :
+
+        return np.full(size, workload.value, dtype = np.float64)
+
+    if isinstance(workload, Exponential) :
+
+        return rng.exponential(workload.meanTime, size)
+
+    if isinstance(workload, LogNormal) :
+
+        return rng.lognormal(workload.mu, workload.sigma, size)
+
+    pyRng = random.Random(int(rng.integers(1 << 62)))
+
+    return np.array([workload.sample(pyRng) for _ in range(size)], dtype = np.float64)
+
+
+def unique(values):
+
+    #sorted unique values, np.unique hashes small integer arrays more slowly than it sorts them
+    values = np.sort(values)
+
+    if len(values) < 2 :
+
+        return values
+
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+class MonteCarlo():
+    """
+    This class simulates replicas of a tree at once, to estimate its message complexity and
+    waiting time with confidence intervals.
+
+    Attributes
+    ----------
+    n : int
+        The number of nodes of the tree.
+
+    replicas : int
+        The number of replicas.
+
+    latency : float
+        Time in seconds a message takes to be delivered, the length of a step.
+
+    askingPrivRate : numpy.ndarray
+        The asking privilege rate of each node.
+
+    workload : Workload
+        The distribution of the time a node holds the ressource, see Workload.
+
+    rng : numpy.random.Generator
+        The random generator of the replicas.
+
+    Methods
+    -------
+    run() :
+        Simulates the replicas for a given duration.
+
+    from_network() :
+        Builds the estimator of the tree and rates of a network.
+    """
+
+    def __init__(self, parents, activityRate = .05, askingPrivRates = None, replicas = 100, latency = 1e-3,
+                 workload = None, seed = None):
+
+        parents = np.asarray(parents, dtype = np.int64)
+
+        check_tree(parents.tolist())
+
+        n = self.n = len(parents)
+
+        self.replicas = replicas
+
+        self.latency = latency
+
+        self.workload = RaymondNode.workload if workload is None else workload
+
+        self.rng = np.random.default_rng(seed)
+
+        if askingPrivRates is None :
+
+            self.askingPrivRate = np.full(n, activityRate, dtype = np.float64)
+
+        else :
+
+            self.askingPrivRate = np.asarray(askingPrivRates, dtype = np.float64)
+
+        nodes = np.arange(n, dtype = np.int64)
+
+        self.holderId = np.where(parents < 0, nodes, parents)
+
+        #request queues : a ring buffer of degree + 1 entries by node, a neighbor is queued once
+        degree = np.bincount(parents[parents >= 0], minlength = n) + (parents >= 0)
+
+        self.queueCapacity = degree + 1
+
+        self.queueStart = np.concatenate(([0], np.cumsum(self.queueCapacity)[:-1]))
+
+        self.queueSize = int(self.queueCapacity.sum())
+
+
+    @classmethod
+    def from_network(cls, network, replicas = 100, latency = None, seed = None):
+        """
+        Extended description of function.
+
+        Builds the estimator of the tree, asking privilege rates and workload of a network
+        that has not run yet.
+
+        Parameters
+        ----------
+        network : Network
+            The network, its holders give the tree.
+
+        replicas : int
+            The number of replicas.
+
+        latency : float
+            The latency of the messages, the one of the network for the simulators, 1e-3
+            seconds otherwise.
+
+        seed : int
+            The seed of the random generator.
+
+        Returns
+        -------
+        This function returns a MonteCarlo.
+
+        """
+        ids = list(network.nodes.keys())
+
+        position = {nodeId : i for i, nodeId in enumerate(ids)}
+
+        nodes = [network.nodes[nodeId] for nodeId in ids]
+
+        parents = [-1 if node.holderId == node.id else position[node.holderId] for node in nodes]
+
+        return cls(parents, network.activityRate, [node.askingPrivRate for node in nodes], replicas,
+                   getattr(network, 'latency', 1e-3) if latency is None else latency, network.workload, seed)
+
+
+    def draw_asks(self, count):
+
+        #the asks of a replica are a Poisson process of the total rate, each made by a node
+        #drawn in proportion to its rate
+        return self.rng.exponential(1. / self.totalRate, count), np.searchsorted(self.rateCdf, self.rng.random(count), side = 'right')
+
+
+    def run(self, duration = 3600., confidence = .95):
+        """
+        Extended description of function.
+
+        Simulates the replicas for duration seconds from the initial state, the root of the
+        tree holding the privilege.
+
+        Every replica has its own clock : an iteration moves each replica to its next step
+        where something happens (an ask, the end of a critical section or messages to
+        deliver) and handles it, so the replicas are busy at every iteration however sparse
+        their events are.
+
+        Parameters
+        ----------
+        duration : float
+            The simulated duration in seconds.
+
+        confidence : float
+            The level of the confidence intervals.
+
+        Returns
+        -------
+        This function returns a MonteCarloResult.
+
+        """
+        n, replicas, latency = self.n, self.replicas, self.latency
+
+        size = n * replicas
+
+        local = np.tile(np.arange(n, dtype = np.int64), replicas)
+
+        replica = np.repeat(np.arange(replicas, dtype = np.int64), n)
+
+        #the state of node i of replica r is at r * n + i, holders are local ids
+        holderId = np.tile(self.holderId, replicas)
+
+        asked = np.zeros(size, dtype = bool)
+
+        using = np.zeros(size, dtype = bool)
+
+        waiting = np.zeros(size, dtype = bool)
+
+        askStep = np.zeros(size, dtype = np.int64)
+
+        queueStart = replica * self.queueSize + np.tile(self.queueStart, replicas)
+
+        queueCapacity = np.tile(self.queueCapacity, replicas)
+
+        queueHead = np.zeros(size, dtype = np.int64)
+
+        queueLength = np.zeros(size, dtype = np.int64)
+
+        queueData = np.zeros(self.queueSize * replicas, dtype = np.int64)
+
+        #the current step of each replica, one node at most is in its critical section
+        stepOf = np.zeros(replicas, dtype = np.int64)
+
+        csEnd = np.full(replicas, np.inf)
+
+        usingNode = np.full(replicas, -1, dtype = np.int64)
+
+        messages = np.zeros(replicas, dtype = np.int64)
+
+        requests = np.zeros(replicas, dtype = np.int64)
+
+        grants = np.zeros(replicas, dtype = np.int64)
+
+        waitSum = np.zeros(replicas, dtype = np.float64)
+
+        byType = {'REQUEST' : 0, 'ASSIGN' : 0}
+
+        lastStep = int(math.floor(duration / latency))
+
+        self.totalRate = self.askingPrivRate.sum()
+
+        self.rateCdf = np.cumsum(self.askingPrivRate) / self.totalRate if self.totalRate > 0 else None
+
+        if self.totalRate > 0 :
+
+            askTime, askNode = self.draw_asks(replicas)
+
+        else :
+
+            askTime, askNode = np.full(replicas, np.inf), np.zeros(replicas, dtype = np.int64)
+
+        #an ask at time t is handled at the end of its step
+        askAt = np.maximum(np.ceil(askTime / latency), 1)
+
+        #messages in flight : source, destination, is an assign, step sent
+        outSource = outDestination = outStep = np.zeros(0, dtype = np.int64)
+
+        outAssign = np.zeros(0, dtype = bool)
+
+        while True :
+
+            nextStep = np.minimum(askAt, csEnd)
+
+            if len(outSource) :
+
+                inFlight = np.bincount(replica[outSource], minlength = replicas) > 0
+
+                nextStep[inFlight] = np.minimum(nextStep[inFlight], stepOf[inFlight] + 1)
+
+            active = nextStep <= lastStep
+
+            if not active.any() :
+
+                break
+
+            stepOf[active] = nextStep[active]
+
+            #messages sent at the previous step of their replica, the others wait for the
+            #end of a critical section shorter than half a step
+            delivered = active[replica[outSource]] & (outStep + 1 == stepOf[replica[outSource]])
+
+            source, destination, isAssign = outSource[delivered], outDestination[delivered], outAssign[delivered]
+
+            kept = ~delivered
+
+            outSource, outDestination, outAssign, outStep = outSource[kept], outDestination[kept], outAssign[kept], outStep[kept]
+
+            #asks of the step, dropped if the node already waits for the privilege
+            asking = []
+
+            due = np.flatnonzero(active & (askAt == stepOf))
+
+            while len(due) :
+
+                asking.append(due * n + askNode[due])
+
+                delay, askNode[due] = self.draw_asks(len(due))
+
+                askTime[due] += delay
+
+                askAt[due] = np.maximum(np.ceil(askTime[due] / latency), 1)
+
+                due = due[askAt[due] == stepOf[due]]
+
+            asking = unique(np.concatenate(asking)) if asking else np.zeros(0, dtype = np.int64)
+
+            asking = asking[~waiting[asking]]
+
+            waiting[asking] = True
+
+            askStep[asking] = stepOf[replica[asking]]
+
+            requests += np.bincount(replica[asking], minlength = replicas)
+
+            #ends of the critical sections
+            ended = np.flatnonzero(active & (csEnd == stepOf))
+
+            csEnd[ended] = np.inf
+
+            leaving = usingNode[ended]
+
+            using[leaving] = False
+
+            #ASSIGN : the receiver becomes the holder
+            assigned = destination[isAssign]
+
+            holderId[assigned] = local[assigned]
+
+            #REQUEST then asks are appended to the request queues, in order
+            isRequest = ~isAssign
+
+            queued = np.concatenate((destination[isRequest], asking))
+
+            values = np.concatenate((local[source[isRequest]], local[asking]))
+
+            if len(queued) :
+
+                order = np.argsort(queued, kind = 'stable')
+
+                queued, values = queued[order], values[order]
+
+                first = np.flatnonzero(np.concatenate(([True], queued[1:] != queued[:-1])))
+
+                counts = np.diff(np.append(first, len(queued)))
+
+                rank = np.arange(len(queued)) - np.repeat(first, counts)
+
+                slot = (queueHead[queued] + queueLength[queued] + rank) % queueCapacity[queued]
+
+                queueData[queueStart[queued] + slot] = values
+
+                queueLength[queued[first]] += counts
+
+            touched = unique(np.concatenate((destination, asking, leaving)))
+
+            #assign_privilege : the holder out of the critical section serves the head of its queue
+            serving = touched[(holderId[touched] == local[touched]) & ~using[touched] & (queueLength[touched] > 0)]
+
+            head = queueData[queueStart[serving] + queueHead[serving]]
+
+            queueHead[serving] = (queueHead[serving] + 1) % queueCapacity[serving]
+
+            queueLength[serving] -= 1
+
+            holderId[serving] = head
+
+            asked[serving] = False
+
+            isSelf = head == local[serving]
+
+            granted = serving[isSelf]
+
+            if len(granted) :
+
+                grantReplica = replica[granted]
+
+                waiting[granted] = False
+
+                using[granted] = True
+
+                usingNode[grantReplica] = granted
+
+                grants[grantReplica] += 1
+
+                waitSum[grantReplica] += (stepOf[grantReplica] - askStep[granted]) * latency
+
+                csEnd[grantReplica] = stepOf[grantReplica] + np.rint(samples(self.workload, self.rng, len(granted)) / latency)
+
+            passing = serving[~isSelf]
+
+            sentAssign = replica[passing] * n + head[~isSelf]
+
+            #make_request : a node that is not the holder asks its holder once for its queue
+            requesting = touched[(holderId[touched] != local[touched]) & (queueLength[touched] > 0) & ~asked[touched]]
+
+            asked[requesting] = True
+
+            sentRequest = replica[requesting] * n + holderId[requesting]
+
+            if len(passing) or len(requesting) :
+
+                sentSource = np.concatenate((passing, requesting))
+
+                outSource = np.concatenate((outSource, sentSource))
+
+                outDestination = np.concatenate((outDestination, sentAssign, sentRequest))
+
+                outAssign = np.concatenate((outAssign, np.ones(len(passing), dtype = bool), np.zeros(len(requesting), dtype = bool)))
+
+                outStep = np.concatenate((outStep, stepOf[replica[sentSource]]))
+
+                messages += np.bincount(replica[sentSource], minlength = replicas)
+
+                byType['ASSIGN'] += len(passing)
+
+                byType['REQUEST'] += len(requesting)
+
+        return MonteCarloResult(duration, messages, requests, grants, waitSum, byType, confidence)
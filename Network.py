@@ -1,214 +1,1079 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Nov 23 20:15:11 2018
-
-@author  : khalid MAJDOUB
-"""
-
-from Node import Node
-import time
-import random
-import math
-import sys
-from CountComplx import CountComplx
-
-
-class Network():    
-    """    
-    This class simulates the network. 
-    
-    Attributes
-    ----------
-    nodes : dict
-        Python dicionary containing the list of nodes.
-        
-    failureRate : float
-        Failure rate in the network, number of failures per second.
-        
-    activityRate : float
-        Activity rate in the network, number of times per second a node
-        asks for priviledge.
-        
-    terminate : bool
-        A flag that indicates the state of the network, it is set to false to
-        stop the network.
-    
-    Methods
-    -------
-    addNode() :
-        Add a node to the network.
-        
-    start():
-        Starts the network. And randomly make a node fail according to exponential 
-        distribution.
-        
-    stop():
-        Stops the network. And collects complexity data.
-    """
-    def __init__(self, failureRate = 1e-4, activityRate = .05): 
-    
-        self.nodes = {}
-        
-        self.failureRate = failureRate
-        
-        self.activityRate = activityRate
-        
-        self.terminate = False
-        
-        
-        
-        
-    def addNode(self, nodeId, holderId = None, askingPrivRate = None):
-        """    
-        Extended description of function.
-        
-        This function adds a node to the network and connect it to its holder.
-
-        Parameters
-        ----------
-        nodeId : int 
-            The id of the node.
-        
-        holderId : int
-            The id of the node holder.
-    
-        Returns
-        -------
-        This function returns no value.
-    
-        """        
-        if nodeId in [nid for nid in self.nodes] :
-            
-            #if the id given already exists raise error 
-            raise NameError('node id must be unique !')
-            
-            sys.exit(0)
-            
-        else :
-            
-            if askingPrivRate is None :
-                
-                #if no askinPrivRate is specified for the node, initialise it with the activityRate of network
-                askingPrivRate = self.activityRate
-            
-            #instantiate the node and add it to the dicionary under the key = nodeId
-            self.nodes[nodeId] = Node(nodeId, holderId, askingPrivRate)
-            
-            if holderId :
-                
-                #if holder id of the node is specified add it to the node neighbors and
-                #add the node to the holder neighbors
-                self.nodes[nodeId].neighborsId.append(holderId)    
-                
-                self.nodes[holderId].neighborsId.append(nodeId)
-            
-    
-    
-    
-    def next_time(self):
-        """    
-        Extended description of function.
-        
-        This function samples from an exponential distribution 
-        to simulate next time a node will fail.
-        
-        Parameters
-        ----------
-        This function takes no argument.
-    
-        Returns
-        -------
-        This function returns a float.
-    
-        """        
-        return -math.log(1.0 - random.random()) / self.failureRate
-    
-    
-    
-    def start(self):
-        """    
-        Extended description of function.
-        
-        This function starts all the nodes and pick one of them
-        randomly from time to time and make fail. To simulate behaviour 
-        of a real network.
-        
-        Parameters
-        ----------
-        This function takes no argument.
-    
-        Returns
-        -------
-        This function returns a float.
-    
-        """       
-        nodesIds = list( self.nodes.keys() )
-        
-        randomNode = self.nodes[nodesIds[0]]
-        
-        #start the nodes as deamon threads
-        for node in self.nodes.values() :
-            
-            node.daemon = True
-            
-            node.start()
-        
-        if self.failureRate :
-        
-            t = time.clock()
-            
-            failureTime = self.next_time()
-        
-        while not self.terminate :
-            
-            if self.failureRate and not randomNode.inRecovery.isSet() and time.clock() - t > failureTime :
-                
-                #if the last failed node is out of recovery mode and next time of failure
-                #is surpassed, pick up a randome node from the dictionary and make it fail
-                randomNodeId = nodesIds[random.randint(0, len(self.nodes)-1)]
-                
-                randomNode = self.nodes[randomNodeId]
-                
-                randomNode.fail()
-                
-                t = time.clock()
-                
-                failureTime = self.next_time()
-                
-            time.sleep(.2)
-        
-        
-        
-        
-    def stop(self):
-        """    
-        Extended description of function.
-        
-        This function stops the network and send terminate signal
-        to its nodes.
-        
-        Parameters
-        ----------
-        This function takes no argument.
-    
-        Returns
-        -------
-        This function returns a float.
-    
-        """
-        print('Stopping network ...')
-        
-        self.terminate = True
-        
-        #Before stopping the network set terminate signal of the nodes and return the complexity 
-        for node in self.nodes.values() :
-            
-            node.terminate.set()
-            
-            print('network stopped successfully')
-            
-        return CountComplx.countMsg, CountComplx.countAskP
-        
-        
-            
-            
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Nov 23 20:15:11 2018
+
+@author  : khalid MAJDOUB
+"""
+
+from collections import deque
+from Node import Node, Ressource
+from Workload import Workload, Constant
+from Transport import InMemoryTransport
+from Topology import check_tree
+import threading
+import time
+import random
+import math
+import sys
+from Metrics import Metrics
+from Scheduler import RealTimeScheduler
+from EventLog import EventLog, INFO, OFF
+
+
+class RunResult():
+    """    
+    This class holds the results of a run.
+    
+    Attributes
+    ----------
+    reason : str
+        Why the run stopped : 'duration', 'max_requests', 'until', 'stop' or 'interrupt'.
+        
+    elapsed : float
+        The duration of the run in seconds, virtual seconds for the simulators.
+        
+    messages, requests, grants : int
+        The number of messages sent, privilege requests and entries in the critical section.
+        
+    complexity : float
+        The number of messages by privilege request.
+        
+    latency : Histogram
+        The request to grant latencies.
+    
+    failures : int
+        The number of node failures.
+    
+    recovery : Histogram
+        The recovery times, from the failure of a node to the end of its recovery.
+        
+    usage : dict
+        The usage of the ressource : utilization, throughput (grants per second), idle gaps, 
+        see Ressource.usage.
+        
+    snapshot : dict
+        The metrics of the network at the end of the run, see Metrics.snapshot.
+    """
+    def __init__(self, reason, elapsed, snapshot, usage = None):
+        
+        self.reason = reason
+        
+        self.elapsed = elapsed
+        
+        self.snapshot = snapshot
+        
+        self.messages = snapshot['messages']
+        
+        self.requests = snapshot['asks']
+        
+        self.grants = snapshot['grants']
+        
+        self.complexity = snapshot['complexity']
+        
+        self.latency = snapshot['latency']
+        
+        self.failures = snapshot['failures']
+        
+        self.recovery = snapshot['recovery']
+        
+        self.usage = usage
+        
+        
+    def __repr__(self):
+        
+        usage = ''
+        
+        if self.usage is not None :
+            
+            usage = ', utilization = %.3f, throughput = %.3f' % (self.usage['utilization'] or 0., self.usage['throughput'] or 0.)
+        
+        if self.failures :
+            
+            usage += ', failures = %d, recovery p50 = %.3f, p99 = %.3f' % (self.failures, self.recovery.quantile(.5) or 0.,
+                                                                           self.recovery.quantile(.99) or 0.)
+        
+        return 'RunResult(reason = %r, elapsed = %.3f, messages = %d, requests = %d, grants = %d, complexity = %s%s)' % (
+            self.reason, self.elapsed, self.messages, self.requests, self.grants, self.complexity, usage)
+        
+        
+        
+
+class Network():    
+    """    
+    This class simulates the network. 
+    
+    Attributes
+    ----------
+    nodes : dict
+        Python dicionary containing the list of nodes.
+        
+    failureRate : float
+        Failure rate in the network, number of failures per second.
+        
+    activityRate : float
+        Activity rate in the network, number of times per second a node
+        asks for priviledge.
+        
+    terminate : bool
+        A flag that indicates the state of the network, it is set to false to
+        stop the network.
+        
+    transport : Transport
+        The transport the nodes exchange their messages with, in memory by default.
+        
+    metrics : Metrics
+        The metrics of the network : messages by type, node and edge, privilege requests,
+        grants and their latency.
+        
+    tracer : Tracer
+        The tracer recording the events of the nodes, None by default.
+        
+    recorder : Recorder
+        The recorder of the inputs of the nodes, to replay the run, None by default.
+        
+    policy : Policy
+        The order the nodes serve their request queues, see set_policy, None for the
+        first in first out order of Raymond's algorithm.
+        
+    saturated : bool
+        If True the nodes ask again as soon as they leave the critical section, see
+        set_saturation.
+        
+    ressource : Ressource
+        The ressource the nodes access in the critical section, measuring its usage.
+        
+    workload, workloads : Workload, dict
+        The workload of the nodes and the workloads set node by node, see set_workload.
+        
+    eventLog : EventLog
+        The event log of the network and its nodes.
+        
+    ownEventLog : EventLog
+        The event log created with the network, closed by shutdown or when another 
+        event log is set, None once closed.
+        
+    logLevel : int
+        The level of the event log created with the network, written to the standard
+        output, None to create none.
+        
+    rng : random.Random
+        The random generator used to sample failures (the random module by default).
+        
+    scheduler : RealTimeScheduler
+        The scheduler of the timers of the nodes and of the failures.
+        
+    pollInterval : float
+        Time in seconds between two checks of the max_requests and until conditions of a run.
+        
+    drainTimeout : float
+        The longest time in seconds a run waits for the network to be quiescent.
+    
+    downtime : Workload
+        The distribution of the downtime of the nodes, see set_downtime.
+    
+    maxDown : int
+        The largest number of nodes in recovery at once, None for no limit.
+    
+    failureDraws : int
+        The number of nodes drawn to find one that can fail, see inject_failure.
+    
+    down : set
+        The ids of the nodes in recovery.
+    
+    deferredFailures : int
+        The number of failures waiting for a recovery to happen.
+    
+    Methods
+    -------
+    addNode() :
+        Add a node to the network.
+        
+    addTree() :
+        Add a tree given as a parent array to the network.
+        
+    start():
+        Starts the network. And randomly make a node fail according to exponential 
+        distribution.
+        
+    run():
+        Runs the network until a stop condition is met and returns a RunResult.
+        
+    stop():
+        Stops the network. And returns complexity data.
+    """
+    logLevel = INFO
+    
+    pollInterval = .05
+    
+    drainTimeout = 10.
+    
+    maxDown = None
+    
+    failureDraws = 16
+    
+    def __init__(self, failureRate = 1e-4, activityRate = .05, transport = None): 
+    
+        self.nodes = {}
+        
+        self.failureRate = failureRate
+        
+        self.activityRate = activityRate
+        
+        self.terminate = False
+        
+        self.scheduler = RealTimeScheduler()
+        
+        self.downtime = None
+        
+        #ids of the nodes in recovery, and count of the recovering nodes next to each node
+        self.down = set()
+        
+        self.blocked = {}
+        
+        self.deferredFailures = 0
+        
+        self.failureLock = threading.Lock()
+        
+        if transport is None :
+            
+            transport = InMemoryTransport()
+            
+        self.transport = transport
+        
+        self.metrics = Metrics(clock = self.clock)
+        
+        self.tracer = None
+        
+        self.recorder = None
+        
+        self.policy = None
+        
+        self.saturated = False
+        
+        self.eventLog = None
+        
+        self.ownEventLog = None
+        
+        self.ressource = Ressource(self.clock)
+        
+        self.workload = None
+        
+        self.workloads = {}
+        
+        self.rng = random
+        
+        if self.logLevel is not None :
+            
+            self.ownEventLog = EventLog(level = self.logLevel)
+            
+            self.log_events(self.ownEventLog)
+        
+        
+        
+        
+    def addNode(self, nodeId, holderId = None, askingPrivRate = None):
+        """    
+        Extended description of function.
+        
+        This function adds a node to the network and connect it to its holder.
+
+        Parameters
+        ----------
+        nodeId : int 
+            The id of the node.
+        
+        holderId : int
+            The id of the node holder.
+    
+        Returns
+        -------
+        This function returns no value.
+    
+        """        
+        if nodeId in self.nodes :
+            
+            #if the id given already exists raise error 
+            raise NameError('node id must be unique !')
+            
+            sys.exit(0)
+            
+        else :
+            
+            if askingPrivRate is None :
+                
+                #if no askinPrivRate is specified for the node, initialise it with the activityRate of network
+                askingPrivRate = self.activityRate
+            
+            #instantiate the node and add it to the dicionary under the key = nodeId
+            self.nodes[nodeId] = self.make_node(nodeId, holderId, askingPrivRate)
+            
+            self.attach(self.nodes[nodeId])
+            
+            if holderId is not None :
+                
+                #if holder id of the node is specified add it to the node neighbors and
+                #add the node to the holder neighbors
+                self.nodes[nodeId].neighborsId.append(holderId)    
+                
+                self.nodes[holderId].neighborsId.append(nodeId)
+    
+    
+    
+    
+    def addTree(self, parents, ids = None, askingPrivRates = None):
+        """    
+        Extended description of function.
+        
+        This function adds a whole tree to the network in O(n). The tree is given
+        as a parent array, the holder of each node is its parent, so the root holds
+        the privilege. Nodes can be given in any order. See Topology for loaders and
+        generators of parent arrays.
+
+        Parameters
+        ----------
+        parents : sequence of int
+            parents[i] is the position in the array of the parent of the i-th node,
+            negative for the root.
+        
+        ids : sequence of int
+            The ids of the nodes, range(len(parents)) by default.
+            
+        askingPrivRates : sequence of float
+            The askingPrivRate of each node, the activityRate of the network by default.
+    
+        Returns
+        -------
+        This function returns no value.
+    
+        """        
+        if hasattr(parents, 'tolist') :
+            
+            #numpy arrays, iterating python ints is much faster
+            parents = parents.tolist()
+            
+        n = len(parents)
+        
+        ids = list(range(n)) if ids is None else list(ids)
+        
+        if len(ids) != n or (askingPrivRates is not None and len(askingPrivRates) != n) :
+            
+            raise ValueError('parents, ids and askingPrivRates must have the same length')
+        
+        check_tree(parents)
+        
+        nodes = self.nodes
+        
+        if len(set(ids)) != n or any(nodeId in nodes for nodeId in ids) :
+            
+            raise NameError('node id must be unique !')
+        
+        for i in range(n) :
+            
+            parent = parents[i]
+            
+            askingPrivRate = self.activityRate if askingPrivRates is None else askingPrivRates[i]
+            
+            nodes[ids[i]] = self.make_node(ids[i], ids[parent] if parent >= 0 else None, askingPrivRate)
+            
+            self.attach(nodes[ids[i]])
+            
+        for i in range(n) :
+            
+            parent = parents[i]
+            
+            if parent >= 0 :
+                
+                nodes[ids[i]].neighborsId.append(ids[parent])
+                
+                nodes[ids[parent]].neighborsId.append(ids[i])
+            
+    
+    
+    
+    def make_node(self, nodeId, holderId, askingPrivRate):
+        """    
+        Extended description of function.
+        
+        This function instantiates the nodes of the network, it is overriden by
+        the networks that drive their nodes with another runtime.
+
+        Parameters
+        ----------
+        See addNode.
+    
+        Returns
+        -------
+        This function returns the node.
+    
+        """        
+        return Node(nodeId, holderId, askingPrivRate, self.transport, self.metrics, self)
+    
+    
+    
+    def clock(self):
+        """    
+        Extended description of function.
+        
+        The monotonic clock of the network, in seconds, used to time the metrics and the traces.
+    
+        """        
+        return time.monotonic()
+    
+    
+    
+    def attach(self, node):
+        """    
+        Extended description of function.
+        
+        This function gives the tracer and the event log of the network to a new node.
+    
+        """        
+        node.tracer = self.tracer
+        
+        node.recorder = self.recorder
+        
+        node.ressource = self.ressource
+        
+        node.saturated = self.saturated
+        
+        if self.policy is not None :
+            
+            node.policy = self.policy
+            
+            node.requestQ = self.policy.queue(node)
+        
+        if self.downtime is not None :
+            
+            node.downtime = self.downtime
+        
+        workload = self.workload_of(node.id)
+        
+        if workload is not None :
+            
+            node.workload = workload
+        
+        if self.eventLog is not None :
+            
+            node.eventLog = self.eventLog
+            
+            node.logLevel = self.eventLog.node_level(node.id)
+    
+    
+    
+    def set_workload(self, workload):
+        """    
+        Extended description of function.
+        
+        This function sets the workload of the critical section (see Workload), for all
+        the nodes or node by node.
+
+        Parameters
+        ----------
+        workload : Workload or dict
+            The workload of all the nodes, or a dictionary of workloads by node id.
+    
+        Returns
+        -------
+        This function returns no value.
+    
+        """        
+        if isinstance(workload, Workload) :
+            
+            self.workload = workload
+            
+            self.workloads = {}
+            
+        else :
+            
+            self.workloads.update(workload)
+            
+        for node in self.nodes.values() :
+            
+            self.attach(node)
+    
+    
+    
+    def workload_of(self, nodeId):
+        
+        return self.workloads.get(nodeId, self.workload) if self.workloads else self.workload
+    
+    
+    
+    def trace(self, tracer):
+        """    
+        Extended description of function.
+        
+        This function attaches a tracer to the network and its nodes.
+
+        Parameters
+        ----------
+        tracer : Tracer
+            The tracer, None to stop tracing.
+    
+        Returns
+        -------
+        This function returns no value.
+    
+        """        
+        if tracer is not None :
+            
+            tracer.clock = self.clock
+            
+        self.tracer = tracer
+        
+        for node in self.nodes.values() :
+            
+            node.tracer = tracer
+    
+    
+    
+    def record(self, recorder):
+        """    
+        Extended description of function.
+        
+        This function attaches a recorder to the network and its nodes, before the run, 
+        see Replay.
+        
+        Parameters
+        ----------
+        recorder : Recorder
+            The recorder, None to stop recording.
+        
+        Returns
+        -------
+        This function returns no value.
+        
+        """        
+        if recorder is not None :
+            
+            recorder.start(self)
+        
+        self.recorder = recorder
+        
+        for node in self.nodes.values() :
+            
+            node.recorder = recorder
+    
+    
+    
+    def log_events(self, eventLog):
+        """    
+        Extended description of function.
+        
+        This function sets the event log of the network and its nodes. It is called again
+        after changing the level or the nodes of the event log.
+
+        Parameters
+        ----------
+        eventLog : EventLog
+            The event log, None to log nothing.
+    
+        Returns
+        -------
+        This function returns no value.
+    
+        """        
+        if eventLog is not None :
+            
+            eventLog.clock = self.clock
+            
+        #the writer thread of the event log created with the network is stopped once it 
+        #is replaced
+        if self.ownEventLog is not None and eventLog is not self.ownEventLog :
+            
+            self.ownEventLog.close()
+            
+            self.ownEventLog = None
+        
+        self.eventLog = eventLog
+        
+        for node in self.nodes.values() :
+            
+            node.eventLog = eventLog
+            
+            node.logLevel = OFF if eventLog is None else eventLog.node_level(node.id)
+    
+    
+    
+    def log(self, level, event, *fields):
+        
+        if self.eventLog is not None and level >= self.eventLog.level :
+            
+            self.eventLog.write(level, None, event, fields)
+    
+    
+    
+    def next_time(self):
+        """    
+        Extended description of function.
+        
+        This function samples from an exponential distribution 
+        to simulate next time a node will fail.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+    
+        Returns
+        -------
+        This function returns a float.
+    
+        """        
+        return -math.log(1.0 - self.rng.random()) / self.failureRate
+    
+    
+    
+    def start(self):
+        """    
+        Extended description of function.
+        
+        This function starts the network and runs it until stop() is called, see run.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+    
+        Returns
+        -------
+        This function returns a RunResult.
+    
+        """       
+        return self.run()
+    
+    
+    
+    def run(self, duration = None, max_requests = None, until = None):
+        """    
+        Extended description of function.
+        
+        This function starts all the nodes and pick one of them randomly from time 
+        to time and make it fail, to simulate behaviour of a real network, until 
+        one of the stop conditions is met, stop() is called or the run is interrupted
+        (KeyboardInterrupt). The timers of the nodes and the failures are executed by
+        the scheduler of the network in the calling thread. The network is then shut 
+        down : the nodes stop asking for privilege, the requests already made are 
+        served, the messages in flight are handled and the node threads and endpoints
+        are closed. The result is measured when the run stops, before this drain. A 
+        network runs once.
+        
+        Parameters
+        ----------
+        duration : float
+            The duration of the run in seconds.
+            
+        max_requests : int
+            The run stops once this number of privilege requests is made.
+            
+        until : callable
+            The run stops once until(network) returns True, it is checked every 
+            pollInterval seconds.
+    
+        Returns
+        -------
+        This function returns a RunResult.
+    
+        """       
+        self.nodesIds = list( self.nodes.keys() )
+        
+        #the usage of the ressource is measured from the start
+        self.ressource.start()
+        
+        #start the nodes as deamon threads
+        for node in self.nodes.values() :
+            
+            node.daemon = True
+            
+            node.start()
+        
+        begin = self.clock()
+        
+        if self.failureRate :
+            
+            self.schedule(self.next_time(), self.inject_failure)
+        
+        try :
+            
+            reason = self.scheduler.run(None if duration is None else begin + duration,
+                                        self.stop_check(max_requests, until), self.pollInterval)
+                    
+        except KeyboardInterrupt :
+            
+            reason = 'interrupt'
+            
+        #measured at the stop : the requests served during the drain have empty critical 
+        #sections, they are not part of the throughput of the run
+        usage = self.ressource.usage()
+        
+        elapsed = self.clock() - begin
+        
+        counters = self.metrics.snapshot()
+        
+        self.shutdown()
+        
+        return RunResult(reason, elapsed, counters, usage)
+    
+    
+    
+    def stop_check(self, max_requests = None, until = None):
+        """    
+        Extended description of function.
+        
+        This function builds the check of the stop conditions of a run, see Scheduler.run.
+    
+        Returns
+        -------
+        This function returns a callable, None if there is no condition.
+    
+        """       
+        if max_requests is None and until is None :
+            
+            return None
+        
+        def check():
+            
+            if max_requests is not None and self.metrics.asks() >= max_requests :
+                
+                return 'max_requests'
+            
+            if until is not None and until(self) :
+                
+                return 'until'
+            
+        return check
+    
+    
+    
+    def schedule(self, delay, action, *args):
+        """    
+        Extended description of function.
+        
+        This function schedules action(*args) delay seconds from now in the scheduler 
+        of the network.
+    
+        """       
+        self.scheduler.schedule(delay, action, *args)
+    
+    
+    
+    def set_downtime(self, downtime):
+        """    
+        Extended description of function.
+        
+        This function sets the distribution of the downtime of the nodes after a failure.
+        
+        Parameters
+        ----------
+        downtime : Workload or float
+            The distribution of the downtime (see Workload), or a constant downtime in seconds.
+        
+        Returns
+        -------
+        This function returns no value.
+        
+        """       
+        self.downtime = downtime if isinstance(downtime, Workload) else Constant(downtime)
+        
+        for node in self.nodes.values() :
+            
+            node.downtime = self.downtime
+    
+    
+    
+    def set_policy(self, policy):
+        """    
+        Extended description of function.
+        
+        This function sets the order the nodes serve their request queues, see Policy. It is
+        set once the tree is built and before the run, the request queues are replaced.
+        
+        Parameters
+        ----------
+        policy : Policy
+            The policy, None for the first in first out order of Raymond's algorithm.
+        
+        Returns
+        -------
+        This function returns no value.
+        
+        """       
+        self.policy = policy
+        
+        if policy is not None :
+            
+            policy.start(self)
+        
+        for node in self.nodes.values() :
+            
+            node.policy = policy
+            
+            node.requestQ = deque() if policy is None else policy.queue(node)
+    
+    
+    
+    def set_saturation(self, saturated = True):
+        """    
+        Extended description of function.
+        
+        This function sets the saturation of the network : the nodes ask for privilege again
+        as soon as they leave the critical section, and after their first request every node
+        is always asking. The first requests come from the activity rate of the nodes.
+        
+        Parameters
+        ----------
+        saturated : bool
+            True to saturate the network.
+        
+        Returns
+        -------
+        This function returns no value.
+        
+        """       
+        self.saturated = saturated
+        
+        if self.recorder is not None :
+            
+            self.recorder.saturated = saturated
+        
+        for node in self.nodes.values() :
+            
+            node.saturated = saturated
+    
+    
+    
+    def inject_failure(self):
+        """    
+        Extended description of function.
+        
+        Makes a random node fail and schedules the next failure, failures follow a Poisson
+        process of rate failureRate and several nodes can be down at once. A node is picked
+        only if neither it nor a neighbor is in recovery, since a recovering node needs the
+        advise of all its neighbors : when none is found, or maxDown nodes are down, the
+        failure is deferred to the next recovery.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+        
+        Returns
+        -------
+        This function returns no value.
+        
+        """       
+        if self.terminate :
+            
+            return
+        
+        if not self.fail_node() :
+            
+            self.deferredFailures += 1
+        
+        self.schedule(self.next_time(), self.inject_failure)
+    
+    
+    
+    def fail_node(self):
+        """    
+        Extended description of function.
+        
+        Makes a random node fail, drawing at most failureDraws nodes to find one that can fail.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+        
+        Returns
+        -------
+        This function returns True if a node failed.
+        
+        """       
+        with self.failureLock :
+            
+            if self.maxDown is not None and len(self.down) >= self.maxDown :
+                
+                return False
+            
+            blocked = self.blocked
+            
+            for _ in range(self.failureDraws) :
+                
+                nodeId = self.nodesIds[self.rng.randrange(len(self.nodesIds))]
+                
+                if not blocked.get(nodeId) :
+                    
+                    break
+            
+            else :
+                
+                return False
+            
+            node = self.nodes[nodeId]
+            
+            self.down.add(nodeId)
+            
+            for blockedId in (nodeId, *node.neighborsId) :
+                
+                blocked[blockedId] = blocked.get(blockedId, 0) + 1
+        
+        #out of the lock, the node takes its own lock to fail
+        node.fail()
+        
+        return True
+    
+    
+    
+    def node_recovered(self, node):
+        """    
+        Extended description of function.
+        
+        Called by a node at the end of its recovery, schedules a deferred failure if any.
+        
+        """       
+        with self.failureLock :
+            
+            if node.id in self.down :
+                
+                self.down.discard(node.id)
+                
+                blocked = self.blocked
+                
+                for blockedId in (node.id, *node.neighborsId) :
+                    
+                    if blocked[blockedId] == 1 :
+                        
+                        del blocked[blockedId]
+                    
+                    else :
+                        
+                        blocked[blockedId] -= 1
+        
+        #the recovering node holds its lock, the failure takes the lock of another node : 
+        #it runs from the scheduler, so that no two node locks are ever taken in turn
+        if self.deferredFailures and not self.terminate :
+            
+            self.schedule(0., self.inject_deferred)
+    
+    
+    
+    def inject_deferred(self):
+        """    
+        Extended description of function.
+        
+        Makes a random node fail for a failure deferred by inject_failure, if one can fail.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+        
+        Returns
+        -------
+        This function returns no value.
+        
+        """       
+        if self.deferredFailures and not self.terminate and self.fail_node() :
+            
+            self.deferredFailures -= 1
+
+
+
+    def shutdown(self):
+        """    
+        Extended description of function.
+        
+        This function terminates the nodes, executes their pending timers at once until 
+        the network is quiescent (no message in flight, no node in the critical section, 
+        holding the privilege or in recovery, except the recoveries out of retries, see 
+        RaymondNode.stalled), or for drainTimeout seconds, and closes the nodes and the 
+        transport.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+    
+        Returns
+        -------
+        This function returns True if the network was quiescent.
+    
+        """       
+        self.log(INFO, 'stopping')
+        
+        self.terminate = True
+        
+        nodes = list(self.nodes.values())
+        
+        #the nodes stop asking and cut their critical sections and downtimes short
+        for node in nodes :
+            
+            with node.canWork :
+                
+                #recorded under the lock of the node, to replay its handlers on the same side
+                if node.recorder is not None :
+                    
+                    node.recorder.record(node.id, 'X')
+                
+                node.terminate.set()
+            
+        deadline = time.monotonic() + self.drainTimeout
+        
+        quiescent = False
+        
+        while not quiescent and time.monotonic() < deadline :
+            
+            self.scheduler.expedite()
+            
+            #messages are counted as sent before they are received
+            inFlight = self.metrics.messages() - sum(node.received for node in nodes)
+            
+            quiescent = inFlight == 0 and not any(node.using or node.holding or node.inRecovery.is_set() and not node.stalled for node in nodes)
+            
+            if not quiescent :
+                
+                time.sleep(1e-3)
+                
+        for node in nodes :
+            
+            node.close()
+            
+        #the connections and threads of the transport, if any
+        self.transport.close()
+            
+        self.log(INFO, 'stopped', 'quiescent' if quiescent else 'drain timeout')
+        
+        if self.ownEventLog is not None :
+            
+            #stops its writer thread, the networks of back to back runs do not pile up
+            self.ownEventLog.close()
+            
+            self.ownEventLog = None
+        
+        elif self.eventLog is not None :
+            
+            self.eventLog.flush()
+            
+        return quiescent
+    
+    
+    
+    def stop(self):
+        """    
+        Extended description of function.
+        
+        This function stops the network, run returns once the network is shut down.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+    
+        Returns
+        -------
+        This function returns the number of messages sent and the number of privilege requests.
+    
+        """
+        self.terminate = True
+        
+        self.scheduler.stop()
+            
+        return self.metrics.messages(), self.metrics.asks()
+        
+        
+            
+            
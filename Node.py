@@ -1,641 +1,1524 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Fri Nov 23 20:15:11 2018
-
-@author  : khalid MAJDOUB
-"""
-
-from collections import deque
-import threading
-import pika
-import time 
-import random
-import math
-import traceback
-from CountComplx import CountComplx
-    
-class MsgType:
-    """    
-    This class gathers the constants that'll represent the message type.
-    
-    Attributes
-    ----------
-    No attributes.
-    
-    Methods
-    -------
-    No methodes.
-    """
-    REQUEST = 'R'
-    ASSIGN  = 'A'
-    RESTART = 'S'
-    ADVISE  = 'D'
-
-
-class Ressource():
-    """    
-    Is used to simulate the real use of a ressource in a concurrent context.
-    If more than one node at time tries to access the ressource an exception is raised.
-    
-    Attributes
-    ----------
-    
-    acquired : bool 
-        A flag to represent the state of the ressource.
-        
-    Methods
-    -------
-    
-    acquire() 
-        Sets the state of ressource to acquired.
-        
-    release()
-        Sets the state of ressource to available.
-    """    
-    acquired = False
-    
-    @staticmethod
-    def acquire():
-        
-        if not Ressource.acquired :
-            
-            Ressource.acquired = True
-            
-        else :
-            #To make sure the simulation is conform to the algorithm and mutual exclusion is never 
-            #violated. We raise an exception if ever 2 nodes at same time entered critical section.
-            raise Exception('Ressource already acquired!') 
-            
-    @staticmethod
-    def release():
-        
-        Ressource.acquired = False
-
-
-
-class Node(threading.Thread):
-    """
-    This class is used to simulate a node
-    
-    Attributes
-    ----------
-    askingPrivRate : float
-        The number of times per second the node will ask for privilege (.2 per default)
-       
-    id : int
-        The node id
-       
-    neighborsId : list
-        A list that contains the neighbors ids of the node
-       
-    inRecovery : threading.Event
-        A threading signal that indicates if the node is in recovery state or not
-       
-    neighborHolderId : dict
-        The ids of the holders of the node neighbors stored in a dictionary
-       
-    inNeighborReqQ : dict
-        Booleans that holds the information about the node being in the requestQ of 
-        its neighbors or not
-       
-    recievedFrom : dict
-        A boolean by neighbor set to True when an advise message is received 
-        from that neighbor to know when all advise messages are received
-       
-    neighborAsked : dict
-        Stores the asked attribute of neighbors 
-       
-    holderId : int
-        The id of the node holder
-    
-    using : bool
-        A boolean that indicates if the node is in the critical section or not 
-    
-    asked : bool
-        A boolean set to True if the node has asked the privilege or forwarded a request message
-    
-    teminate : threading.Event
-        Threading signal that indicate if node should continue to work
-    
-    canWork : threading.RLock
-        Reantrant lock to synchronise the main Thread and the listner. To make sure the listner and the main Thread
-        dont execute assign and request actions in the same time.
-        
-    requestQ : deque
-        A queue object to store the ids of requests senders
-        
-    connection : pika.BlockingConnection
-        RabbitMQ blocking connection
-    
-    channel : pika.BlockingConnection.channel
-        The node's rabbitMQ connection channel
-       
-    Methods
-    -------
-    listen()
-        A methdod to consume received messages from the rabbitMQ channel of the node
-       
-    nextTime()
-        Time to wait before asking for privilege next time
-       
-    callback()
-        This methode is called whenever a message is received
-       
-    assign_privilege()
-        This function assignes the privilege to the node if it is the root or forwards and assign msg
-       
-    recover()
-        Recovers the node attributes to the state before failure
-    
-    send_message()
-        This function sends a Message to a node
-    
-    make_request()
-        This function sends a Message of type Request to the holder if the right conditions are met
-        
-    fail()
-        This function simulates node failure, it resets the node attributes, and set his inRecovery signal
-    
-    run()
-        This methode simulate the behaviour of the node in the network.
-      
-    """   
-
-    def __init__(self, id, holderId = None, askingPrivRate = .05): 
-    
-        threading.Thread.__init__(self) 
-        
-        self.askingPrivRate = askingPrivRate
-        
-        self.id = id
-        
-        self.neighborsId = []
-        
-        self.requestQ = deque([])
-        
-        if holderId is None : 
-    
-            self.holderId = self.id
-            
-        else : 
-    
-            self.holderId = holderId 
-    
-        self.using = False 
-    
-        self.asked = False 
-        
-        self.inRecovery = threading.Event()
-        
-        self.terminate = threading.Event()
-        
-        self.canWork = threading.RLock()
-        
-
-    def listen(self):
-        """    
-        Extended description of function.
-        
-        This function performs the listening rootine of rabbitMQ
-        and calls the methode callback when a message is dequeued. 
-        It is executed in a separeted Thread.
-        
-        Parameters
-        ----------
-        This function takes no argument.
-    
-        Returns
-        -------
-        This function returns no value.
-    
-        """        
-        self.channel.basic_consume(self.callback, queue = 'channel'+ str(self.id), no_ack=True) 
-        
-        self.channel.start_consuming() 
-        
-    
-    def next_time(self):
-        """    
-        Extended description of function.
-        
-        This function samples from an exponential distribution 
-        to simulate next time node will ask for privilege.
-        
-        Parameters
-        ----------
-        This function takes no argument.
-    
-        Returns
-        -------
-        This function returns a float.
-    
-        """
-        return -math.log(1.0 - random.random()) / self.askingPrivRate  
-
-
-    def callback(self, ch, method, properties, body): 
-        """    
-        
-        Extended description of function.
-        
-        This function is called whenever the node receives a message.
-        The message is decomposed and traitements are done depending on its type.
-        
-        There is 4 types of messages exchanged in the network :
-        
-        Request message : is sent by the node to its holder to ask for privilege, then the message is
-        propagated throughout the tree until it reaches the privileged node.
-        
-        Format : 'R' | '*' | node id  
-        
-        Assign message : is forwarded from the privileged node to the one who asked for the privilege. During 
-        that process the structure of the tree is reversed.
-        
-        Format :  'A' | '*' | node id
-        
-        Restart message: is sent by the node to its neighbors in the recovery phase, 
-        asking them to send back informations about their state, those informations will be used by the node
-        to reconstruct its state before failure.
-        
-        Format : 'S' | '*' | node id 
-            
-        Advise message : the response of neighbors to the node in recovery
-        containing informations about their current state.
-        
-        Format : 'D'|'*'|node id|'*'|senderHolderId |','|inSenderReqQ|','|senderAsked 
-            
-        Parameters
-        ----------
-        
-        body : str
-            byte string containing the body of the message
-    
-        Returns
-        -------
-        This function returns no argument. 
-        
-        """ 
-        msgBody = body.decode()   
-
-        msgType, senderId, msg = msgBody.split('*')     
-        
-        senderId = int(senderId)
-        
-        if msgType == MsgType.REQUEST :
-            
-            print(self.id, 'received request from', senderId)
-            
-            #if a request message is received add the send in requestQ
-            self.requestQ.append(senderId)
-            
-        elif msgType == MsgType.ASSIGN :
-            
-            print(self.id, 'received assign from', senderId)
-            
-            #if an assign message is received set the holder to self
-            self.holderId = self.id
-            
-        elif msgType == MsgType.RESTART :
-            
-            print(self.id, 'received restart from', senderId)
-            
-            #if node received a restart message from its neighbor, it reponds with an advise message
-            msg = str(self.holderId)+','+str(senderId in self.requestQ)+','+str(self.asked)
-            
-            self.send_message(MsgType.ADVISE, senderId, msg)
-            
-        elif msgType == MsgType.ADVISE :
-            
-            print(self.id, 'received advise from', senderId)
-            
-            senderHolderId , inSenderReqQ, senderAsked = msg.split(',')
-            
-            senderHolderId = int(senderHolderId)
-            
-            inSenderReqQ = (inSenderReqQ == 'True') 
-            
-            senderAsked = ( senderAsked == 'True')
-            
-            #memorise if node is in its neighbor requestQ
-            self.inNeighborReqQ[senderId] = inSenderReqQ
-            
-            #memorise the holder of the neighbor
-            self.neighborHolderId[senderId] = senderHolderId
-            
-            #mark the neighbor to remember that it received an advise from it
-            self.recievedFrom[senderId] = True
-            
-            #memorise the variable asked of the neighbor
-            self.neighborAsked[senderId] = senderAsked
-            
-            if all( value for value in self.recievedFrom.values() ) :
-                
-                #if advise messages are collected from all neighbors, start recovering attributes
-                self.recover()
-                
-        if not self.inRecovery.isSet() :
-            
-            #if the node is not in recovery mode execute the following actions
-            
-            self.assign_privilege()
-            
-            self.make_request()
-            
-    def recover(self):
-        
-        """    
-        
-        Extended description of function.
-        
-        After receiving advise message from all node neighbors, this function is called
-        to reconstruct from informations gathered its state before faillure.
-        
-        Parameters
-        ----------
-        This function takes no parameters.
-    
-        Returns
-        -------
-        This function returns no value.
-        
-        """ 
-        #here we determin the variable asked and holder id according to the algorithm
-        
-        if all(id == self.id for id in self.neighborHolderId.values()) :
-            
-            self.holderId = self.id
-            
-            self.asked = False
-            
-        else :
-            
-            for idN, idNH in self.neighborHolderId.items() :
-                
-                if idNH != self.id :
-                    
-                    self.holderId = idN
-                    
-                    self.asked = self.inNeighborReqQ[idN]
-                    
-                    break
-                    
-        #here we determin the requestQ of the node according to the algorithm
-        for nId in self.neighborsId :
-            
-            if self.neighborHolderId[nId] == self.id and self.neighborAsked[nId] :
-                
-                self.requestQ.append(nId)
-                
-        self.inRecovery.clear()
-        
-        print('node ', self.id, ' left recovery mode -->>')
-        
-                        
-                        
-    def assign_privilege(self): 
-        """    
-        Extended description of function.
-        
-        This function either assignes the privilege to the node, in the case it is the root of the tree, or forwards an ASSIGN
-        type message to the first node to enter the request queue of the node.
-        
-        Assigne priveledge message format :  'A' | '*' | id of node 
-            
-        
-        Parameters
-        ----------
-        This function takes no parameters.
-    
-        Returns
-        -------
-        This function returns no value.
-    
-        """
-        
-        #hold the RLock to block listner from executing assign at same time
-        with self.canWork :
-            
-            if self.holderId == self.id and not self.using and self.requestQ :
-                
-                print( self.id, " is assigning privilege" )
-                
-                self.holderId = self.requestQ.popleft()
-        
-                self.asked = False 
-        
-                if self.holderId == self.id : 
-                
-                    #if the node is the root of the tree
-                    self.using = True 
-                    
-                    print (str(self.id) + " enter the critical section <<--")
-                    
-                    Ressource.acquire() #hold ressource
-                    
-                    time.sleep(1.5) #consume ressource                
-                    
-                    Ressource.release() #release ressource
-                    
-                    print (str(self.id) + " left the critical section  -->>")
-                    
-                    self.using = False
-                    
-                    if not self.inRecovery.isSet() :
-                        
-                        self.assign_privilege()
-                        
-                        self.make_request()
-                    
-                elif not self.inRecovery.isSet() :
-                
-                    self.send_message(MsgType.ASSIGN, self.holderId)
-
-
-
-
-    def send_message(self, msgType, dest, msgBody = ''):
-        
-        """       
-        Extended description of function.
-        
-        This function joins the arguments given in a string and then sends it to the destination node.
-        It is based on a rabbitMQ rootine (basic_publish).
-        
-        Message format : msgType | '*' | node id | '*' | msgBody
-        
-        Parameters
-        ----------
-        
-        msgType : str 
-            A constant refering to the type of the message to be sent 
-            
-        dest : str 
-            A string containing the id of the receiver
-            
-        msgBody : str
-            A string containing the body of the message. This argument is optional (is set to '' by default) 
-    
-        Returns
-        -------
-        
-        This function returns no value.
-        
-        """ 
-        CountComplx.countMsg+=1
-
-        self.channel.basic_publish(exchange='', 
-        routing_key='channel' + str(dest), 
-        body = msgType +'*'+ str(self.id) + '*' + msgBody)
-        
-        
-    def fail(self):
-        """
-        
-        Extended description of function.
-        
-        This function is called to simulate failure of the node. It resets its 
-        attributes, set the inRecovery signal, waits for 5 secs then sends a
-        restart message to its neighbors
-        
-        Parameters
-        ----------
-        This function takes no parameters
-        
-        Returns
-        -------
-        This function returns no value
-        
-        """          
-        self.inRecovery.set()
-        
-        self.asked = False
-        
-        self.requestQ.clear()
-        
-        self.using = False
-        
-        self.holderId = None
-        
-        self.neighborHolderId = {}
-         
-        self.inNeighborReqQ = {}
-        
-        self.neighborAsked = {}
-        
-        self.recievedFrom = { nId : False for nId in self.neighborsId }
-        
-        print('node ', self.id, ' failed!!!')
-        
-        time.sleep(5)
-        
-        print('node ', self.id, ' is in recovery mode <<---')
-        
-        for neighborId in self.neighborsId :
-            
-            self.send_message(MsgType.RESTART, neighborId)        
-   
-     
-    def make_request(self): 
-        """
-        
-        Extended description of function.
-        
-        This function is called by the node either to ask for the privilege, or to forward
-        the request to the rest of the tree.
-        
-        Request message format :   'R' | '*' | node id  
-    
-        Parameters
-        ----------
-        This function takes no parameters.
-    
-        Returns
-        -------
-        This function returns no value. 
-        
-        """ 
-        with self.canWork :
-            
-            if self.holderId != self.id and self.requestQ and not self.asked : 
-            
-                print(self.id, " is sending request to ", self.holderId)
-                
-                self.send_message(MsgType.REQUEST, self.holderId)
-                
-                self.asked = True 
-
-
-                
-    def run(self): 
-        """    
-        Extended description of function.
-        
-        This function simulate the behaviour of the node in the network. After waiting a certain
-        time sampled from an exponential distribution, the node asks for privilege. Then waits to 
-        be served before asking again.
-        
-        Parameters
-        ----------
-        This function takes no argument.
-    
-        Returns
-        -------
-        This function returns no value.
-    
-        """
-        
-        self.connection = pika.BlockingConnection(pika.ConnectionParameters(host='localhost')) 
-    
-        self.channel = self.connection.channel() 
-        
-        self.channel.queue_declare(queue = 'channel'+ str(self.id) ) 
-        
-        threadRMQ = threading.Thread(target = self.listen)
-        
-        threadRMQ.daemon = True
-        
-        threadRMQ.start()
-        
-        try :
-            
-            while not self.terminate.isSet() :
-                
-                if self.askingPrivRate > 0:
-                    #if node has a non zero asking for privilege rate, it waits a time according
-                    #to the distribution Exp(askingPrivRate)
-                    time.sleep(self.next_time())
-                    
-                    if self.id not in self.requestQ and not self.inRecovery.isSet():
-                        #if node is not already waiting for an asking privilege to be satisfied,
-                        #and it is not in recovery mode, asks for privilege
-                        print(str(self.id) + " is asking for privilege")
-                        
-                        CountComplx.countAskP+=1
-                        
-                        self.requestQ.append(self.id)
-                        
-                        self.assign_privilege()
-                        
-                        self.make_request() 
-                    
-                time.sleep(.2)
-            #close the channel to stop the listening thread after terminating
-            self.connection.close()
-                    
-        except Exception :
-            
-            traceback.print_exc()
-        
-        print(self.id, ' is done')
-        
-
-
-
-
-
-
-            
-
-
-
-
+# -*- coding: utf-8 -*-
+"""
+Created on Fri Nov 23 20:15:11 2018
+
+@author  : khalid MAJDOUB
+"""
+
+from collections import deque
+import threading
+import time 
+import random
+import math
+import traceback
+from Metrics import Metrics, Histogram
+from Workload import Constant
+from EventLog import DEBUG, INFO, WARNING, ERROR, OFF
+from Wire import encode, decode, decode_batch, BATCH_CODE
+    
+class MsgType:
+    """    
+    This class gathers the constants that'll represent the message type.
+    
+    Attributes
+    ----------
+    No attributes.
+    
+    Methods
+    -------
+    No methodes.
+    """
+    REQUEST = 'R'
+    ASSIGN  = 'A'
+    RESTART = 'S'
+    ADVISE  = 'D'
+
+
+class Ressource():
+    """    
+    Is used to simulate the real use of a ressource in a concurrent context, each network
+    has its own. If more than one node at time tries to access the ressource an exception
+    is raised. The ressource records its usage : the grants, the time it is held and the
+    idle gaps between two grants.
+    
+    Attributes
+    ----------
+    
+    acquired : bool 
+        A flag to represent the state of the ressource.
+
+    holder : int
+        The id of the node holding the ressource.
+
+    clock : callable
+        The clock of the network.
+
+    grants : int
+        The number of times the ressource was acquired.
+
+    busyTime : float
+        The time in seconds the ressource was held.
+
+    idleGaps : Histogram
+        The times between a release and the next acquire.
+        
+    Methods
+    -------
+    
+    acquire() 
+        Sets the state of ressource to acquired.
+        
+    release()
+        Sets the state of ressource to available.
+
+    start()
+        Starts measuring the usage of the ressource.
+
+    usage()
+        Returns the utilization, throughput and idle gaps since start.
+    """    
+    
+    def __init__(self, clock = time.monotonic):
+        
+        self.clock = clock
+            
+        self.acquired = False
+            
+        self.holder = None
+
+        self.started = None
+
+        self.start()
+
+
+    def start(self):
+
+        self.started = self.clock()
+
+        self.grants = 0
+
+        self.busyTime = 0.
+
+        self.acquiredAt = self.started
+
+        self.releasedAt = None
+
+        self.idleGaps = Histogram()
+
+
+    def acquire(self, nodeId = None):
+
+        if self.acquired :
+            #To make sure the simulation is conform to the algorithm and mutual exclusion is never 
+            #violated. We raise an exception if ever 2 nodes at same time entered critical section.
+            raise Exception('Ressource already acquired!') 
+            
+        now = self.clock()
+        
+        if self.releasedAt is not None :
+
+            self.idleGaps.observe(now - self.releasedAt)
+
+        self.acquired = True
+
+        self.holder = nodeId
+
+        self.acquiredAt = now
+
+        self.grants += 1
+
+
+    def release(self):
+
+        if self.acquired :
+
+            now = self.clock()
+
+            self.busyTime += now - self.acquiredAt
+
+            self.releasedAt = now
+
+        self.acquired = False
+
+        self.holder = None
+
+
+    def usage(self):
+        """
+        Extended description of function.
+
+        Measures the usage of the ressource since start.
+
+        Parameters
+        ----------
+        This function takes no parameters.
+
+        Returns
+        -------
+        This function returns a dictionary : grants, busyTime, utilization (the fraction of
+        the time the ressource is held), throughput (grants per second) and idleGaps.
+
+        """
+        now = self.clock()
+
+        elapsed = now - self.started
+
+        busyTime = self.busyTime + (now - self.acquiredAt if self.acquired else 0.)
+
+        return {'grants' : self.grants, 'busyTime' : busyTime, 'elapsed' : elapsed,
+                'utilization' : busyTime / elapsed if elapsed > 0 else None,
+                'throughput' : self.grants / elapsed if elapsed > 0 else None,
+                'idleGaps' : self.idleGaps.copy()}
+
+
+
+class RaymondNode():
+    """
+    This class holds the state machine of Raymond's algorithm (REQUEST, ASSIGN,
+    RESTART and ADVISE handling) independently of the runtime that drives it.
+
+    The runtime (threads, discrete-event simulation, ...) is plugged in by subclasses
+    through a few hooks : how a message is transmitted, how the critical section is
+    held, how the node waits before restarting after a failure and how it logs.
+
+    Subclasses must also provide the inRecovery flag (any object with set(), clear()
+    and is_set()) and the canWork context manager.
+    
+    Attributes
+    ----------
+    askingPrivRate : float
+        The number of times per second the node will ask for privilege (.05 per default)
+       
+    id : int
+        The node id
+       
+    neighborsId : list
+        A list that contains the neighbors ids of the node
+       
+    neighborHolderId : dict
+        The ids of the holders of the node neighbors stored in a dictionary
+       
+    inNeighborReqQ : dict
+        Booleans that holds the information about the node being in the requestQ of 
+        its neighbors or not
+       
+    recievedFrom : dict
+        A boolean by neighbor set to True when an advise message is received 
+        from that neighbor to know when all advise messages are received
+       
+    neighborAsked : dict
+        Stores the asked attribute of neighbors 
+       
+    holderId : int
+        The id of the node holder
+    
+    using : bool
+        A boolean that indicates if the node is in the critical section or not 
+    
+    asked : bool
+        A boolean set to True if the node has asked the privilege or forwarded a request message
+    
+    requestQ : deque
+        A queue object to store the ids of requests senders, served in the order of a
+        RequestQueue if a policy is set, see Network.set_policy
+    
+    saturated : bool
+        If True the node asks for privilege again as soon as it leaves the critical section,
+        see Network.set_saturation
+        
+    policy : Policy
+        The policy of the request queue if set, it can make the node hold the privilege a
+        while after the critical section, see Network.set_policy
+        
+    holding : bool
+        True while the node holds the privilege for the next requests, the requests already
+        queued wait
+    
+    holds : int
+        The number of holds of the node, to drop the end of a hold already over
+
+    rng : random.Random
+        The random generator used to sample the node's think times (the random module by default)
+
+    metrics : Metrics
+        The metrics of the network, counting the messages sent, the privilege requests and grants
+
+    workload : Workload
+        The distribution of the time the node holds the ressource once in the critical section,
+        see Network.set_workload
+
+    ressource : Ressource
+        The ressource of the network
+
+    downtime : Workload
+        The distribution of the time in seconds the node stays down after a failure before
+        restarting, see Network.set_downtime
+
+    adviseTimeout : float
+        Time in seconds the node waits for the advise messages of its neighbors before
+        sending its restart message again to the silent ones, doubled at each retry
+
+    restartRetries : int
+        The number of times the restart message is sent again to a silent neighbor
+
+    stalled : bool
+        The node is in recovery and sent its restart message restartRetries times in
+        vain, it waits for the advise messages without timeout
+
+    tracer : Tracer
+        Records the trace events of the node if set, see Network.trace
+
+    recorder : Recorder
+        Records the inputs and the random draws of the node if set, see Network.record
+
+    eventLog : EventLog
+        The event log of the node, see Network.log_events
+
+    logLevel : int
+        The lowest level of the events the node logs, OFF if it logs nothing
+       
+    Methods
+    -------
+    next_time()
+        Time to wait before asking for privilege next time
+       
+    on_message()
+        This methode is called with a decoded message whenever one is received
+
+    on_batch()
+        This methode is called with the decoded messages of a batch
+
+    ask()
+        The node asks for the privilege if it is not already waiting for it
+       
+    assign_privilege()
+        This function assignes the privilege to the node if it is the root or forwards and assign msg
+
+    leave_critical_section()
+        Releases the ressource and passes the privilege on
+
+    release_hold()
+        Passes the privilege on at the end of a hold
+       
+    recover()
+        Recovers the node attributes to the state before failure
+    
+    send_message()
+        This function sends a Message to a node
+    
+    make_request()
+        This function sends a Message of type Request to the holder if the right conditions are met
+        
+    fail()
+        This function simulates node failure, it resets the node attributes, and set his inRecovery signal
+    
+    restart()
+        Sends the restart messages to the neighbors once the node is back up
+      
+    advise_timeout()
+        Sends the restart message again to the neighbors that did not advise the node
+    """   
+    workload = Constant(1.5)
+
+    #shared by the nodes that do not belong to a network
+    ressource = Ressource()
+    
+    downtime = Constant(5)
+
+    adviseTimeout = 1.
+
+    restartRetries = 5
+
+    stalled = False
+
+    tracer = None
+
+    recorder = None
+
+    saturated = False
+
+    policy = None
+
+    holding = False
+
+    holds = 0
+
+    eventLog = None
+
+    logLevel = OFF
+
+    def __init__(self, id, holderId = None, askingPrivRate = .05, metrics = None):
+        
+        self.askingPrivRate = askingPrivRate
+        
+        self.id = id
+        
+        self.neighborsId = []
+        
+        self.requestQ = deque([])
+        
+        if holderId is None : 
+    
+            self.holderId = self.id
+            
+        else : 
+    
+            self.holderId = holderId 
+    
+        self.using = False 
+    
+        self.asked = False 
+        
+        self.rng = random
+        
+        self.metrics = Metrics() if metrics is None else metrics
+        
+    
+    def next_time(self):
+        """    
+        Extended description of function.
+        
+        This function samples from an exponential distribution 
+        to simulate next time node will ask for privilege.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+    
+        Returns
+        -------
+        This function returns a float.
+    
+        """
+        value = -math.log(1.0 - self.rng.random()) / self.askingPrivRate
+
+        if self.recorder is not None :
+
+            self.recorder.draw(self.id, 't', value)
+
+        return value
+
+
+    def service_time(self):
+
+        value = self.workload.sample(self.rng)
+
+        if self.recorder is not None :
+
+            self.recorder.draw(self.id, 's', value)
+
+        return value
+
+
+    def down_time(self):
+
+        value = self.downtime.sample(self.rng)
+
+        if self.recorder is not None :
+
+            self.recorder.draw(self.id, 'd', value)
+
+        return value
+
+
+    def log(self, level, event, *fields):
+        """
+        Extended description of function.
+
+        Reports what the node is doing to its event log, if the level of the event is enabled
+        for the node. The events of the message handlers are DEBUG, the call sites test
+        logLevel first so that a disabled level costs a comparison.
+
+        Parameters
+        ----------
+        level : int
+            The level of the event, see EventLog.
+
+        event : str
+            The name of the event.
+
+        fields :
+            The fields of the event.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        if level >= self.logLevel :
+
+            self.eventLog.write(level, self.id, event, fields)
+
+
+    def on_message(self, msgType, senderId, advice = None):
+        """    
+        
+        Extended description of function.
+        
+        This function is called whenever the node receives a message, once it is decoded.
+        Traitements are done depending on its type.
+        
+        There is 4 types of messages exchanged in the network :
+        
+        Request message : is sent by the node to its holder to ask for privilege, then the message is
+        propagated throughout the tree until it reaches the privileged node.
+        
+        Assign message : is forwarded from the privileged node to the one who asked for the privilege. During 
+        that process the structure of the tree is reversed.
+        
+        Restart message: is sent by the node to its neighbors in the recovery phase, 
+        asking them to send back informations about their state, those informations will be used by the node
+        to reconstruct its state before failure.
+        
+        Advise message : the response of neighbors to the node in recovery
+        containing informations about their current state.
+            
+        Parameters
+        ----------
+        
+        msgType : str
+            A constant of MsgType
+
+        senderId : int
+            The id of the sender
+
+        advice : tuple
+            For advise messages only, the sender (holderId, inSenderReqQ, senderAsked)
+    
+        Returns
+        -------
+        This function returns no argument. 
+        
+        """ 
+        self.receive(msgType, senderId, advice)
+
+        self.step()
+        
+
+    def on_batch(self, messages):
+        """
+
+        Extended description of function.
+
+        This function is called when the node receives a batch of messages (see
+        BatchingTransport). The messages are received in order, then the privilege is
+        assigned and requested once, as after the last message of the batch : a request
+        queued in the meantime is served or forwarded by the same pass.
+
+        Parameters
+        ----------
+
+        messages : list
+            The decoded messages (msgType, senderId, advice).
+
+        Returns
+        -------
+        This function returns no argument.
+
+        """
+        for msgType, senderId, advice in messages :
+
+            self.receive(msgType, senderId, advice)
+
+        self.step()
+
+
+    def receive(self, msgType, senderId, advice = None):
+        """
+
+        Extended description of function.
+
+        This function updates the state of the node with a message, without assigning
+        nor requesting the privilege : on_message and on_batch do it once the messages
+        are received.
+
+        A request message queues its sender. An assign message makes the node the holder
+        of the privilege. A restart message is answered by an advise message carrying the
+        state of the node seen from the restarting neighbor. An advise message is recorded
+        while the node is in recovery, and the node recovers once every neighbor advised
+        it; an advise arriving after the recovery answers a restart message sent again
+        (see advise_timeout) and is ignored.
+
+        Parameters
+        ----------
+
+        msgType : str
+            A constant of MsgType
+
+        senderId : int
+            The id of the sender
+
+        advice : tuple
+            For advise messages only, the sender (holderId, inSenderReqQ, senderAsked)
+
+        Returns
+        -------
+        This function returns no argument.
+
+        """
+        if self.tracer is not None :
+
+            self.tracer.receive(msgType, self.id, senderId)
+
+        if self.logLevel <= DEBUG :
+
+            self.log(DEBUG, 'receive', msgType, senderId)
+        
+        if msgType == MsgType.REQUEST :
+            
+            #if a request message is received add the send in requestQ
+            self.requestQ.append(senderId)
+            
+        elif msgType == MsgType.ASSIGN :
+            
+            #if an assign message is received set the holder to self
+            self.holderId = self.id
+            
+        elif msgType == MsgType.RESTART :
+            
+            #if node received a restart message from its neighbor, it reponds with an advise message
+            self.send_message(MsgType.ADVISE, senderId, (self.holderId, senderId in self.requestQ, self.asked))
+            
+        elif msgType == MsgType.ADVISE and self.inRecovery.is_set() :
+            
+            #an advise arriving after the recovery answers a restart message sent again
+            senderHolderId , inSenderReqQ, senderAsked = advice
+            
+            #memorise if node is in its neighbor requestQ
+            self.inNeighborReqQ[senderId] = inSenderReqQ
+            
+            #memorise the holder of the neighbor
+            self.neighborHolderId[senderId] = senderHolderId
+            
+            #mark the neighbor to remember that it received an advise from it
+            self.recievedFrom[senderId] = True
+            
+            #memorise the variable asked of the neighbor
+            self.neighborAsked[senderId] = senderAsked
+            
+            if all( value for value in self.recievedFrom.values() ) :
+                
+                #if advise messages are collected from all neighbors, start recovering attributes
+                self.recover()
+                
+
+    def step(self):
+
+        if not self.inRecovery.is_set() :
+            
+            #if the node is not in recovery mode execute the following actions
+            
+            self.assign_privilege()
+            
+            self.make_request()
+
+
+    def ask(self):
+        """
+        Extended description of function.
+
+        The node asks for privilege, if it is not already waiting for an asking privilege
+        to be satisfied and it is not in recovery mode.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns True if the privilege was asked.
+
+        """
+        if self.id in self.requestQ or self.inRecovery.is_set() :
+
+            return False
+
+        self.log(INFO, 'ask')
+
+        self.metrics.ask(self.id)
+
+        if self.tracer is not None :
+
+            self.tracer.ask(self.id)
+
+        self.requestQ.append(self.id)
+
+        self.assign_privilege()
+
+        self.make_request()
+
+        return True
+
+            
+    def recover(self):
+        
+        """    
+        
+        Extended description of function.
+        
+        After receiving advise message from all node neighbors, this function is called
+        to reconstruct from informations gathered its state before faillure.
+        
+        Parameters
+        ----------
+        This function takes no parameters.
+    
+        Returns
+        -------
+        This function returns no value.
+        
+        """ 
+        #here we determin the variable asked and holder id according to the algorithm
+        
+        if all(id == self.id for id in self.neighborHolderId.values()) :
+            
+            self.holderId = self.id
+            
+            self.asked = False
+            
+        else :
+            
+            for idN, idNH in self.neighborHolderId.items() :
+                
+                if idNH != self.id :
+                    
+                    self.holderId = idN
+                    
+                    self.asked = self.inNeighborReqQ[idN]
+                    
+                    break
+                    
+        #here we determin the requestQ of the node according to the algorithm
+        for nId in self.neighborsId :
+            
+            #a request received while recovering is already in requestQ
+            if self.neighborHolderId[nId] == self.id and self.neighborAsked[nId] and nId not in self.requestQ :
+                
+                self.requestQ.append(nId)
+                
+        self.inRecovery.clear()
+        
+        self.metrics.recover(self.id)
+
+        if self.tracer is not None :
+
+            self.tracer.recover(self.id, self.holderId)
+
+        self.log(INFO, 'recovered', self.holderId)
+        
+                        
+                        
+    def assign_privilege(self): 
+        """    
+        Extended description of function.
+        
+        This function either assignes the privilege to the node, in the case it is the root of the tree, or forwards an ASSIGN
+        type message to the first node to enter the request queue of the node.
+        
+        Parameters
+        ----------
+        This function takes no parameters.
+    
+        Returns
+        -------
+        This function returns no value.
+    
+        """
+        
+        #hold the RLock to block listner from executing assign at same time
+        with self.canWork :
+            
+            if self.holderId == self.id and not self.using and self.requestQ and not (self.holding and not self.policy.ready(self)) :
+                
+                #a held privilege goes to the requests the policy is ready to serve
+                self.holderId = self.requestQ.popleft()
+                
+                self.holding = False
+
+                if self.logLevel <= DEBUG :
+
+                    self.log(DEBUG, 'assign', self.holderId)
+        
+                self.asked = False 
+        
+                if self.holderId == self.id : 
+                
+                    #if the node is the root of the tree
+                    self.using = True 
+                    
+                    self.log(INFO, 'enter')
+                    
+                    self.metrics.grant(self.id)
+                    
+                    if self.tracer is not None :
+                    
+                        self.tracer.grant(self.id)
+                    
+                    self.ressource.acquire(self.id) #hold ressource
+                    
+                    self.enter_critical_section()
+                    
+                elif not self.inRecovery.is_set() :
+                
+                    self.send_message(MsgType.ASSIGN, self.holderId)
+
+
+    def enter_critical_section(self):
+        """
+        Extended description of function.
+
+        Hook called once the node holds the ressource. The runtime consumes the ressource
+        for a service time drawn from the workload and then calls leave_critical_section.
+
+        Parameters
+        ----------
+        This function takes no parameters.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        raise NotImplementedError
+
+
+    def leave_critical_section(self):
+        """
+        Extended description of function.
+
+        Releases the ressource, and if the node is not in recovery mode passes the privilege
+        on and asks for it again if needed. If the privilege would leave the node and its
+        policy says so, the node holds it for a while instead, waiting for a request to
+        serve before the requests already queued (see Policy.HoldAndServe).
+
+        Parameters
+        ----------
+        This function takes no parameters.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        self.ressource.release() #release ressource
+
+        if self.tracer is not None :
+
+            self.tracer.release(self.id)
+
+        self.log(INFO, 'leave')
+
+        self.using = False
+
+        if self.saturated :
+
+            #ask passes the privilege on, in the order of the request queue
+            self.ask()
+
+        if not self.inRecovery.is_set() :
+
+            if self.policy is not None and self.holderId == self.id and self.requestQ and self.id not in self.requestQ :
+
+                delay = self.policy.hold(self)
+
+                if delay > 0 :
+
+                    self.holding = True
+
+                    self.holds += 1
+
+                    self.wait_hold(delay, self.holds)
+
+                    return
+
+            self.assign_privilege()
+
+            self.make_request()
+
+
+    def wait_hold(self, delay, hold):
+        """
+        Extended description of function.
+
+        Hook called by leave_critical_section, the runtime waits delay seconds then calls
+        release_hold(hold).
+
+        Parameters
+        ----------
+        delay : float
+            The time to wait in seconds.
+
+        hold : int
+            The number of the hold.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        raise NotImplementedError
+
+
+    def release_hold(self, hold):
+        """
+        Extended description of function.
+
+        The hold is over, the node passes the privilege on to the requests queued, unless
+        a request was served during the hold, the node failed or held the privilege again.
+
+        Parameters
+        ----------
+        hold : int
+            The number of the hold.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        if not self.holding or hold != self.holds :
+
+            return
+
+        self.holding = False
+
+        if not self.inRecovery.is_set() :
+
+            self.assign_privilege()
+
+            self.make_request()
+
+
+    def send_message(self, msgType, dest, advice = None):
+        
+        """       
+        Extended description of function.
+        
+        This function counts the message in the metrics and hands it to the runtime to be delivered to
+        the destination node.
+        
+        Parameters
+        ----------
+        
+        msgType : str 
+            A constant refering to the type of the message to be sent 
+            
+        dest : int
+            The id of the receiver
+            
+        advice : tuple
+            For advise messages only, the (holderId, inSenderReqQ, senderAsked) of the node.
+    
+        Returns
+        -------
+        
+        This function returns no value.
+        
+        """ 
+        self.metrics.message(msgType, self.id, dest)
+
+        if self.tracer is not None :
+
+            self.tracer.send(msgType, self.id, dest, self.requestQ[0] if msgType == MsgType.REQUEST else None)
+
+        self.transmit(msgType, dest, advice)
+
+
+    def transmit(self, msgType, dest, advice):
+        """
+        Extended description of function.
+
+        Hook called to deliver a message to the destination node.
+
+        Parameters
+        ----------
+        See send_message.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        raise NotImplementedError
+        
+        
+    def fail(self):
+        """
+        
+        Extended description of function.
+        
+        This function is called to simulate failure of the node. It resets its 
+        attributes, set the inRecovery signal and lets the runtime wait downtime
+        seconds before calling restart.
+        
+        Parameters
+        ----------
+        This function takes no parameters
+        
+        Returns
+        -------
+        This function returns no value
+        
+        """          
+        self.inRecovery.set()
+        
+        self.asked = False
+        
+        if self.id in self.requestQ :
+
+            #the pending request of the node is lost
+            self.metrics.drop(self.id)
+
+        self.requestQ.clear()
+        
+        self.using = False
+
+        self.holding = False
+        
+        self.holderId = None
+        
+        self.neighborHolderId = {}
+         
+        self.inNeighborReqQ = {}
+        
+        self.neighborAsked = {}
+        
+        self.recievedFrom = { nId : False for nId in self.neighborsId }
+        
+        self.restarts = 0
+        
+        self.stalled = False
+        
+        self.metrics.fail(self.id)
+
+        if self.tracer is not None :
+
+            self.tracer.fail(self.id)
+
+        self.log(WARNING, 'fail')
+
+        self.wait_restart()
+
+
+    def wait_restart(self):
+        """
+
+        Extended description of function.
+
+        Hook called by fail, the runtime waits down_time() seconds then calls restart.
+
+        Parameters
+        ----------
+        This function takes no parameters
+
+        Returns
+        -------
+        This function returns no value
+
+        """
+        raise NotImplementedError
+
+
+    def restart(self):
+        """
+
+        Extended description of function.
+
+        The node is back up, it sends a restart message to its neighbors and waits
+        adviseTimeout seconds for their advise messages.
+
+        Parameters
+        ----------
+        This function takes no parameters
+
+        Returns
+        -------
+        This function returns no value
+
+        """
+        self.log(INFO, 'recovery')
+
+        if not self.neighborsId :
+
+            #a lone node has no one to wait for
+            self.recover()
+
+            return
+        
+        for neighborId in self.neighborsId :
+            
+            self.send_message(MsgType.RESTART, neighborId)        
+
+        self.wait_advise(self.adviseTimeout)
+
+
+    def wait_advise(self, delay):
+        """
+
+        Extended description of function.
+
+        Hook called by restart, the runtime waits delay seconds then calls advise_timeout,
+        unless the node failed again in the meantime.
+
+        Parameters
+        ----------
+        delay : float
+            The time to wait in seconds.
+
+        Returns
+        -------
+        This function returns no value
+
+        """
+        raise NotImplementedError
+
+
+    def advise_timeout(self):
+        """
+
+        Extended description of function.
+
+        The node is still waiting for the advise messages of some neighbors (the restart
+        message or the answer was lost, or the neighbor is slow) : the restart message is
+        sent again to them only, at most restartRetries times, with a timeout doubled at
+        each retry.
+
+        Parameters
+        ----------
+        This function takes no parameters
+
+        Returns
+        -------
+        This function returns no value
+
+        """
+        if not self.inRecovery.is_set() :
+
+            return
+
+        silent = [nId for nId, advised in self.recievedFrom.items() if not advised]
+
+        if not silent :
+
+            return
+
+        if self.restarts >= self.restartRetries :
+
+            self.log(ERROR, 'advise timeout', len(silent))
+
+            self.stalled = True
+
+            return
+
+        self.restarts += 1
+
+        self.log(WARNING, 'restart retry', self.restarts, len(silent))
+
+        self.metrics.retry(self.id)
+
+        for neighborId in silent :
+
+            self.send_message(MsgType.RESTART, neighborId)
+
+        self.wait_advise(self.adviseTimeout * 2 ** self.restarts)
+   
+     
+    def make_request(self): 
+        """
+        
+        Extended description of function.
+        
+        This function is called by the node either to ask for the privilege, or to forward
+        the request to the rest of the tree.
+    
+        Parameters
+        ----------
+        This function takes no parameters.
+    
+        Returns
+        -------
+        This function returns no value. 
+        
+        """ 
+        with self.canWork :
+            
+            if self.holderId != self.id and self.requestQ and not self.asked : 
+            
+                if self.logLevel <= DEBUG :
+
+                    self.log(DEBUG, 'request', self.holderId)
+                
+                self.send_message(MsgType.REQUEST, self.holderId)
+                
+                self.asked = True 
+
+
+                
+class Node(RaymondNode, threading.Thread):
+    """
+    This class is used to simulate a node as a thread, exchanging its messages through a transport.
+
+    Attributes
+    ----------
+    See RaymondNode for the attributes of the algorithm.
+
+    inRecovery : threading.Event
+        A threading signal that indicates if the node is in recovery state or not
+
+    teminate : threading.Event
+        Threading signal that indicate if node should continue to work
+
+    canWork : threading.RLock
+        Reantrant lock to synchronise the scheduler of the network and the listner. To make sure the listner and the
+        timers dont execute assign and request actions in the same time.
+
+    transport : Transport
+        The transport used to exchange messages, shared by the nodes of the network
+
+    endpoint : Endpoint
+        The node's endpoint of the transport, opened when the node starts
+
+    network : Network
+        The network of the node, scheduling its timers
+
+    received : int
+        The number of messages handled by the node, to know when none is in flight
+
+    epoch : int
+        Incremented at each failure, to drop the timers started before it
+
+    Methods
+    -------
+    listen()
+        A methdod to consume received messages from the endpoint of the node
+
+    close()
+        Closes the endpoint of the node once its run is over
+
+    callback()
+        This methode is called whenever a message is received
+
+    think()
+        Schedules the next asking for privilege of the node
+
+    run()
+        This methode runs the listener of the node.
+
+    """
+
+    def __init__(self, id, holderId = None, askingPrivRate = .05, transport = None, metrics = None, network = None):
+
+        threading.Thread.__init__(self)
+
+        RaymondNode.__init__(self, id, holderId, askingPrivRate, metrics)
+
+        self.inRecovery = threading.Event()
+
+        self.terminate = threading.Event()
+
+        self.canWork = threading.RLock()
+
+        self.transport = transport
+
+        self.network = network
+
+        self.received = 0
+
+        self.epoch = 0
+
+
+    def listen(self):
+        """    
+        Extended description of function.
+        
+        This function performs the listening rootine of the endpoint
+        and calls the methode callback when a message is dequeued.
+        
+        Parameters
+        ----------
+        This function takes no argument.
+    
+        Returns
+        -------
+        This function returns no value.
+    
+        """
+        self.endpoint.listen(self.callback)
+        
+    
+    def callback(self, body):
+        """
+        
+        Extended description of function.
+        
+        This function is called whenever the node receives a message or a batch.
+        The message is decoded (see Wire) and handed to on_message, holding
+        canWork : the handlers never wait, so they are atomic with the timers.
+        
+        Parameters
+        ----------
+        
+        body : bytes
+            byte string containing the body of the message
+
+        Returns
+        -------
+        This function returns no argument.
+
+        """
+        if body[0] == BATCH_CODE :
+
+            messages = decode_batch(body)
+
+            with self.canWork :
+
+                if self.recorder is not None :
+
+                    self.recorder.record(self.id, 'B', messages)
+
+                self.on_batch(messages)
+
+                self.received += len(messages)
+
+            return
+
+        msgType, senderId, advice = decode(body)
+
+        with self.canWork :
+
+            if self.recorder is not None :
+
+                self.recorder.record(self.id, 'M', msgType, senderId, advice)
+
+            self.on_message(msgType, senderId, advice)
+
+            #counted once handled, the messages sent by the handler are already counted as sent
+            self.received += 1
+
+
+    def think(self):
+        """
+        Extended description of function.
+
+        Schedules the next time the node will ask for privilege, after a time sampled from
+        Exp(askingPrivRate), if it has a non zero asking for privilege rate.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        if self.askingPrivRate > 0 :
+
+            self.network.schedule(self.next_time(), self.wake)
+
+
+    def wake(self):
+
+        if self.terminate.is_set() :
+
+            return
+
+        #if node is not already waiting for an asking privilege to be satisfied,
+        #and it is not in recovery mode, asks for privilege
+        with self.canWork :
+
+            if self.recorder is not None :
+
+                self.recorder.record(self.id, 'W')
+
+            self.ask()
+
+        self.network.schedule(self.next_time(), self.wake)
+
+
+    def ask(self):
+
+        #the network is shutting down, a saturated node does not ask again
+        if self.terminate.is_set() :
+
+            return False
+
+        return RaymondNode.ask(self)
+
+
+    def enter_critical_section(self):
+
+        if self.terminate.is_set() :
+
+            #the network is shutting down, the node leaves at once
+            self.leave_critical_section()
+
+        else :
+
+            #consume ressource
+            self.network.schedule(self.service_time(), self.end_critical_section, self.epoch)
+
+
+    def end_critical_section(self, epoch):
+
+        with self.canWork :
+
+            if epoch == self.epoch :
+
+                if self.recorder is not None :
+
+                    self.recorder.record(self.id, 'E')
+
+                self.leave_critical_section()
+
+
+    def transmit(self, msgType, dest, advice):
+        """
+        Extended description of function.
+
+        This function encodes the message in the binary format of Wire and then sends it to the
+        destination node through the endpoint of the node.
+
+        Parameters
+        ----------
+        See RaymondNode.send_message.
+
+        Returns
+        -------
+
+        This function returns no value.
+
+        """
+        self.endpoint.send(dest, encode(msgType, self.id, advice))
+
+
+    def fail(self):
+
+        with self.canWork :
+
+            if self.recorder is not None :
+
+                self.recorder.record(self.id, 'F')
+
+            self.epoch += 1
+
+            if self.using :
+
+                #the node fails inside the critical section, the ressource is freed
+                self.ressource.release()
+
+            RaymondNode.fail(self)
+
+
+    def wait_restart(self):
+
+        self.network.schedule(self.down_time(), self.end_downtime, self.epoch)
+
+
+    def end_downtime(self, epoch):
+
+        with self.canWork :
+
+            if epoch == self.epoch :
+
+                if self.recorder is not None :
+
+                    self.recorder.record(self.id, 'D')
+
+                self.restart()
+
+
+    def wait_advise(self, delay):
+
+        self.network.schedule(delay, self.end_advise_wait, self.epoch)
+
+
+    def end_advise_wait(self, epoch):
+
+        with self.canWork :
+
+            if epoch == self.epoch :
+
+                if self.recorder is not None :
+
+                    self.recorder.record(self.id, 'T')
+
+                self.advise_timeout()
+
+
+    def wait_hold(self, delay, hold):
+
+        self.network.schedule(delay, self.end_hold, hold)
+
+
+    def end_hold(self, hold):
+
+        with self.canWork :
+
+            if self.holding and hold == self.holds :
+
+                if self.recorder is not None :
+
+                    self.recorder.record(self.id, 'H', hold)
+
+                self.release_hold(hold)
+
+
+    def recover(self):
+
+        RaymondNode.recover(self)
+
+        self.network.node_recovered(self)
+
+
+    def run(self):
+        """
+        Extended description of function.
+
+        This function opens the endpoint of the node, schedules its first asking for privilege
+        in the scheduler of the network and consumes the received messages until the endpoint
+        is closed.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        self.endpoint = self.transport.endpoint(self.id)
+
+        self.think()
+        
+        try :
+            
+            self.listen()
+                    
+        except Exception :
+            
+            self.log(ERROR, 'error', traceback.format_exc())
+        
+        self.log(INFO, 'done')
+        
+
+    def close(self):
+        """
+        Extended description of function.
+
+        This function closes the endpoint of the node and waits for its thread to stop. The
+        network calls it once the messages in flight are handled.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        self.endpoint.close()
+
+        self.join()
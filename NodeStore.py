@@ -0,0 +1,608 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:40:09 2026
+
+Structure-of-arrays storage of the node states, for simulations of millions of nodes.
+
+Instead of one object per node, the state of all the nodes is kept in NumPy arrays
+indexed by node id, the neighbors in a CSR adjacency and the request queues in a pool
+of ring buffers. The state machine of RaymondNode is run on it through StoredSimNode,
+a lightweight view created on demand for one node.
+
+    simulator = StoreSimulator(failureRate = 1e-3, activityRate = .01, seed = 1)
+
+    simulator.addTree(Topology.random_recursive(10**6))
+
+    simulator.start(3600)
+"""
+
+from collections import deque
+from collections.abc import Mapping
+import numpy as np
+from Simulator import Simulator, SimNode, NOLOCK
+from Topology import check_tree
+from Workload import Workload, Constant
+
+
+class NodeStore():
+    """
+    This class stores the state of the nodes of a tree in arrays, the node ids are
+    the positions 0 to n - 1 of the parent array it is built from.
+
+    Attributes
+    ----------
+    n : int
+        The number of nodes.
+
+    holderId : numpy.ndarray
+        The holder of each node, -1 while unknown (recovery).
+
+    asked, using, inRecovery, thinking, holding : numpy.ndarray
+        The boolean attributes of the nodes.
+
+    epoch : numpy.ndarray
+        The failure counter of each node, see SimNode.
+
+    holds : numpy.ndarray
+        The hold counter of each node, see RaymondNode.
+
+    askingPrivRate : numpy.ndarray
+        The asking privilege rate of each node.
+
+    indptr, indices : numpy.ndarray
+        The CSR adjacency, the neighbors of node i are indices[indptr[i]:indptr[i + 1]],
+        its parent first.
+
+    queueStart, queueHead, queueLength : numpy.ndarray
+        The request queue of node i is a ring buffer of degree + 1 entries of queueData,
+        starting at queueStart[i].
+
+    spilled : dict
+        The entries that did not fit in the ring buffer of a node (a neighbor queued twice
+        around a failure), in a deque by node.
+
+    recovery : dict
+        The neighbors information gathered by the nodes in recovery, by node.
+
+    Methods
+    -------
+    neighbors() :
+        The neighbors of a node.
+
+    append(), popleft(), contains(), clear(), entries() :
+        The operations on the request queue of a node.
+    """
+
+    def __init__(self, parents, askingPrivRates = None, activityRate = .05):
+
+        parents = np.asarray(parents, dtype = np.int64)
+
+        check_tree(parents.tolist())
+
+        n = self.n = len(parents)
+
+        nodes = np.arange(n, dtype = np.int64)
+
+        self.holderId = np.where(parents < 0, nodes, parents)
+
+        self.asked = np.zeros(n, dtype = bool)
+
+        self.using = np.zeros(n, dtype = bool)
+
+        self.inRecovery = np.zeros(n, dtype = bool)
+
+        self.thinking = np.zeros(n, dtype = bool)
+
+        self.holding = np.zeros(n, dtype = bool)
+
+        self.epoch = np.zeros(n, dtype = np.int32)
+
+        self.holds = np.zeros(n, dtype = np.int32)
+
+        if askingPrivRates is None :
+
+            self.askingPrivRate = np.full(n, activityRate, dtype = np.float64)
+
+        else :
+
+            self.askingPrivRate = np.asarray(askingPrivRates, dtype = np.float64)
+
+        #CSR adjacency : both directions of every edge, sorted by source, parent first
+        children = nodes[parents >= 0]
+
+        source = np.concatenate((children, parents[children]))
+
+        destination = np.concatenate((parents[children], children))
+
+        order = np.argsort(source, kind = 'stable')
+
+        self.indices = destination[order]
+
+        self.indptr = np.zeros(n + 1, dtype = np.int64)
+
+        np.cumsum(np.bincount(source, minlength = n), out = self.indptr[1:])
+
+        #pool of ring buffers, degree + 1 entries by node
+        self.queueStart = self.indptr[:-1] + nodes
+
+        self.queueCapacity = np.diff(self.indptr) + 1
+
+        self.queueHead = np.zeros(n, dtype = np.int64)
+
+        self.queueLength = np.zeros(n, dtype = np.int64)
+
+        self.queueData = np.zeros(len(self.indices) + n, dtype = np.int64)
+
+        self.spilled = {}
+
+        self.recovery = {}
+
+
+    def neighbors(self, i):
+
+        indptr = self.indptr
+
+        return self.indices[indptr.item(i):indptr.item(i + 1)].tolist()
+
+
+    def append(self, i, value):
+
+        length = self.queueLength.item(i)
+
+        capacity = self.queueCapacity.item(i)
+
+        if length == capacity or i in self.spilled :
+
+            self.spilled.setdefault(i, deque()).append(value)
+
+            return
+
+        self.queueData[self.queueStart.item(i) + (self.queueHead.item(i) + length) % capacity] = value
+
+        self.queueLength[i] = length + 1
+
+
+    def popleft(self, i):
+
+        length = self.queueLength.item(i)
+
+        if length == 0 :
+
+            raise IndexError('pop from an empty request queue')
+
+        start = self.queueStart.item(i)
+
+        head = self.queueHead.item(i)
+
+        capacity = self.queueCapacity.item(i)
+
+        value = self.queueData.item(start + head)
+
+        head = (head + 1) % capacity
+
+        self.queueHead[i] = head
+
+        spilled = self.spilled.get(i)
+
+        if spilled :
+
+            #the spilled entries are the most recent, the oldest one takes the free slot at the tail
+            self.queueData[start + (head + length - 1) % capacity] = spilled.popleft()
+
+            if not spilled :
+
+                del self.spilled[i]
+
+        else :
+
+            self.queueLength[i] = length - 1
+
+        return value
+
+
+    def entries(self, i):
+
+        start = self.queueStart.item(i)
+
+        head = self.queueHead.item(i)
+
+        capacity = self.queueCapacity.item(i)
+
+        data = self.queueData
+
+        values = [data.item(start + (head + k) % capacity) for k in range(self.queueLength.item(i))]
+
+        if i in self.spilled :
+
+            values.extend(self.spilled[i])
+
+        return values
+
+
+    def contains(self, i, value):
+
+        return value in self.entries(i)
+
+
+    def clear(self, i):
+
+        self.queueHead[i] = 0
+
+        self.queueLength[i] = 0
+
+        self.spilled.pop(i, None)
+
+
+    def memory(self):
+        """
+        Extended description of function.
+
+        Returns the memory used by the arrays of the store in bytes.
+
+        """
+        return sum(array.nbytes for array in vars(self).values() if isinstance(array, np.ndarray))
+
+
+class PooledQueue():
+    """
+    The request queue of one node of a NodeStore, with the operations of the deque
+    used by RaymondNode.
+    """
+    __slots__ = ('store', 'i')
+
+    def __init__(self, store, i):
+
+        self.store = store
+
+        self.i = i
+
+    def append(self, value):
+
+        self.store.append(self.i, value)
+
+    def popleft(self):
+
+        return self.store.popleft(self.i)
+
+    def clear(self):
+
+        self.store.clear(self.i)
+
+    def __contains__(self, value):
+
+        return self.store.contains(self.i, value)
+
+    def __len__(self):
+
+        return self.store.queueLength.item(self.i) + len(self.store.spilled.get(self.i, ()))
+
+    def __bool__(self):
+
+        return self.store.queueLength.item(self.i) > 0
+
+    def __iter__(self):
+
+        return iter(self.store.entries(self.i))
+
+    def __getitem__(self, k):
+
+        return self.store.entries(self.i)[k]
+
+
+class StoreFlag():
+    """
+    A boolean of one node of a NodeStore, with the methods of threading.Event.
+    """
+    __slots__ = ('array', 'i')
+
+    def __init__(self, array, i):
+
+        self.array = array
+
+        self.i = i
+
+    def set(self):
+
+        self.array[self.i] = True
+
+    def clear(self):
+
+        self.array[self.i] = False
+
+    def is_set(self):
+
+        return self.array.item(self.i)
+
+
+def array_property(name):
+
+    def get(self):
+
+        return getattr(self.store, name).item(self.id)
+
+    def set(self, value):
+
+        getattr(self.store, name)[self.id] = value
+
+    return property(get, set)
+
+
+def recovery_property(name):
+
+    def get(self):
+
+        return self.store.recovery[self.id][name]
+
+    def set(self, value):
+
+        self.store.recovery.setdefault(self.id, {})[name] = value
+
+    return property(get, set)
+
+
+class StoredSimNode(SimNode):
+    """
+    A view of one node of a NodeStore, running the state machine of SimNode on the
+    arrays of the store. Views hold no state, they are created on demand by StoreNodes.
+    """
+    askingPrivRate = array_property('askingPrivRate')
+
+    using = array_property('using')
+
+    asked = array_property('asked')
+
+    thinking = array_property('thinking')
+
+    epoch = array_property('epoch')
+
+    holding = array_property('holding')
+
+    holds = array_property('holds')
+
+    neighborHolderId = recovery_property('neighborHolderId')
+
+    inNeighborReqQ = recovery_property('inNeighborReqQ')
+
+    neighborAsked = recovery_property('neighborAsked')
+
+    recievedFrom = recovery_property('recievedFrom')
+
+    restarts = recovery_property('restarts')
+
+    canWork = NOLOCK
+
+    def __init__(self, simulator, store, i):
+
+        self.simulator = simulator
+
+        self.store = store
+
+        self.id = i
+
+        self.rng = simulator.rng
+
+        self.metrics = simulator.metrics
+
+        self.tracer = simulator.tracer
+
+        self.ressource = simulator.ressource
+
+        if simulator.downtime is not None :
+
+            self.downtime = simulator.downtime
+
+        if simulator.saturated :
+
+            self.saturated = True
+
+        if simulator.policy is not None :
+
+            self.policy = simulator.policy
+
+        workload = simulator.workload_of(i)
+
+        if workload is not None :
+
+            self.workload = workload
+
+        if simulator.eventLog is not None :
+
+            self.eventLog = simulator.eventLog
+
+            self.logLevel = simulator.eventLog.node_level(i)
+
+    @property
+    def holderId(self):
+
+        holderId = self.store.holderId.item(self.id)
+
+        return None if holderId < 0 else holderId
+
+    @holderId.setter
+    def holderId(self, value):
+
+        self.store.holderId[self.id] = -1 if value is None else value
+
+    @property
+    def neighborsId(self):
+
+        return self.store.neighbors(self.id)
+
+    @property
+    def requestQ(self):
+
+        if self.policy is None :
+
+            return PooledQueue(self.store, self.id)
+
+        #the queues of a policy keep their state, they are kept by the simulator
+        queue = self.simulator.queues.get(self.id)
+
+        if queue is None :
+
+            queue = self.simulator.queues[self.id] = self.policy.queue(self)
+
+        return queue
+
+    @property
+    def inRecovery(self):
+
+        return StoreFlag(self.store.inRecovery, self.id)
+
+    def think(self):
+
+        if self.askingPrivRate > 0 :
+
+            self.thinking = True
+
+            #the timer refers to the node by id, not by view, to keep the heap small
+            self.simulator.schedule(self.next_time(), self.simulator.wake, self.id)
+
+    def wake(self):
+
+        if self.id in self.requestQ and not self.inRecovery.is_set() :
+
+            self.thinking = False
+
+            return
+
+        self.ask()
+
+        self.simulator.schedule(self.next_time(), self.simulator.wake, self.id)
+
+    def recover(self):
+
+        SimNode.recover(self)
+
+        del self.store.recovery[self.id]
+
+
+class StoreNodes(Mapping):
+    """
+    The nodes of a StoreSimulator, as a mapping from id to StoredSimNode views.
+    """
+
+    def __init__(self, simulator, store):
+
+        self.simulator = simulator
+
+        self.store = store
+
+    def __getitem__(self, i):
+
+        if not 0 <= i < self.store.n :
+
+            raise KeyError(i)
+
+        return StoredSimNode(self.simulator, self.store, i)
+
+    def __len__(self):
+
+        return self.store.n
+
+    def __iter__(self):
+
+        return iter(range(self.store.n))
+
+    def __contains__(self, i):
+
+        return isinstance(i, int) and 0 <= i < self.store.n
+
+
+class StoreSimulator(Simulator):
+    """
+    This class is a Simulator whose nodes are stored in a NodeStore. The tree is
+    added in one go by addTree and the node ids are 0 to n - 1.
+
+    Attributes
+    ----------
+    See Simulator.
+
+    store : NodeStore
+        The state of the nodes.
+
+    queues : dict
+        The request queues of the nodes by id when a policy is set, built the first time
+        a node uses its queue. Without policy the queues are the ring buffers of the store.
+    """
+
+    def addNode(self, nodeId, holderId = None, askingPrivRate = None):
+
+        raise NotImplementedError('the nodes of a StoreSimulator are added by addTree')
+
+
+    def addTree(self, parents, ids = None, askingPrivRates = None):
+
+        if ids is not None and list(ids) != list(range(len(parents))) :
+
+            raise ValueError('the node ids of a StoreSimulator are 0 to n - 1')
+
+        if self.nodes :
+
+            raise ValueError('the tree of a StoreSimulator is added once')
+
+        self.store = NodeStore(parents, askingPrivRates, self.activityRate)
+
+        self.nodes = StoreNodes(self, self.store)
+
+
+    def trace(self, tracer):
+
+        if tracer is not None :
+
+            tracer.clock = self.clock
+
+        #the views take the tracer of the simulator
+        self.tracer = tracer
+
+
+    def set_workload(self, workload):
+
+        #the views take the workloads of the simulator
+        if isinstance(workload, Workload) :
+
+            self.workload = workload
+
+            self.workloads = {}
+
+        else :
+
+            self.workloads.update(workload)
+
+
+    def set_policy(self, policy):
+
+        #the views take the policy of the simulator
+        self.policy = policy
+
+        self.queues = {}
+
+        if policy is not None :
+
+            policy.start(self)
+
+
+    def set_saturation(self, saturated = True):
+
+        #the views take the saturation of the simulator
+        self.saturated = saturated
+
+
+    def set_downtime(self, downtime):
+
+        #the views take the downtime of the simulator
+        self.downtime = downtime if isinstance(downtime, Workload) else Constant(downtime)
+
+
+    def log_events(self, eventLog):
+
+        if eventLog is not None :
+
+            eventLog.clock = self.clock
+
+        self.eventLog = eventLog
+
+
+    def wake(self, i):
+
+        StoredSimNode(self, self.store, i).wake()
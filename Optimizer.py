@@ -0,0 +1,646 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:47:33 2026
+
+Choice of the tree of a network. Given the communication graph of the nodes (the pairs
+that can exchange messages) and their asking privilege rates, the optimizer searches the
+spanning tree and the initial holder of the token with the fewest messages by request.
+
+The cost of a tree is predicted without simulating, see PathIndex.expected_message_cost :
+the sum over the edges of 4 P (1 - P), P being the fraction of the rate on one side of
+the edge. The candidates are breadth first trees (low diameter) grown from the weighted
+median and from the center of the graph, and the current tree if any. The best one is
+improved by local search : an edge of the graph replaces an edge of the cycle it closes
+when that lowers the cost, evaluated along the cycle only. The token starts at the weighted
+median of the tree. The prediction is the cost at low load : under contention the requests
+are merged on the way and the simulated complexity is lower.
+
+    plan = Optimizer(edges, rates).optimize()
+
+    network = plan.network(Simulator, activityRate = .05)
+
+    print(plan, plan.simulate(3600))
+
+    plan = Optimizer.from_network(network, [(1, 4), (2, 7), (5, 9)]).optimize()
+"""
+
+from collections import deque
+from Network import Network
+from Topology import check_tree, reroot
+
+
+def cost_function(p):
+
+    return 4 * p * (1 - p)
+
+
+class TreePlan():
+    """
+    This class holds a tree chosen by the optimizer.
+
+    Attributes
+    ----------
+    name : str
+        The candidate the tree comes from, followed by '+search' if the local search
+        improved it.
+
+    parents, ids : lists
+        The tree, rooted at the initial holder of the token, see Topology.
+
+    rates : list of float
+        The asking privilege rate of each node.
+
+    predicted : float
+        The predicted number of messages by request.
+
+    simulated : float
+        The number of messages by request of the last simulation, None before simulate().
+
+    candidates : dict
+        The predicted cost of every candidate tree, by name.
+
+    Methods
+    -------
+    network() :
+        Builds the network of the tree.
+
+    simulate() :
+        Measures the complexity of the tree with the simulator.
+    """
+
+    def __init__(self, name, parents, ids, rates, predicted, candidates):
+
+        self.name = name
+
+        self.parents = parents
+
+        self.ids = ids
+
+        self.rates = rates
+
+        self.predicted = predicted
+
+        self.simulated = None
+
+        self.candidates = candidates
+
+
+    @property
+    def root(self):
+
+        return self.ids[check_tree(self.parents)]
+
+
+    def network(self, networkClass = Network, *args, **kwargs):
+        """
+        Extended description of function.
+
+        Builds a network of the tree, the nodes asking for privilege at their rates.
+
+        Parameters
+        ----------
+        networkClass : class
+            Network, Simulator, AsyncNetwork or StoreSimulator (whose ids must be 0 to n - 1).
+
+        args, kwargs :
+            The arguments of the network.
+
+        Returns
+        -------
+        This function returns the network.
+
+        """
+        network = networkClass(*args, **kwargs)
+
+        network.addTree(self.parents, self.ids, self.rates)
+
+        return network
+
+
+    def simulate(self, duration = 3600., workload = None, seed = None, latency = 1e-3):
+        """
+        Extended description of function.
+
+        Simulates the tree without failures and records its complexity in simulated.
+
+        Parameters
+        ----------
+        duration : float
+            The simulated duration in seconds.
+
+        workload : Workload
+            The workload of the critical section, the default of the nodes if None.
+
+        seed : int
+            The seed of the simulation.
+
+        latency : float
+            The latency of the messages in seconds.
+
+        Returns
+        -------
+        This function returns the RunResult of the simulation.
+
+        """
+        from Simulator import Simulator
+
+        simulator = self.network(Simulator, 0, latency = latency, seed = seed)
+
+        if workload is not None :
+
+            simulator.set_workload(workload)
+
+        result = simulator.run(duration)
+
+        self.simulated = result.complexity
+
+        return result
+
+
+    def __repr__(self):
+
+        return 'TreePlan(name = %r, nodes = %d, root = %r, predicted = %.3f, simulated = %s)' % (
+            self.name, len(self.parents), self.root, self.predicted,
+            'None' if self.simulated is None else '%.3f' % self.simulated)
+
+
+class Optimizer():
+    """
+    This class searches the tree of a communication graph with the fewest messages by
+    privilege request.
+
+    Attributes
+    ----------
+    ids : list
+        The ids of the nodes.
+
+    rates : list of float
+        The asking privilege rate of each node, in the order of ids.
+
+    adjacency : list of lists
+        The neighbors of each node in the graph, by position in ids.
+
+    current : list
+        The parent array of the current tree of the network, a candidate, or None.
+
+    maxSwaps : int
+        The largest number of edge swaps of the local search.
+
+    medians : int
+        The number of nodes, the ones with the highest rates and degrees, among which the
+        weighted median and the center of the graph are searched.
+
+    Methods
+    -------
+    candidates() :
+        The candidate trees.
+
+    cost() :
+        The predicted cost of a tree.
+
+    local_search() :
+        Improves a tree by edge swaps.
+
+    optimize() :
+        Returns the best tree found.
+    """
+
+    maxSwaps = 1000
+
+    medians = 16
+
+    def __init__(self, edges, rates, ids = None, current = None):
+
+        adjacency = {}
+
+        for u, v in edges :
+
+            if u != v :
+
+                adjacency.setdefault(u, set()).add(v)
+
+                adjacency.setdefault(v, set()).add(u)
+
+        self.ids = sorted(adjacency) if ids is None else list(ids)
+
+        position = {nodeId : i for i, nodeId in enumerate(self.ids)}
+
+        if len(position) != len(self.ids) or any(nodeId not in position for nodeId in adjacency) :
+
+            raise ValueError('the ids must be unique and hold all the nodes of the edges')
+
+        self.adjacency = [sorted(position[v] for v in adjacency.get(nodeId, ())) for nodeId in self.ids]
+
+        if isinstance(rates, dict) :
+
+            rates = [rates[nodeId] for nodeId in self.ids]
+
+        self.rates = [float(rate) for rate in rates]
+
+        if len(self.rates) != len(self.ids) :
+
+            raise ValueError('a rate is needed by node')
+
+        self.current = current
+
+        if None in self.bfs(0) :
+
+            raise ValueError('the communication graph is not connected')
+
+
+    @classmethod
+    def from_network(cls, network, edges = None):
+        """
+        Extended description of function.
+
+        Builds the optimizer of the nodes of a network, with their rates, its tree being a
+        candidate.
+
+        Parameters
+        ----------
+        network : Network
+            The network.
+
+        edges : iterable of pairs
+            The communication graph, the edges of the tree of the network plus these.
+
+        Returns
+        -------
+        This function returns an Optimizer.
+
+        """
+        ids = list(network.nodes.keys())
+
+        position = {nodeId : i for i, nodeId in enumerate(ids)}
+
+        nodes = [network.nodes[nodeId] for nodeId in ids]
+
+        treeEdges = [(node.id, neighborId) for node in nodes for neighborId in node.neighborsId if node.id < neighborId]
+
+        root = next((node.id for node in nodes if node.holderId == node.id), ids[0])
+
+        optimizer = cls(treeEdges + list(edges or ()), [node.askingPrivRate for node in nodes], ids)
+
+        optimizer.current = optimizer.bfs(position[root], {(position[u], position[v]) for u, v in treeEdges})
+
+        return optimizer
+
+
+    def bfs(self, root, allowed = None):
+
+        #breadth first tree from root, over the edges of the graph or only the allowed ones,
+        #None for the nodes out of reach
+        parents = [None] * len(self.ids)
+
+        parents[root] = -1
+
+        queue = deque([root])
+
+        while queue :
+
+            u = queue.popleft()
+
+            for v in self.adjacency[u] :
+
+                if parents[v] is None and (allowed is None or (u, v) in allowed or (v, u) in allowed) :
+
+                    parents[v] = u
+
+                    queue.append(v)
+
+        return parents
+
+
+    def order(self, parents):
+
+        #the nodes in breadth first order from the root, and the depths
+        children = [[] for _ in parents]
+
+        root = -1
+
+        for u, parent in enumerate(parents) :
+
+            if parent >= 0 :
+
+                children[parent].append(u)
+
+            else :
+
+                root = u
+
+        order, depth = [root], [0] * len(parents)
+
+        for u in order :
+
+            for child in children[u] :
+
+                depth[child] = depth[u] + 1
+
+                order.append(child)
+
+        return order, depth
+
+
+    def subtree_rates(self, parents, order):
+
+        subtree = list(self.rates)
+
+        for u in reversed(order[1:]) :
+
+            subtree[parents[u]] += subtree[u]
+
+        return subtree
+
+
+    def cost(self, parents):
+        """
+        Extended description of function.
+
+        The predicted number of messages by privilege request of a tree, in O(n).
+
+        Parameters
+        ----------
+        parents : list of int
+            The parent array of the tree, by position in ids.
+
+        Returns
+        -------
+        This function returns a float.
+
+        """
+        order, _ = self.order(parents)
+
+        subtree = self.subtree_rates(parents, order)
+
+        total = subtree[order[0]]
+
+        return sum(cost_function(subtree[u] / total) for u in order[1:])
+
+
+    def median(self, parents):
+
+        #the node minimizing the weighted distance to the others : moving from a node to
+        #its child c brings the rate of the subtree of c one hop closer, the rest further
+        order, depth = self.order(parents)
+
+        subtree = self.subtree_rates(parents, order)
+
+        total = subtree[order[0]]
+
+        distances = [0.] * len(parents)
+
+        distances[order[0]] = sum(rate * d for rate, d in zip(self.rates, depth))
+
+        for u in order[1:] :
+
+            distances[u] = distances[parents[u]] + total - 2 * subtree[u]
+
+        return min(range(len(parents)), key = distances.__getitem__)
+
+
+    def candidates(self):
+        """
+        Extended description of function.
+
+        Builds the candidate trees : breadth first trees from the nodes of the graph with
+        the smallest weighted distance to the others and the smallest eccentricity, among
+        the medians nodes with the highest rates and degrees, and the current tree.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns a dictionary of parent arrays by name.
+
+        """
+        n = len(self.ids)
+
+        ranked = sorted(range(n), key = lambda u : (-self.rates[u], -len(self.adjacency[u]), u))[:self.medians]
+
+        ranked += sorted(range(n), key = lambda u : (-len(self.adjacency[u]), u))[:self.medians]
+
+        best = {}
+
+        for u in dict.fromkeys(ranked) :
+
+            parents = self.bfs(u)
+
+            order, depth = self.order(parents)
+
+            weighted = sum(rate * d for rate, d in zip(self.rates, depth))
+
+            for name, key in (('bfs-median', weighted), ('bfs-center', (depth[order[-1]], weighted))) :
+
+                if name not in best or key < best[name][0] :
+
+                    best[name] = (key, parents)
+
+        candidates = {name : parents for name, (_, parents) in best.items()}
+
+        if self.current is not None :
+
+            candidates['current'] = list(self.current)
+
+        return candidates
+
+
+    def swap_delta(self, parents, depth, subtree, total, x, y):
+
+        #the cycle closed by the edge (x, y) : the path from x to y in the tree, with the
+        #fraction of the rate on the x side of each of its edges
+        up, down = [], []
+
+        while depth[x] > depth[y] :
+
+            up.append((x, parents[x], subtree[x] / total))
+
+            x = parents[x]
+
+        while depth[y] > depth[x] :
+
+            down.append((parents[y], y, 1 - subtree[y] / total))
+
+            y = parents[y]
+
+        while x != y :
+
+            up.append((x, parents[x], subtree[x] / total))
+
+            down.append((parents[y], y, 1 - subtree[y] / total))
+
+            x, y = parents[x], parents[y]
+
+        path = up + down[::-1]
+
+        #the x sides grow along the path. Removing the i-th edge, the j-th one separates
+        #the nodes between the two edges, with a fraction |X_i - X_j| of the rate, so the
+        #new costs are polynomials of X_i summed with prefix sums, in O(L)
+        sides = [side for _, _, side in path]
+
+        length = len(sides)
+
+        sum1 = sum(sides)
+
+        sum2 = sum(side * side for side in sides)
+
+        before = 4 * (sum1 - sum2)
+
+        left1 = left2 = 0.
+
+        bestDelta, bestEdge = 0., None
+
+        for i, cut in enumerate(sides) :
+
+            right1, right2, right = sum1 - left1 - cut, sum2 - left2 - cut * cut, length - 1 - i
+
+            after = 4 * (i * cut - left1) - 4 * (i * cut * cut - 2 * cut * left1 + left2)
+
+            after += 4 * (right1 - right * cut) - 4 * (right2 - 2 * cut * right1 + right * cut * cut)
+
+            delta = after - before + cost_function(cut)
+
+            if delta < bestDelta - 1e-12 :
+
+                bestDelta, bestEdge = delta, path[i][:2]
+
+            left1 += cut
+
+            left2 += cut * cut
+
+        return bestDelta, bestEdge
+
+
+    def local_search(self, parents):
+        """
+        Extended description of function.
+
+        Improves a tree by edge swaps : an edge of the graph that is not in the tree closes
+        a cycle, it replaces the edge of the cycle that lowers the cost the most, if any.
+        The change of cost is evaluated along the cycle only, in O(L) for a cycle of L
+        edges. The search stops when no swap improves the tree, or after maxSwaps swaps.
+
+        Parameters
+        ----------
+        parents : list of int
+            The parent array of the tree.
+
+        Returns
+        -------
+        This function returns the parent array of the improved tree and the number of swaps.
+
+        """
+        parents = list(parents)
+
+        edges = [(x, y) for x in range(len(parents)) for y in self.adjacency[x] if x < y]
+
+        swaps = 0
+
+        improved = True
+
+        while improved and swaps < self.maxSwaps :
+
+            improved = False
+
+            order, depth = self.order(parents)
+
+            subtree = self.subtree_rates(parents, order)
+
+            total = subtree[order[0]]
+
+            for x, y in edges :
+
+                if parents[x] == y or parents[y] == x :
+
+                    continue
+
+                delta, edge = self.swap_delta(parents, depth, subtree, total, x, y)
+
+                if edge is None :
+
+                    continue
+
+                #cut the edge, then hang the part left without the root by the end of
+                #(x, y) it holds, and go on with the next edges
+                child = edge[0] if parents[edge[0]] == edge[1] else edge[1]
+
+                parents[child] = -1
+
+                if self.contains(parents, child, x) :
+
+                    parents = reroot(parents, x)
+
+                    parents[x] = y
+
+                else :
+
+                    parents = reroot(parents, y)
+
+                    parents[y] = x
+
+                swaps += 1
+
+                improved = True
+
+                if swaps == self.maxSwaps :
+
+                    break
+
+                order, depth = self.order(parents)
+
+                subtree = self.subtree_rates(parents, order)
+
+        return parents, swaps
+
+
+    def contains(self, parents, u, v):
+
+        #v is in the subtree of u
+        while v >= 0 :
+
+            if v == u :
+
+                return True
+
+            v = parents[v]
+
+        return False
+
+
+    def optimize(self, search = True):
+        """
+        Extended description of function.
+
+        Evaluates the candidate trees, improves the best one by local search and roots it
+        at its weighted median, the initial holder of the token.
+
+        Parameters
+        ----------
+        search : bool
+            Runs the local search.
+
+        Returns
+        -------
+        This function returns a TreePlan.
+
+        """
+        candidates = self.candidates()
+
+        costs = {name : self.cost(parents) for name, parents in candidates.items()}
+
+        name = min(costs, key = costs.get)
+
+        parents = candidates[name]
+
+        if search :
+
+            parents, swaps = self.local_search(parents)
+
+            if swaps :
+
+                name += '+search'
+
+        parents = reroot(parents, self.median(parents))
+
+        return TreePlan(name, parents, list(self.ids), list(self.rates), self.cost(parents), costs)
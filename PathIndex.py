@@ -0,0 +1,489 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:02:17 2026
+
+Precomputed index of the paths of a tree, for analysis and fast simulation.
+
+The tree of a network never changes, only the direction of its edges : the holder of a
+node is always the next hop from the node toward the token. The index roots the tree
+once, computes its Euler tour and a sparse table of the minimum depth over the tour,
+and answers in constant time the lowest common ancestor and the distance of two nodes.
+The next hop toward any node, thus the holder of a node, and the subtree sizes seen from
+the token take a binary search among the children of a node. An ASSIGN moves the token
+to a neighbor, which updates the index in O(1).
+
+    index = PathIndex.from_network(network)
+
+    network.trace(Tracer(sink = index.feed))
+
+    index.distance(3, 17), index.holder(3), index.expected_message_cost()
+"""
+
+import bisect
+import numpy as np
+from Topology import check_tree, from_edges
+
+
+class PathIndex():
+    """
+    This class indexes the paths of a tree.
+
+    Attributes
+    ----------
+    ids : list
+        The ids of the nodes, the methods take and return ids.
+
+    root : int
+        The id of the node holding the token, or that an ASSIGN in flight carries it to.
+
+    rates : numpy.ndarray
+        The asking privilege rate of each node, in the order of ids, the weights of the
+        expected message cost.
+
+    n : int
+        The number of nodes.
+
+    Methods
+    -------
+    lca(), distance() :
+        The lowest common ancestor and the distance of two nodes.
+
+    next_hop(), holder() :
+        The neighbor of a node toward another one, toward the token.
+
+    subtree_size() :
+        The size of the subtree of a node, with the tree rooted at the token.
+
+    on_assign(), feed() :
+        Update the position of the token.
+
+    weighted_distances(), expected_message_cost() :
+        The costs of the requests, without simulating.
+    """
+
+    def __init__(self, parents, ids = None, rates = None):
+
+        n = self.n = len(parents)
+
+        staticRoot = check_tree(parents)
+
+        self.ids = list(range(n)) if ids is None else list(ids)
+
+        self.position = {nodeId : i for i, nodeId in enumerate(self.ids)}
+
+        self.parent = list(parents)
+
+        self.rates = np.ones(n) if rates is None else np.asarray(rates, dtype = np.float64)
+
+        children = [[] for _ in range(n)]
+
+        for i, parent in enumerate(parents) :
+
+            if parent >= 0 :
+
+                children[parent].append(i)
+
+        #Euler tour : a node is written when it is entered and after each of its children
+        depth = self.depth = [0] * n
+
+        size = self.size = [1] * n
+
+        tin = self.tin = [0] * n
+
+        euler = [staticRoot]
+
+        order = self.order = [staticRoot]
+
+        nextChild = [0] * n
+
+        stack = [staticRoot]
+
+        while stack :
+
+            u = stack[-1]
+
+            if nextChild[u] < len(children[u]) :
+
+                child = children[u][nextChild[u]]
+
+                nextChild[u] += 1
+
+                depth[child] = depth[u] + 1
+
+                tin[child] = len(euler)
+
+                euler.append(child)
+
+                order.append(child)
+
+                stack.append(child)
+
+            else :
+
+                stack.pop()
+
+                if stack :
+
+                    size[stack[-1]] += size[u]
+
+                    euler.append(stack[-1])
+
+        #children of each node by entry time, for the binary searches of next_hop
+        self.childStart = [0] * (n + 1)
+
+        for u in range(n) :
+
+            self.childStart[u + 1] = self.childStart[u] + len(children[u])
+
+        self.children = [child for u in range(n) for child in children[u]]
+
+        self.childTin = [tin[child] for child in self.children]
+
+        #sparse table : table[k][i] is the position in the tour of the shallowest node
+        #of the tour from i to i + 2 ** k - 1
+        self.euler = np.asarray(euler, dtype = np.int32)
+
+        eulerDepth = np.asarray(depth, dtype = np.int32)[self.euler]
+
+        self.eulerDepth = eulerDepth
+
+        table = [np.arange(len(euler), dtype = np.int32)]
+
+        half = 1
+
+        while 2 * half <= len(euler) :
+
+            previous = table[-1]
+
+            left, right = previous[:-half], previous[half:]
+
+            table.append(np.where(eulerDepth[left] <= eulerDepth[right], left, right))
+
+            half *= 2
+
+        self.table = table
+
+        self.token = staticRoot
+
+
+    @classmethod
+    def from_network(cls, network):
+        """
+        Extended description of function.
+
+        Builds the index of the tree of a network from the neighbors of its nodes, the token
+        being at the node that is its own holder.
+
+        Parameters
+        ----------
+        network : Network
+            The network.
+
+        Returns
+        -------
+        This function returns a PathIndex.
+
+        """
+        ids = list(network.nodes.keys())
+
+        nodes = [network.nodes[nodeId] for nodeId in ids]
+
+        root = next((node.id for node in nodes if node.holderId == node.id), ids[0])
+
+        edges = [(node.id, neighborId) for node in nodes for neighborId in node.neighborsId if node.id < neighborId]
+
+        parents = from_edges(edges, root, ids)[0] if edges else [-1]
+
+        return cls(parents, ids, [node.askingPrivRate for node in nodes])
+
+
+    @property
+    def root(self):
+
+        return self.ids[self.token]
+
+
+    def lca_position(self, u, v):
+
+        left, right = self.tin[u], self.tin[v]
+
+        if left > right :
+
+            left, right = right, left
+
+        k = (right - left + 1).bit_length() - 1
+
+        table = self.table[k]
+
+        i, j = table.item(left), table.item(right - (1 << k) + 1)
+
+        eulerDepth = self.eulerDepth
+
+        return self.euler.item(i if eulerDepth.item(i) <= eulerDepth.item(j) else j)
+
+
+    def lca(self, u, v):
+        """
+        Extended description of function.
+
+        The lowest common ancestor of two nodes, in the tree rooted at the initial holder
+        of the token, in O(1).
+
+        Parameters
+        ----------
+        u, v : int
+            The ids of the nodes.
+
+        Returns
+        -------
+        This function returns the id of the ancestor.
+
+        """
+        return self.ids[self.lca_position(self.position[u], self.position[v])]
+
+
+    def distance(self, u, v):
+        """
+        Extended description of function.
+
+        The number of edges between two nodes, the number of hops of a message from one
+        to the other, in O(1).
+
+        Parameters
+        ----------
+        u, v : int
+            The ids of the nodes.
+
+        Returns
+        -------
+        This function returns an int.
+
+        """
+        u, v = self.position[u], self.position[v]
+
+        depth = self.depth
+
+        return depth[u] + depth[v] - 2 * depth[self.lca_position(u, v)]
+
+
+    def contains(self, u, v):
+
+        #v is in the subtree of u, in the tree rooted at the initial holder
+        return self.tin[u] <= self.tin[v] < self.tin[u] + 2 * self.size[u] - 1
+
+
+    def child_toward(self, u, v):
+
+        #the child of u whose subtree contains v
+        k = bisect.bisect_right(self.childTin, self.tin[v], self.childStart[u], self.childStart[u + 1]) - 1
+
+        return self.children[k]
+
+
+    def next_hop_position(self, u, target):
+
+        if u == target :
+
+            return u
+
+        if self.contains(u, target) :
+
+            return self.child_toward(u, target)
+
+        return self.parent[u]
+
+
+    def next_hop(self, u, target):
+        """
+        Extended description of function.
+
+        The neighbor of a node on the path toward another one, with a binary search among
+        the children of the node.
+
+        Parameters
+        ----------
+        u : int
+            The id of the node.
+
+        target : int
+            The id of the destination.
+
+        Returns
+        -------
+        This function returns the id of the neighbor, u itself if it is the destination.
+
+        """
+        return self.ids[self.next_hop_position(self.position[u], self.position[target])]
+
+
+    def holder(self, u):
+        """
+        Extended description of function.
+
+        The holder of a node : the next hop toward the token, the node itself if it holds
+        the token.
+
+        """
+        return self.ids[self.next_hop_position(self.position[u], self.token)]
+
+
+    def subtree_size(self, u):
+        """
+        Extended description of function.
+
+        The number of nodes of the subtree of a node, in the tree rooted at the token : the
+        nodes whose path toward the token goes through the node.
+
+        Parameters
+        ----------
+        u : int
+            The id of the node.
+
+        Returns
+        -------
+        This function returns an int.
+
+        """
+        u = self.position[u]
+
+        if u == self.token :
+
+            return self.n
+
+        if self.contains(u, self.token) :
+
+            return self.n - self.size[self.child_toward(u, self.token)]
+
+        return self.size[u]
+
+
+    def on_assign(self, sender, receiver):
+        """
+        Extended description of function.
+
+        The token goes from a node to its neighbor with an ASSIGN, the edge between them
+        is reversed. The holders of all the other nodes are unchanged, so the index only
+        moves the token.
+
+        Parameters
+        ----------
+        sender, receiver : int
+            The ids of the nodes.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        self.token = self.position[receiver]
+
+
+    def feed(self, event):
+        """
+        Extended description of function.
+
+        Follows the token in the events of a trace, see Tracer : the ASSIGN messages sent
+        and the recoveries regenerating the token. It can be the sink of a tracer.
+
+        Parameters
+        ----------
+        event : tuple
+            The event (time, kind, node, peer, msgType, cause).
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        _, kind, node, peer, msgType, _ = event
+
+        if kind == 'send' and msgType == 'A' :
+
+            self.on_assign(node, peer)
+
+        elif kind == 'recover' and peer == node :
+
+            self.token = self.position[node]
+
+
+    def subtree_weights(self, weights):
+
+        #total weight of the subtree of each node, in the tree rooted at the initial holder
+        subtree = np.array(weights, dtype = np.float64)
+
+        parent = self.parent
+
+        for u in reversed(self.order[1:]) :
+
+            subtree[parent[u]] += subtree[u]
+
+        return subtree
+
+
+    def weighted_distances(self, weights = None):
+        """
+        Extended description of function.
+
+        The sum of the distances from each node to all the nodes, weighted, in O(n) : from
+        the root, moving to a child c brings the weight of its subtree one hop closer and
+        the rest one hop further.
+
+        Parameters
+        ----------
+        weights : sequence of float
+            The weight of each node in the order of ids, the rates by default.
+
+        Returns
+        -------
+        This function returns a numpy.ndarray, in the order of ids.
+
+        """
+        weights = self.rates if weights is None else np.asarray(weights, dtype = np.float64)
+
+        subtree = self.subtree_weights(weights)
+
+        total = subtree[self.order[0]]
+
+        distances = np.empty(self.n)
+
+        distances[self.order[0]] = float(np.dot(weights, self.depth))
+
+        parent = self.parent
+
+        for u in self.order[1:] :
+
+            distances[u] = distances[parent[u]] + total - 2 * subtree[u]
+
+        return distances
+
+
+    def expected_message_cost(self, rates = None):
+        """
+        Extended description of function.
+
+        The expected number of messages by privilege request, without simulating. At low
+        load the token waits at the last node served, so the requester and the holder
+        are independent nodes drawn in proportion to their rates, and a request costs a
+        REQUEST and an ASSIGN on every edge of the path between them. An edge whose side
+        has a fraction P of the rate is on the path with probability 2 P (1 - P), so the
+        cost is the sum of 4 P (1 - P) over the edges. Under contention the requests are
+        merged on the way and the cost is lower.
+
+        Parameters
+        ----------
+        rates : sequence of float
+            The asking privilege rate of each node in the order of ids, the rates of the
+            index by default.
+
+        Returns
+        -------
+        This function returns a float.
+
+        """
+        rates = self.rates if rates is None else np.asarray(rates, dtype = np.float64)
+
+        subtree = self.subtree_weights(rates)
+
+        fraction = np.delete(subtree, self.order[0]) / subtree[self.order[0]]
+
+        return float(4 * np.sum(fraction * (1 - fraction)))
@@ -0,0 +1,703 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:03:26 2026
+
+Policies of the request queues : the order a node holding the privilege serves the
+entries of its queue, its own requests and those of its neighbors. Raymond's algorithm
+serves them first in first out, but any order keeps the mutual exclusion, the token stays
+unique. A policy is given to all the nodes of a network, once the tree is built :
+
+    network.set_policy(Aging({0 : 0, 5 : 0}, interval = .1))
+
+    network.set_policy(HoldAndServe(window = .002, burst = 4))
+
+    Fifo() : the order of arrival, as Raymond's algorithm.
+
+    Priority(classes, patience) : the entries of the lowest class first. An entry of a
+    neighbor stands for the requests of the nodes behind it, its class is the lowest class
+    of these nodes, a request message does not carry the class of the node that asked.
+    After patience entries served in a row ahead of the oldest one, the oldest is served.
+    The bound holds at every node on the way of a request, so the wait is bounded but
+    multiplied at each hop : under saturation on random:200 a few nodes wait more than
+    30 s, whatever the patience from 1 to 8. Without patience (None) the priority is
+    strict, the entries of a higher class starve whenever the lower classes keep asking.
+
+    Aging(classes, interval) : Priority, but an entry gains a class every interval seconds
+    it waits, so no entry starves.
+
+Fifo, Sweep and HoldAndServe serve the entries in bounded turns and Aging bounds the wait
+in time : they never starve a node. Priority only bounds the wait loosely, and compare
+reports the nodes never served in a run.
+
+    Sweep() : the node serves itself and its neighbors in turn, in a fixed circular order
+    starting after the neighbor it sent the privilege to last, the privilege goes around
+    the tree as in a depth first tour, each edge is crossed twice by tour.
+
+    HoldAndServe(window, burst) : after the critical section, instead of sending the
+    privilege away to the requests queued, the node holds it up to window seconds and
+    serves first the next request, its own or one coming from a neighbor not queued yet,
+    a direction other than the queued ones. The node serves its own requests first too,
+    and at most burst requests are served in a row ahead of the requests queued. A
+    request served before the privilege leaves saves the round trip of the privilege
+    between the node and the requests queued, their ASSIGN and REQUEST messages, and the
+    requests queued wait longer.
+
+Under saturation every node asks again as soon as it leaves the critical section and the
+throughput is bound by the hops of the privilege between the grants :
+
+    network.set_saturation()
+
+The policies are compared on a tree, under saturation or with the activity rate given,
+with :
+
+    python Policy.py [topology] [duration] [activityRate]
+"""
+
+import math
+import sys
+import time
+from Metrics import jain_fairness
+from Simulator import Simulator
+from Workload import Constant
+
+
+class RequestQueue():
+    """
+    The request queue of a node served in the order of a policy, with the operations of the
+    deque used by RaymondNode : popleft pops the entry the policy chooses, and the first
+    entry is the one it would choose.
+
+    Attributes
+    ----------
+    policy : Policy
+        The policy of the queue.
+
+    node : RaymondNode
+        The node of the queue.
+
+    entries, times : list
+        The entries in the order of arrival and their time of arrival.
+
+    cursor : int
+        The position of the last entry served in the circular order of Sweep.
+
+    burst : int
+        The number of requests served in a row ahead of older ones, see Priority and
+        HoldAndServe.
+
+    held : int
+        The number of entries queued when the node started to hold the privilege.
+    """
+    __slots__ = ('policy', 'node', 'entries', 'times', 'cursor', 'burst', 'held')
+
+    def __init__(self, policy, node):
+
+        self.policy = policy
+
+        self.node = node
+
+        self.entries = []
+
+        self.times = []
+
+        self.cursor = 0
+
+        self.burst = 0
+
+        self.held = 0
+
+    def append(self, value):
+
+        self.entries.append(value)
+
+        self.times.append(self.node.metrics.clock())
+
+    def popleft(self):
+
+        if not self.entries :
+
+            raise IndexError('pop from an empty request queue')
+
+        index = self.policy.select(self)
+
+        del self.times[index]
+
+        value = self.entries.pop(index)
+
+        self.policy.served(self, value, index)
+
+        return value
+
+    def clear(self):
+
+        self.entries.clear()
+
+        self.times.clear()
+
+    def __contains__(self, value):
+
+        return value in self.entries
+
+    def __len__(self):
+
+        return len(self.entries)
+
+    def __bool__(self):
+
+        return bool(self.entries)
+
+    def __iter__(self):
+
+        return iter(self.entries)
+
+    def __getitem__(self, k):
+
+        if k == 0 and self.entries :
+
+            return self.entries[self.policy.select(self)]
+
+        return self.entries[k]
+
+
+class Policy():
+    """
+    This class is the interface of the policies, see the module. The entry of least key
+    is served first, the entries of equal keys in the order of arrival.
+
+    Methods
+    -------
+    start() :
+        Prepares the policy for the nodes of a network.
+
+    queue() :
+        Builds the request queue of a node.
+
+    key() :
+        The key of an entry of a queue.
+
+    hold() :
+        The time a node holds the privilege after the critical section.
+
+    ready() :
+        Whether a node holding the privilege serves its queue.
+    """
+
+    def start(self, network):
+
+        pass
+
+
+    def queue(self, node):
+
+        return RequestQueue(self, node)
+
+
+    def key(self, queue, index):
+        """
+        Extended description of function.
+
+        The key of an entry, the entry of least key is served first.
+
+        Parameters
+        ----------
+        queue : RequestQueue
+            The queue.
+
+        index : int
+            The position of the entry in queue.entries.
+
+        Returns
+        -------
+        This function returns a value comparable with the keys of the other entries.
+
+        """
+        raise NotImplementedError
+
+
+    def select(self, queue):
+
+        #min returns the first of the least keys, the oldest entry
+        return min(range(len(queue.entries)), key = lambda index : self.key(queue, index))
+
+
+    def served(self, queue, value, index):
+
+        pass
+
+
+    def hold(self, node):
+        """
+        Extended description of function.
+
+        The time the node holds the privilege after the critical section, waiting for its
+        own next request, when the privilege would leave it (see leave_critical_section).
+
+        Parameters
+        ----------
+        node : RaymondNode
+            The node.
+
+        Returns
+        -------
+        This function returns the time in seconds, 0 to pass the privilege on at once.
+
+        """
+        return 0.
+
+
+    def ready(self, node):
+
+        return True
+
+
+class Fifo(Policy):
+    """
+    The entries are served in the order of arrival.
+    """
+
+    def select(self, queue):
+
+        return 0
+
+
+    def __repr__(self):
+
+        return 'Fifo()'
+
+
+class Priority(Policy):
+    """
+    The entries of the lowest class are served first.
+
+    Attributes
+    ----------
+    classes : dict
+        The class of the nodes by id, the lower the sooner served.
+
+    default : int
+        The class of the nodes not in classes.
+
+    patience : int
+        The largest number of entries served in a row ahead of the oldest entry, None for
+        no bound.
+
+    best : dict
+        The class of the entries, the lowest class of the nodes behind each neighbor of
+        each node, by (node id, neighbor id).
+    """
+
+    def __init__(self, classes, default = 1, patience = 4):
+
+        self.classes = classes
+
+        self.default = default
+
+        self.patience = patience
+
+        self.best = {}
+
+
+    def start(self, network):
+
+        self.best = direction_classes(network.nodes, lambda nodeId : self.classes.get(nodeId, self.default))
+
+
+    def entry_class(self, queue, index):
+
+        entry = queue.entries[index]
+
+        nodeId = queue.node.id
+
+        if entry == nodeId :
+
+            return self.classes.get(nodeId, self.default)
+
+        return self.best.get((nodeId, entry), self.default)
+
+
+    def key(self, queue, index):
+
+        return self.entry_class(queue, index)
+
+
+    def select(self, queue):
+
+        if self.patience is not None and queue.burst >= self.patience :
+
+            #the oldest entry waited long enough
+            return 0
+
+        return Policy.select(self, queue)
+
+
+    def served(self, queue, value, index):
+
+        queue.burst = queue.burst + 1 if index and queue.entries else 0
+
+
+    def __repr__(self):
+
+        return 'Priority(%d classes, patience = %r)' % (len(set(self.classes.values()) | {self.default}), self.patience)
+
+
+class Aging(Priority):
+    """
+    The entries of the lowest class are served first, and the class of an entry decreases
+    by one every interval seconds it waits.
+
+    Attributes
+    ----------
+    See Priority.
+
+    interval : float
+        The time in seconds an entry waits to gain a class.
+    """
+
+    def __init__(self, classes, interval, default = 1, patience = None):
+
+        Priority.__init__(self, classes, default, patience)
+
+        self.interval = interval
+
+
+    def key(self, queue, index):
+
+        return self.entry_class(queue, index) - (queue.node.metrics.clock() - queue.times[index]) / self.interval
+
+
+    def select(self, queue):
+
+        if self.patience is not None and queue.burst >= self.patience :
+
+            return 0
+
+        #the clock is read once for all the entries
+        now = queue.node.metrics.clock()
+
+        times = queue.times
+
+        return min(range(len(queue.entries)), key = lambda index : self.entry_class(queue, index) - (now - times[index]) / self.interval)
+
+
+    def __repr__(self):
+
+        return 'Aging(%d classes, interval = %r)' % (len(set(self.classes.values()) | {self.default}), self.interval)
+
+
+class Sweep(Policy):
+    """
+    The node serves itself and its neighbors in turn : the positions of the circular order
+    are the node, then its neighbors in the order of neighborsId, and the entry served is
+    the first one after the position of the last entry served. The privilege sent to a
+    neighbor comes back from it, so the privilege goes around the tree in a depth first
+    tour, and an entry waits for at most one turn of its node.
+    """
+
+    def position(self, queue, entry):
+
+        node = queue.node
+
+        return 0 if entry == node.id else node.neighborsId.index(entry) + 1
+
+
+    def key(self, queue, index):
+
+        return (self.position(queue, queue.entries[index]) - queue.cursor - 1) % (len(queue.node.neighborsId) + 1)
+
+
+    def served(self, queue, value, index):
+
+        queue.cursor = self.position(queue, value)
+
+
+    def __repr__(self):
+
+        return 'Sweep()'
+
+
+class HoldAndServe(Policy):
+    """
+    After the critical section, if the privilege would leave the node and the burst is not
+    over, the node holds it window seconds, until an entry is queued : it is served before
+    the entries queued before the hold. Otherwise the node serves its own entry first while
+    the burst is not over, and the other entries in the order of arrival. The burst counts
+    the entries served in a row ahead of older ones.
+
+    Attributes
+    ----------
+    window : float
+        The longest time in seconds the node holds the privilege.
+
+    burst : int
+        The largest number of entries served in a row ahead of older ones.
+    """
+
+    def __init__(self, window, burst = 4):
+
+        self.window = window
+
+        self.burst = burst
+
+
+    def select(self, queue):
+
+        entries = queue.entries
+
+        nodeId = queue.node.id
+
+        if queue.node.holding :
+
+            #the entries queued during the hold, the node first
+            return entries.index(nodeId) if nodeId in entries[queue.held:] else queue.held
+
+        if nodeId not in entries :
+
+            return 0
+
+        index = entries.index(nodeId)
+
+        if queue.burst < self.burst or len(entries) == 1 :
+
+            return index
+
+        #the burst is over, the oldest other entry is served
+        return 1 if index == 0 else 0
+
+
+    def served(self, queue, value, index):
+
+        #the node and the entries of a hold go ahead of the older entries
+        ahead = value == queue.node.id or queue.node.holding
+
+        queue.burst = queue.burst + 1 if ahead and queue.entries else 0
+
+
+    def hold(self, node):
+
+        queue = node.requestQ
+
+        if queue.burst >= self.burst :
+
+            return 0.
+
+        queue.held = len(queue.entries)
+
+        return self.window
+
+
+    def ready(self, node):
+
+        queue = node.requestQ
+
+        return len(queue.entries) > queue.held
+
+
+    def __repr__(self):
+
+        return 'HoldAndServe(window = %r, burst = %d)' % (self.window, self.burst)
+
+
+def direction_classes(nodes, classOf):
+    """
+    Extended description of function.
+
+    Computes for each node and each of its neighbors the lowest class of the nodes behind
+    the neighbor, in two passes over the tree.
+
+    Parameters
+    ----------
+    nodes : dict
+        The nodes of a network by id.
+
+    classOf : callable
+        The class of a node id.
+
+    Returns
+    -------
+    This function returns a dict of the classes by (node id, neighbor id).
+
+    """
+    best = {}
+
+    parent = {}
+
+    for root in nodes :
+
+        if root in parent :
+
+            continue
+
+        parent[root] = None
+
+        order = [root]
+
+        for nodeId in order :
+
+            for neighborId in nodes[nodeId].neighborsId :
+
+                if neighborId not in parent :
+
+                    parent[neighborId] = nodeId
+
+                    order.append(neighborId)
+
+        #lowest class of the subtree of each node
+        down = {}
+
+        for nodeId in reversed(order) :
+
+            down[nodeId] = min([classOf(nodeId)] + [down[childId] for childId in nodes[nodeId].neighborsId if parent.get(childId) == nodeId])
+
+        #lowest class outside the subtree of each node
+        up = {root : math.inf}
+
+        for nodeId in order :
+
+            children = [childId for childId in nodes[nodeId].neighborsId if parent.get(childId) == nodeId]
+
+            if parent[nodeId] is not None :
+
+                best[(nodeId, parent[nodeId])] = up[nodeId]
+
+            #the two lowest subtrees, a child sees the lowest one of its siblings
+            lowest = sorted((down[childId], childId) for childId in children)[:2]
+
+            for childId in children :
+
+                best[(nodeId, childId)] = down[childId]
+
+                siblings = [value for value, siblingId in lowest if siblingId != childId]
+
+                up[childId] = min([classOf(nodeId), up[nodeId]] + siblings[:1])
+
+    return best
+
+
+def compare(parents, policies, duration = 60., latency = 1e-3, service = 1e-3, seed = 1, activityRate = None):
+    """
+    Extended description of function.
+
+    Simulates the tree with each policy, under saturation or with an activity rate.
+
+    Parameters
+    ----------
+    parents : list
+        The parent array of the tree.
+
+    policies : dict
+        The policies by name, a None policy is Raymond's queue.
+
+    duration : float
+        The simulated duration in seconds.
+
+    latency, service : float
+        The latency of the messages and the service time in seconds.
+
+    seed : int
+        The seed of the simulations.
+
+    activityRate : float
+        The activity rate of the nodes, None for saturation.
+
+    Returns
+    -------
+    This function returns a list of rows (name, RunResult, measures), the measures are
+    the throughput (grants by second), the messages, the hops (ASSIGN messages) and the
+    traffic (ASSIGN and REQUEST messages) by grant, the Jain fairness of the grants of the
+    nodes, the lowest number of grants of a node, the number of nodes never granted (the
+    starved nodes, if they asked) and the wall time of the simulation.
+
+    """
+    rows = []
+
+    for name, policy in policies.items() :
+
+        #a high rate makes all the nodes ask at the start, saturation does the rest
+        simulator = Simulator(0., 1e3 if activityRate is None else activityRate, latency = latency, seed = seed)
+
+        simulator.addTree(parents)
+
+        simulator.set_workload(Constant(service))
+
+        simulator.set_saturation(activityRate is None)
+
+        if policy is not None :
+
+            simulator.set_policy(policy)
+
+        begin = time.perf_counter()
+
+        result = simulator.run(duration)
+
+        wallTime = time.perf_counter() - begin
+
+        grants = [result.snapshot['grantsByNode'].get(nodeId, 0) for nodeId in simulator.nodes]
+
+        byType = result.snapshot['byType']
+
+        rows.append((name, result, {'throughput' : result.grants / result.elapsed,
+                                    'messages' : result.messages / result.grants,
+                                    'hops' : byType['ASSIGN'] / result.grants,
+                                    'traffic' : (byType['ASSIGN'] + byType['REQUEST']) / result.grants,
+                                    'fairness' : jain_fairness(grants), 'least' : min(grants),
+                                    'starved' : grants.count(0), 'wallTime' : wallTime}))
+
+    return rows
+
+
+def report(rows):
+    """
+    Extended description of function.
+
+    Formats the rows of compare as a table, the reduction of the ASSIGN and REQUEST
+    traffic by grant is relative to the first row. The policies leaving nodes without any
+    grant are flagged STARVED.
+
+    Returns
+    -------
+    This function returns the report as a str.
+
+    """
+    lines = ['%-10s %10s %10s %7s %10s %10s %9s %7s %12s %12s' % ('policy', 'grants/s', 'msg/grant', 'hops', 'A+R/grant', 'reduction',
+                                                                 'fairness', 'least', 'latency p50', 'latency p99')]
+
+    starved = []
+
+    reference = rows[0][2]['traffic'] if rows else None
+
+    for name, result, measures in rows :
+
+        lines.append('%-10s %10.1f %10.3f %7.3f %10.3f %9.1f%% %9.4f %7d %12.4f %12.4f' % (
+            name, measures['throughput'], measures['messages'], measures['hops'], measures['traffic'],
+            100 * (1 - measures['traffic'] / reference), measures['fairness'], measures['least'],
+            result.latency.quantile(.5) or 0., result.latency.quantile(.99) or 0.))
+
+        if measures['starved'] :
+
+            lines[-1] += '  STARVED'
+
+            starved.append('%s : %d nodes' % (name, measures['starved']))
+
+    if starved :
+
+        lines.append('never granted : ' + ', '.join(starved))
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__' :
+
+    from BatchRunner import build_tree
+
+    parents, _ = build_tree(sys.argv[1] if len(sys.argv) > 1 else 'random:200', 1)
+
+    #a node out of 8 has the high class
+    classes = {nodeId : 0 for nodeId in range(0, len(parents), 8)}
+
+    #the hold policies are named window in milliseconds / burst
+    policies = {'fifo' : None, 'priority' : Priority(classes), 'strict' : Priority(classes, patience = None),
+                'aging' : Aging(classes, .25), 'sweep' : Sweep(),
+                'hold 1/4' : HoldAndServe(.001, 4), 'hold 1/16' : HoldAndServe(.001, 16), 'hold 5/4' : HoldAndServe(.005, 4)}
+
+    print(report(compare(parents, policies, float(sys.argv[2]) if len(sys.argv) > 2 else 60.,
+                         activityRate = float(sys.argv[3]) if len(sys.argv) > 3 else None)))
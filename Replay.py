@@ -0,0 +1,683 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 08:41:05 2026
+
+Record and replay of the runs of the threaded network. A run depends on the thread
+scheduling, the order of the deliveries and the random draws, none of which repeats : a
+Recorder logs them, and Replay runs the state machines of the nodes again from the log,
+on a single thread and without waiting, so that a slow or faulty run is studied offline.
+
+    recorder = Recorder()
+
+    network.record(recorder)
+
+    network.run(60)
+
+    recorder.save('run.jsonl.gz')
+
+    python Replay.py run.jsonl.gz [maxWait]
+
+replays the run with the invariant checker (see Checker), prints its result and the
+divergences, if any. Replays are profiled with python -m cProfile Replay.py run.jsonl.gz.
+
+The recorder logs the inputs of the nodes in the order they are handled : the messages and
+batches received, the expirations of the timers of the node (think, end of the critical
+section, end of the downtime, advise timeout, end of a hold), the failures and the end of the run. They
+are logged under the lock of the node (canWork) before the node handles them, so a message
+is logged after the input that made its sender send it, and replaying the log in order
+respects the causality. The random draws (think, service and down times) are logged by node
+and kind. An event is (time, node, kind, arguments...), the time in seconds since the start
+of the recording.
+
+The replay checks that each message received was sent before, and that the nodes draw the
+random values recorded : a difference is a divergence, the replayed run is not the recorded
+one, because of a change of the algorithm or a damaged log.
+"""
+
+from collections import deque
+import gzip
+import json
+import sys
+import threading
+import time
+from Metrics import Metrics
+from Network import RunResult
+from Node import RaymondNode, Ressource
+from Simulator import Flag, NOLOCK
+
+
+class Recorder():
+    """
+    This class records the inputs of the nodes of a network, see Network.record.
+
+    Attributes
+    ----------
+    nodes : list
+        The initial state of the nodes (id, holderId, askingPrivRate, neighborsId).
+
+    saturated : bool
+        The nodes of the network ask again as soon as they leave the critical section.
+
+    events : list
+        The events (time, node, kind, arguments...) in the order they were handled.
+
+    clock : callable
+        The clock of the network.
+
+    Methods
+    -------
+    record() :
+        Records an input of a node.
+
+    draw() :
+        Records a random draw of a node.
+
+    save() :
+        Writes the recording to a file.
+    """
+
+    def __init__(self):
+
+        self.nodes = []
+
+        self.saturated = False
+
+        self.events = []
+
+        self.clock = time.monotonic
+
+        self.begin = 0.
+
+        self.lock = threading.Lock()
+
+
+    def start(self, network):
+
+        self.clock = network.clock
+
+        self.begin = self.clock()
+
+        self.nodes = [(node.id, node.holderId, node.askingPrivRate, list(node.neighborsId)) for node in network.nodes.values()]
+
+        self.saturated = network.saturated
+
+
+    def record(self, node, kind, *args):
+
+        with self.lock :
+
+            self.events.append((self.clock() - self.begin, node, kind) + args)
+
+
+    def draw(self, node, kind, value):
+
+        with self.lock :
+
+            self.events.append((self.clock() - self.begin, node, 'R', kind, value))
+
+
+    def save(self, path):
+        """
+        Extended description of function.
+
+        Writes the recording to a JSON lines file, gzipped if the path ends with .gz : the
+        nodes on the first line, then an event by line.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        This function returns the number of events written.
+
+        """
+        with self.lock :
+
+            events = list(self.events)
+
+        with (gzip.open(path, 'wt') if path.endswith('.gz') else open(path, 'w')) as recordFile :
+
+            recordFile.write(json.dumps({'nodes' : self.nodes, 'saturated' : self.saturated}) + '\n')
+
+            for event in events :
+
+                recordFile.write(json.dumps([round(event[0], 6)] + list(event[1:]), separators = (',', ':')) + '\n')
+
+        return len(events)
+
+
+def load(path):
+    """
+    Extended description of function.
+
+    Reads a recording written by Recorder.save.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    Returns
+    -------
+    This function returns a Recorder holding the recording.
+
+    """
+    recorder = Recorder()
+
+    with (gzip.open(path, 'rt') if path.endswith('.gz') else open(path)) as recordFile :
+
+        header = json.loads(recordFile.readline())
+
+        recorder.nodes = [tuple(node) for node in header['nodes']]
+
+        recorder.saturated = header.get('saturated', False)
+
+        for line in recordFile :
+
+            if not line.strip() :
+
+                continue
+
+            event = json.loads(line)
+
+            kind = event[2]
+
+            if kind == 'M' and event[5] is not None :
+
+                event[5] = tuple(event[5])
+
+            elif kind == 'B' :
+
+                event[3] = [(msgType, senderId, None if advice is None else tuple(advice)) for msgType, senderId, advice in event[3]]
+
+            recorder.events.append(tuple(event))
+
+    return recorder
+
+
+class ReplayNode(RaymondNode):
+    """
+    This class replays a node : its runtime hooks do what those of Node do, but its timers
+    are the events of the recording, and its random draws are the recorded ones.
+
+    Attributes
+    ----------
+    See RaymondNode.
+
+    replay : Replay
+        The replay the node belongs to.
+
+    draws : dict
+        The recorded draws of the node not replayed yet, by kind.
+
+    terminate : bool
+        The run is over, the node cuts its critical sections short.
+    """
+
+    def __init__(self, replay, id, holderId = None, askingPrivRate = .05):
+
+        RaymondNode.__init__(self, id, holderId, askingPrivRate, replay.metrics)
+
+        self.replay = replay
+
+        self.ressource = replay.ressource
+
+        self.inRecovery = Flag()
+
+        self.canWork = NOLOCK
+
+        self.draws = {}
+
+        self.terminate = False
+
+
+    def recorded_draw(self, kind):
+
+        draws = self.draws.get(kind)
+
+        if not draws :
+
+            self.replay.diverge(self.id, 'no recorded draw of kind ' + kind)
+
+            return 0.
+
+        return draws.popleft()
+
+
+    def next_time(self):
+
+        return self.recorded_draw('t')
+
+
+    def service_time(self):
+
+        return self.recorded_draw('s')
+
+
+    def down_time(self):
+
+        return self.recorded_draw('d')
+
+
+    def think(self):
+
+        if self.askingPrivRate > 0 :
+
+            self.next_time()
+
+
+    def wake(self):
+
+        self.ask()
+
+        self.next_time()
+
+
+    def ask(self):
+
+        if self.terminate :
+
+            return False
+
+        return RaymondNode.ask(self)
+
+
+    def enter_critical_section(self):
+
+        if self.terminate :
+
+            self.leave_critical_section()
+
+        else :
+
+            self.service_time()
+
+
+    def transmit(self, msgType, dest, advice):
+
+        self.replay.sent(self.id, dest, msgType, advice)
+
+
+    def fail(self):
+
+        if self.using :
+
+            self.ressource.release()
+
+        RaymondNode.fail(self)
+
+
+    def wait_restart(self):
+
+        self.down_time()
+
+
+    def wait_advise(self, delay):
+
+        pass
+
+
+    def wait_hold(self, delay, hold):
+
+        pass
+
+
+class Replay():
+    """
+    This class replays a recorded run, event by event in the recorded order and in the
+    recorded time, so the metrics, the usage of the ressource and the traces are those
+    of the run.
+
+    Attributes
+    ----------
+    nodes : dict
+        The replayed nodes by id.
+
+    events : list
+        The events of the recording, without the draws.
+
+    index : int
+        The number of events replayed.
+
+    now : float
+        The recorded time of the last event replayed.
+
+    metrics : Metrics
+        The metrics of the replay.
+
+    ressource : Ressource
+        The ressource of the replay.
+
+    divergences : list
+        The differences with the recording (index, node, description).
+
+    policy : Policy
+        The policy of the request queues of the recorded network, the policies are not
+        recorded, see Network.set_policy.
+
+    Methods
+    -------
+    trace() :
+        Traces the replay.
+
+    run() :
+        Replays the events.
+    """
+
+    def __init__(self, recording, policy = None):
+
+        self.now = 0.
+
+        self.index = 0
+
+        self.metrics = Metrics(clock = self.clock)
+
+        self.ressource = Ressource(self.clock)
+
+        self.divergences = []
+
+        #the messages sent and not received yet, by edge
+        self.inflight = {}
+
+        self.nodes = {}
+
+        for nodeId, holderId, askingPrivRate, neighborsId in recording.nodes :
+
+            node = self.nodes[nodeId] = ReplayNode(self, nodeId, holderId, askingPrivRate)
+
+            node.neighborsId = list(neighborsId)
+
+            node.saturated = recording.saturated
+
+        self.policy = policy
+
+        if policy is not None :
+
+            policy.start(self)
+
+            for node in self.nodes.values() :
+
+                node.policy = policy
+
+                node.requestQ = policy.queue(node)
+
+        self.events = []
+
+        for event in recording.events :
+
+            if event[2] == 'R' :
+
+                self.nodes[event[1]].draws.setdefault(event[3], deque()).append(event[4])
+
+            else :
+
+                self.events.append(event)
+
+        self.started = False
+
+
+    def clock(self):
+
+        return self.now
+
+
+    def trace(self, tracer):
+
+        tracer.clock = self.clock
+
+        for node in self.nodes.values() :
+
+            node.tracer = tracer
+
+
+    def diverge(self, node, description):
+
+        self.divergences.append((self.index, node, description))
+
+
+    def sent(self, sender, dest, msgType, advice):
+
+        self.inflight.setdefault((sender, dest), deque()).append((msgType, advice))
+
+
+    def received(self, node, msgType, sender, advice):
+
+        #the transports may reorder the messages of an edge, the first match is received
+        inflight = self.inflight.get((sender, node))
+
+        if inflight :
+
+            if inflight[0] == (msgType, advice) :
+
+                inflight.popleft()
+
+                return
+
+            for i, message in enumerate(inflight) :
+
+                if message == (msgType, advice) :
+
+                    del inflight[i]
+
+                    return
+
+        self.diverge(node, 'receives a %s message never sent by %s' % (msgType, sender))
+
+
+    def step(self):
+
+        event = self.events[self.index]
+
+        self.index += 1
+
+        #the clock of the threads may slightly disagree with the order of the log
+        if event[0] > self.now :
+
+            self.now = event[0]
+
+        node = self.nodes[event[1]]
+
+        kind = event[2]
+
+        try :
+
+            if kind == 'M' :
+
+                self.received(node.id, event[3], event[4], event[5])
+
+                node.on_message(event[3], event[4], event[5])
+
+            elif kind == 'B' :
+
+                for msgType, senderId, advice in event[3] :
+
+                    self.received(node.id, msgType, senderId, advice)
+
+                node.on_batch(event[3])
+
+            elif kind == 'W' :
+
+                node.wake()
+
+            elif kind == 'E' :
+
+                node.leave_critical_section()
+
+            elif kind == 'D' :
+
+                node.restart()
+
+            elif kind == 'T' :
+
+                node.advise_timeout()
+
+            elif kind == 'H' :
+
+                node.release_hold(event[3])
+
+            elif kind == 'F' :
+
+                node.fail()
+
+            elif kind == 'X' :
+
+                node.terminate = True
+
+        except Exception as error :
+
+            self.diverge(node.id, 'raises ' + repr(error))
+
+
+    def run(self, stop = None, until = None):
+        """
+        Extended description of function.
+
+        Replays the events until the end of the recording, the event of index stop, or
+        until(replay) returns True, it is checked after every event. A replay can be run
+        again to go on.
+
+        Parameters
+        ----------
+        stop : int
+            The index of the event the replay stops before.
+
+        until : callable
+            The replay stops once until(replay) returns True.
+
+        Returns
+        -------
+        This function returns a RunResult, its elapsed time is the recorded one.
+
+        """
+        if not self.started :
+
+            self.started = True
+
+            self.ressource.start()
+
+            #the nodes draw their first think time when they start, see Node.run
+            for node in self.nodes.values() :
+
+                node.think()
+
+        end = len(self.events) if stop is None else min(stop, len(self.events))
+
+        reason = 'end'
+
+        while self.index < end :
+
+            self.step()
+
+            if until is not None and until(self) :
+
+                reason = 'until'
+
+                break
+
+        else :
+
+            if self.index < len(self.events) :
+
+                reason = 'stop'
+
+        return RunResult(reason, self.now, self.metrics.snapshot(), self.ressource.usage())
+
+
+def bisect(recording, predicate, policy = None):
+    """
+    Extended description of function.
+
+    Finds the first event after which predicate(replay) is True, replaying the prefixes
+    of the recording from the start, for a predicate that stays True once it is : a
+    check too slow to run after every event, or that needs a fresh replay.
+
+    Parameters
+    ----------
+    recording : Recorder
+        The recording.
+
+    predicate : callable
+        Called with a replay of a prefix of the events.
+
+    policy : Policy
+        The policy of the request queues of the recorded network.
+
+    Returns
+    -------
+    This function returns the number of events of the shortest prefix for which the
+    predicate holds, None if it does not hold for the whole recording.
+
+    """
+    replay = Replay(recording, policy)
+
+    low, high = 0, len(replay.events)
+
+    replay.run()
+
+    if not predicate(replay) :
+
+        return None
+
+    while low < high :
+
+        middle = (low + high) // 2
+
+        replay = Replay(recording, policy)
+
+        replay.run(stop = middle)
+
+        if predicate(replay) :
+
+            high = middle
+
+        else :
+
+            low = middle + 1
+
+    return low
+
+
+if __name__ == '__main__' :
+
+    from Checker import Checker
+    from Trace import Tracer
+
+    if len(sys.argv) < 2 :
+
+        print('usage : python Replay.py recording.jsonl[.gz] [maxWait]')
+
+        sys.exit(1)
+
+    recording = load(sys.argv[1])
+
+    replay = Replay(recording)
+
+    roots = [nodeId for nodeId, holderId, _, _ in recording.nodes if holderId == nodeId]
+
+    checker = Checker(float(sys.argv[2]) if len(sys.argv) > 2 else None, roots[0] if len(roots) == 1 else None)
+
+    replay.trace(Tracer(capacity = 1, sink = checker.feed))
+
+    begin = time.perf_counter()
+
+    result = replay.run()
+
+    elapsed = time.perf_counter() - begin
+
+    print(result)
+
+    print(len(replay.events), 'events replayed in %.3f s, %.0f times faster than the run' % (elapsed, result.elapsed / elapsed if elapsed else 0.))
+
+    print(len(replay.divergences), 'divergences,', len(checker.finish()), 'violations')
+
+    for index, node, description in replay.divergences[:20] :
+
+        print('    event', index, 'node', node, ':', description)
+
+    for violation in checker.violations[:20] :
+
+        print('   ', *violation)
+
+    sys.exit(1 if replay.divergences or checker.violations else 0)
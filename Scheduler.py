@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:05:31 2026
+
+Schedulers of the timed events of a network : the think timers of the nodes, the ends of
+the critical sections and downtimes, and the failure injections. Events are kept in a heap
+ordered by due time, the scheduler sleeps until the first one is due instead of polling.
+
+Scheduler runs in virtual time, for the simulators : time jumps from an event to the next
+one. RealTimeScheduler runs in wall clock time, for the threaded network : any thread can
+schedule events, they are executed by the thread running the scheduler.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+
+class Scheduler():
+    """
+    This class is a heap scheduler in virtual time.
+
+    Attributes
+    ----------
+    now : float
+        The current virtual time in seconds.
+
+    events : list
+        The heap of scheduled events (time, sequence, action, arguments).
+
+    stopped : bool
+        Set by stop() to end the runs.
+
+    Methods
+    -------
+    schedule() :
+        Schedules an action.
+
+    run() :
+        Executes the events until a given time.
+
+    stop() :
+        Stops the current run.
+    """
+
+    def __init__(self):
+
+        self.now = 0.
+
+        self.events = []
+
+        self.sequence = itertools.count()
+
+        self.stopped = False
+
+
+    def clock(self):
+
+        return self.now
+
+
+    def schedule(self, delay, action, *args):
+        """
+        Extended description of function.
+
+        Schedules action(*args) delay seconds from now. Events scheduled at the same time
+        are executed in the order they were scheduled.
+
+        Parameters
+        ----------
+        delay : float
+            The delay in seconds.
+
+        action : callable
+            The action to execute.
+
+        args :
+            The arguments of the action.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        heapq.heappush(self.events, (self.now + delay, next(self.sequence), action, args))
+
+
+    def run(self, end = None, check = None, interval = None):
+        """
+        Extended description of function.
+
+        Executes the events in the order of their time, until the time end, stop() or a
+        check returning a reason to stop.
+
+        Parameters
+        ----------
+        end : float
+            The time the run ends, None to run until there is no more event.
+
+        check : callable
+            Returns the reason to stop, None to go on. In virtual time it is called after
+            every event, in real time every interval seconds.
+
+        interval : float
+            Time in seconds between two checks, in real time only.
+
+        Returns
+        -------
+        This function returns 'duration' if the time end is reached, 'stop' if stop() was
+        called, before or during the run, or the reason returned by check. A stop ends one
+        run only.
+
+        """
+        events = self.events
+
+        pop = heapq.heappop
+
+        end = float('inf') if end is None else end
+
+        if check is None :
+
+            while events and events[0][0] <= end and not self.stopped :
+
+                self.now, _, action, args = pop(events)
+
+                action(*args)
+
+        else :
+
+            while events and events[0][0] <= end and not self.stopped :
+
+                self.now, _, action, args = pop(events)
+
+                action(*args)
+
+                reason = check()
+
+                if reason is not None :
+
+                    return reason
+
+        if self.stopped :
+
+            #the stop is consumed, the next run goes on
+            self.stopped = False
+
+            return 'stop'
+
+        if end != float('inf') :
+
+            self.now = end
+
+        return 'duration'
+
+
+    def stop(self):
+
+        self.stopped = True
+
+
+class RealTimeScheduler(Scheduler):
+    """
+    This class is a heap scheduler in wall clock time. Events can be scheduled from any
+    thread, the thread running the scheduler sleeps until the first event is due, or until
+    an earlier event is scheduled.
+
+    Attributes
+    ----------
+    See Scheduler, the times are time.monotonic times.
+
+    condition : threading.Condition
+        Protects the heap and wakes the running thread up.
+    """
+
+    def __init__(self):
+
+        Scheduler.__init__(self)
+
+        self.condition = threading.Condition()
+
+
+    def clock(self):
+
+        return time.monotonic()
+
+
+    def schedule(self, delay, action, *args):
+
+        with self.condition :
+
+            event = (time.monotonic() + delay, next(self.sequence), action, args)
+
+            heapq.heappush(self.events, event)
+
+            if self.events[0] is event :
+
+                #the running thread sleeps until a later time
+                self.condition.notify()
+
+
+    def next_event(self, end, nextCheck):
+
+        #pops the first event if it is due, or sleeps until it is, the end or the next check
+        with self.condition :
+
+            while not self.stopped :
+
+                now = time.monotonic()
+
+                events = self.events
+
+                if events and events[0][0] <= now :
+
+                    return heapq.heappop(events)
+
+                wakeup = min(events[0][0] if events else end, end, nextCheck)
+
+                if wakeup <= now :
+
+                    return None
+
+                self.condition.wait(None if wakeup == float('inf') else wakeup - now)
+
+            return None
+
+
+    def run(self, end = None, check = None, interval = None):
+
+        end = float('inf') if end is None else end
+
+        nextCheck = float('inf') if check is None else time.monotonic() + interval
+
+        while True :
+
+            event = self.next_event(end, nextCheck)
+
+            if event is not None :
+
+                _, _, action, args = event
+
+                action(*args)
+
+                continue
+
+            if self.stopped :
+
+                #the stop is consumed, the next run goes on
+                self.stopped = False
+
+                return 'stop'
+
+            now = time.monotonic()
+
+            if now >= end :
+
+                return 'duration'
+
+            if now >= nextCheck :
+
+                reason = check()
+
+                if reason is not None :
+
+                    return reason
+
+                nextCheck = now + interval
+
+
+    def expedite(self):
+        """
+        Extended description of function.
+
+        Executes all the scheduled events at once, whatever their time, to end the timers
+        of a network shutting down.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns the number of events executed.
+
+        """
+        with self.condition :
+
+            events = sorted(self.events)
+
+            self.events = []
+
+        for _, _, action, args in events :
+
+            action(*args)
+
+        return len(events)
+
+
+    def stop(self):
+
+        with self.condition :
+
+            self.stopped = True
+
+            self.condition.notify()
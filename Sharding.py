@@ -0,0 +1,852 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:10:52 2026
+
+Simulation of a network over several processes. The tree is partitioned into shards, each
+simulated by a worker process with its own nodes, so a large tree is simulated on all the
+cores instead of one GIL :
+
+    network = ShardedNetwork(failureRate = 1e-3, activityRate = .05, shards = 8, seed = 1)
+
+    network.addTree(Topology.kary(100000, 4))
+
+    print(network.run(3600))
+
+The simulation is a conservative parallel discrete-event simulation. A message takes latency
+seconds to be delivered, and an event of a node d hops away from the other shards leads to a
+message to them d latencies later at the earliest (see boundary_distances), so the events of
+a shard bound the first time it can send to another shard. In a window the shards run in
+parallel, each until the first time a message of another shard can reach it : latency after
+the first sending time of the other shards, or two latencies after its own for its messages
+answered by another shard. Then they exchange the messages sent across the shards, delivered
+in a later window, so idle time is skipped. The messages go through the pipes (local sockets)
+between the workers and the network, which routes them.
+
+Every window costs a round trip through the pipes of all the workers, about 0.1 to 0.3 ms,
+that more cores do not reduce. A sharded run is only faster than a Simulator when a window
+holds more simulation work than that : with k cores, about k / (k - 1) times the cost of a
+window. Measured on one core, with a 1 ms latency :
+
+    kary(2000, 2), 10 ms critical sections, 300 s : 24716 windows for 2 shards, 57 us of
+    serial work by window for 1.4 s of windows, the Simulator is faster on any number of
+    cores.
+
+    kary(20000, 2), 1 ms critical sections, 60 s : 4961 windows for 2 shards, 320 us of
+    serial work by window for 220 us of window, 2 shards on 2 cores would take about 1.9 s
+    against 1.6 s for the Simulator.
+
+The run time does not scale linearly with the cores : the fewer windows a run needs (long
+distances to the cut, little traffic across it), the closer it gets.
+
+The partition cuts tree edges : a cut edge whose side holds a fraction P of the asking rate
+carries 4 P (1 - P) messages by request (see PathIndex.expected_message_cost). The cost being
+concave, the fewest and largest subtrees are cut to fill the shards.
+
+Failures only happen to the nodes whose neighbors are in the same shard, so that a recovering
+node and its neighbors are handled by one worker, see Network.inject_failure. Tracing and the
+until condition of the runs are not available across processes.
+"""
+
+import heapq
+import multiprocessing
+import os
+import traceback
+from Metrics import Histogram
+from Network import Network, RunResult
+from Node import RaymondNode, Ressource
+from Simulator import Simulator, SimNode
+from Topology import check_tree, from_edges
+
+
+def partition(parents, shards, rates = None):
+    """
+    Extended description of function.
+
+    Partitions a tree into shards of about the same number of nodes, cutting few tree
+    edges with little traffic. From the leaves up, once the subtrees hanging from a node
+    hold more nodes than a shard, the subtrees with the least traffic by node are cut, in
+    groups of at most a shard. The groups are then packed into the shards, the largest
+    first in the least loaded shard.
+
+    Parameters
+    ----------
+    parents : list of int
+        The parent array of the tree, see Topology.
+
+    shards : int
+        The number of shards.
+
+    rates : sequence of float
+        The asking privilege rate of each node, for the traffic of the edges, the same
+        for all the nodes by default.
+
+    Returns
+    -------
+    This function returns the shard of each node, and the expected number of messages
+    crossing the shards by privilege request.
+
+    """
+    n = len(parents)
+
+    shards = max(1, min(shards, n))
+
+    root = check_tree(parents)
+
+    children = [[] for _ in range(n)]
+
+    for u, parent in enumerate(parents) :
+
+        if parent >= 0 :
+
+            children[parent].append(u)
+
+    order = [root]
+
+    for u in order :
+
+        order.extend(children[u])
+
+    weight = [1.] * n if rates is None else [float(rate) for rate in rates]
+
+    for u in reversed(order[1:]) :
+
+        weight[parents[u]] += weight[u]
+
+    total = weight[root] or 1.
+
+    traffic = [4 * (weight[u] / total) * (1 - weight[u] / total) for u in range(n)]
+
+    #size of the part of the subtree of each node not cut yet
+    size = [1] * n
+
+    target = n / shards
+
+    groups = []
+
+    for u in reversed(order) :
+
+        kept = [child for child in children[u] if size[child]]
+
+        rest = 1 + sum(size[child] for child in kept)
+
+        if rest > target :
+
+            kept.sort(key = lambda child : (traffic[child] / size[child], child))
+
+            group, groupSize = [], 0
+
+            while kept and rest > target :
+
+                child = kept.pop(0)
+
+                #the cut subtree is not part of the subtree of u anymore
+                size[child], childSize = 0, size[child]
+
+                if group and groupSize + childSize > target :
+
+                    groups.append((groupSize, group))
+
+                    group, groupSize = [], 0
+
+                group.append(child)
+
+                groupSize += childSize
+
+                rest -= childSize
+
+            if group :
+
+                groups.append((groupSize, group))
+
+        size[u] = rest
+
+    groups.append((size[root], [root]))
+
+    #the groups, largest first, go to the least loaded shard
+    loads = [(0, shard) for shard in range(shards)]
+
+    head = {}
+
+    for groupSize, group in sorted(groups, key = lambda item : -item[0]) :
+
+        load, shard = heapq.heappop(loads)
+
+        for u in group :
+
+            head[u] = shard
+
+        heapq.heappush(loads, (load + groupSize, shard))
+
+    assignment = [0] * n
+
+    for u in order :
+
+        assignment[u] = head[u] if u in head else assignment[parents[u]]
+
+    cross = sum(traffic[u] for u in order[1:] if assignment[u] != assignment[parents[u]])
+
+    return assignment, cross
+
+
+def boundary_distances(neighbors, assignment):
+    """
+    Extended description of function.
+
+    Measures the hops from each node to the nearest node of its shard with a neighbor in
+    another shard, going through the nodes of its shard. A message of a node reaches
+    another shard after as many messages as hops, each taking the latency.
+
+    Parameters
+    ----------
+    neighbors : dict
+        The neighbor ids of each node id.
+
+    assignment : dict
+        The shard of each node id.
+
+    Returns
+    -------
+    This function returns the distance of each node id, inf for the nodes that cannot
+    reach another shard.
+
+    """
+    distances = {nodeId : float('inf') for nodeId in neighbors}
+
+    order = [nodeId for nodeId in neighbors if any(assignment[neighborId] != assignment[nodeId] for neighborId in neighbors[nodeId])]
+
+    for nodeId in order :
+
+        distances[nodeId] = 0
+
+    for nodeId in order :
+
+        for neighborId in neighbors[nodeId] :
+
+            if assignment[neighborId] == assignment[nodeId] and distances[neighborId] > distances[nodeId] + 1 :
+
+                distances[neighborId] = distances[nodeId] + 1
+
+                order.append(neighborId)
+
+    return distances
+
+
+class IntervalRessource(Ressource):
+    """
+    A ressource that records the times it is held, so that the network checks the mutual
+    exclusion across the shards and measures the usage of the whole ressource.
+
+    Attributes
+    ----------
+    See Ressource.
+
+    intervals : list
+        The [acquire time, release time, node id] of the grants, None for a release time
+        still to come.
+    """
+
+    def start(self):
+
+        Ressource.start(self)
+
+        self.intervals = []
+
+
+    def acquire(self, nodeId = None):
+
+        Ressource.acquire(self, nodeId)
+
+        self.intervals.append([self.acquiredAt, None, nodeId])
+
+
+    def release(self):
+
+        acquired = self.acquired
+
+        Ressource.release(self)
+
+        if acquired :
+
+            self.intervals[-1][1] = self.releasedAt
+
+
+def merge_usage(intervals, started, now):
+    """
+    Extended description of function.
+
+    Merges the grants of the shards into the usage of the ressource, see Ressource.usage,
+    and checks that they never overlap.
+
+    Parameters
+    ----------
+    intervals : list
+        The [acquire time, release time, node id] of the grants of all the shards.
+
+    started, now : float
+        The times the measure starts and ends.
+
+    Returns
+    -------
+    This function returns a dictionary.
+
+    """
+    idleGaps = Histogram()
+
+    busyTime = 0.
+
+    releasedAt, holder = None, None
+
+    for acquiredAt, release, nodeId in sorted(intervals, key = lambda interval : interval[0]) :
+
+        if releasedAt is not None and acquiredAt < releasedAt :
+
+            raise Exception('Ressource already acquired! node %r enters at %r, node %r leaves at %r'
+                            % (nodeId, acquiredAt, holder, releasedAt))
+
+        if releasedAt is not None :
+
+            idleGaps.observe(acquiredAt - releasedAt)
+
+        releasedAt, holder = (now if release is None else release), nodeId
+
+        busyTime += releasedAt - acquiredAt
+
+    elapsed = now - started
+
+    return {'grants' : len(intervals), 'busyTime' : busyTime, 'elapsed' : elapsed,
+            'utilization' : busyTime / elapsed if elapsed > 0 else None,
+            'throughput' : len(intervals) / elapsed if elapsed > 0 else None,
+            'idleGaps' : idleGaps}
+
+
+class ShardNode(SimNode):
+    """
+    This class is a simulated node of a shard. Its messages to the nodes of other shards
+    are put in the outbox of its simulator, to be delivered by the network.
+    """
+
+    def transmit(self, msgType, dest, advice):
+
+        simulator = self.simulator
+
+        if dest in simulator.nodes :
+
+            simulator.schedule(simulator.latency, simulator.nodes[dest].on_message, msgType, self.id, advice)
+
+        else :
+
+            simulator.outbox.append((simulator.now + simulator.latency, dest, msgType, self.id, advice))
+
+
+class ShardSimulator(Simulator):
+    """
+    This class simulates the nodes of a shard in a worker process.
+
+    Attributes
+    ----------
+    See Simulator.
+
+    outbox : list
+        The messages to the other shards (delivery time, dest, msgType, senderId, advice),
+        sent since the last exchange.
+
+    distances : dict
+        The distance of each node to the other shards, see boundary_distances.
+
+    failureDistance : float
+        The least distance of the nodes that can fail.
+
+    Methods
+    -------
+    deliver() :
+        Schedules the messages of the other shards.
+
+    next_event() :
+        The time of the first event.
+
+    next_emission() :
+        The first time a message to another shard can be sent.
+    """
+
+    def __init__(self, spec):
+
+        Simulator.__init__(self, spec['failureRate'], spec['activityRate'], spec['latency'], spec['seed'])
+
+        self.ressource = IntervalRessource(self.clock)
+
+        self.outbox = []
+
+        self.workload = spec['workload']
+
+        self.workloads = spec['workloads']
+
+        self.downtime = spec['downtime']
+
+        self.distances = spec['distances']
+
+        for nodeId, holderId, askingPrivRate, neighborsId in spec['nodes'] :
+
+            node = self.nodes[nodeId] = self.make_node(nodeId, holderId, askingPrivRate)
+
+            self.attach(node)
+
+            node.neighborsId = list(neighborsId)
+
+        self.started = True
+
+        self.ressource.start()
+
+        #only the nodes whose neighbors are in the shard fail
+        self.nodesIds = [node.id for node in self.nodes.values() if all(neighborId in self.nodes for neighborId in node.neighborsId)]
+
+        self.failureDistance = min((self.distances[nodeId] for nodeId in self.nodesIds), default = float('inf'))
+
+        for node in self.nodes.values() :
+
+            node.think()
+
+        if self.failureRate and self.nodesIds :
+
+            self.schedule(self.next_time(), self.inject_failure)
+
+
+    def make_node(self, nodeId, holderId, askingPrivRate):
+
+        return ShardNode(self, nodeId, holderId, askingPrivRate)
+
+
+    def deliver(self, messages):
+
+        scheduler = self.scheduler
+
+        nodes = self.nodes
+
+        for deliveryTime, dest, msgType, senderId, advice in messages :
+
+            heapq.heappush(scheduler.events, (deliveryTime, next(scheduler.sequence), nodes[dest].on_message, (msgType, senderId, advice)))
+
+
+    def next_event(self):
+
+        events = self.scheduler.events
+
+        return events[0][0] if events else float('inf')
+
+
+    def next_emission(self):
+        """
+        Extended description of function.
+
+        Bounds the time of the first message to another shard : an event of a node at
+        time t leads to such a message at t + distance * latency at the earliest.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns the time, inf if no event can lead to a message.
+
+        """
+        events = self.scheduler.events
+
+        latency = self.latency
+
+        bound = float('inf')
+
+        #the children of an event in the heap are later, the events after the bound are
+        #skipped with their children
+        stack = [0] if events else []
+
+        while stack :
+
+            k = stack.pop()
+
+            eventTime, _, action, _ = events[k]
+
+            if eventTime >= bound :
+
+                continue
+
+            owner = getattr(action, '__self__', None)
+
+            if owner is self :
+
+                distance = self.failureDistance
+
+            elif isinstance(owner, RaymondNode) :
+
+                distance = self.distances[owner.id]
+
+            else :
+
+                distance = 0
+
+            bound = min(bound, eventTime + distance * latency)
+
+            stack.extend(child for child in (2 * k + 1, 2 * k + 2) if child < len(events))
+
+        return bound
+
+
+def run_shard(connection, spec):
+    """
+    Extended description of function.
+
+    The main function of a worker process : it simulates a shard window by window, as
+    commanded by the network, until it is told to finish.
+
+    Parameters
+    ----------
+    connection : multiprocessing.connection.Connection
+        The pipe to the network.
+
+    spec : dict
+        The shard, see ShardedNetwork.shard_spec.
+
+    Returns
+    -------
+    This function returns no value.
+
+    """
+    try :
+
+        simulator = ShardSimulator(spec)
+
+        connection.send(('ok', simulator.next_emission()))
+
+        while True :
+
+            command, end, inbox = connection.recv()
+
+            simulator.deliver(inbox)
+
+            if end is not None :
+
+                simulator.scheduler.run(end)
+
+            if command == 'finish' :
+
+                connection.send(('ok', (simulator.metrics.snapshot(), simulator.ressource.intervals)))
+
+                return
+
+            outbox, simulator.outbox = simulator.outbox, []
+
+            connection.send(('ok', (outbox, simulator.next_emission(), simulator.metrics.asks())))
+
+    except Exception :
+
+        connection.send(('error', traceback.format_exc()))
+
+    finally :
+
+        connection.close()
+
+
+class ShardedNetwork(Network):
+    """
+    This class simulates a network with several worker processes, one by shard of the tree.
+
+    It is built like a Network (addNode, addTree, set_workload, set_downtime) and runs like a
+    Simulator in virtual time, the nodes are created in the workers when the run starts. The
+    runs are deterministic for a given seed and number of shards.
+
+    Attributes
+    ----------
+    See Network.
+
+    shards : int
+        The number of shards, the number of cores by default.
+
+    latency : float
+        Time in seconds a message takes to be delivered, the lookahead of the shards.
+
+    seed : int
+        The seed of the simulation, each shard draws from its own generator.
+
+    assignment : dict
+        The shard of each node id, set by run.
+
+    distances : dict
+        The distance of each node id to the other shards, see boundary_distances, set by
+        run.
+
+    crossTraffic : float
+        The expected number of messages by request crossing the shards, see partition.
+
+    windows : int
+        The number of windows of the last run.
+
+    now : float
+        The virtual time in seconds.
+
+    Methods
+    -------
+    run() :
+        Runs the simulation and returns a RunResult.
+    """
+    logLevel = None
+
+    startMethod = None
+
+    def __init__(self, failureRate = 1e-4, activityRate = .05, latency = 1e-3, seed = None, shards = None):
+
+        if latency <= 0 :
+
+            raise ValueError('the shards need a positive latency to run in parallel')
+
+        self.now = 0.
+
+        Network.__init__(self, failureRate, activityRate)
+
+        self.latency = latency
+
+        self.seed = seed
+
+        self.shards = shards or os.cpu_count() or 1
+
+        self.assignment = {}
+
+        self.distances = {}
+
+        self.crossTraffic = None
+
+        self.windows = 0
+
+
+    def clock(self):
+
+        return self.now
+
+
+    def make_node(self, nodeId, holderId, askingPrivRate):
+
+        #the description of the node, the worker of its shard simulates it
+        return RaymondNode(nodeId, holderId, askingPrivRate, self.metrics)
+
+
+    def trace(self, tracer):
+
+        raise NotImplementedError('the shards of a ShardedNetwork are not traced')
+
+
+    def shard_spec(self, shard, nodeIds, failureRate, distances):
+
+        workloads = {nodeId : self.workloads[nodeId] for nodeId in nodeIds if nodeId in self.workloads}
+
+        return {'failureRate' : failureRate, 'activityRate' : self.activityRate, 'latency' : self.latency,
+                'seed' : None if self.seed is None else self.seed * 1009 + shard, 'workload' : self.workload,
+                'workloads' : workloads, 'downtime' : self.downtime,
+                'distances' : {nodeId : distances[nodeId] for nodeId in nodeIds},
+                'nodes' : [(nodeId, self.nodes[nodeId].holderId, self.nodes[nodeId].askingPrivRate,
+                            self.nodes[nodeId].neighborsId) for nodeId in nodeIds]}
+
+
+    def split(self):
+
+        #partitions the tree and describes the shards
+        ids = list(self.nodes.keys())
+
+        nodes = [self.nodes[nodeId] for nodeId in ids]
+
+        edges = [(node.id, neighborId) for node in nodes for neighborId in node.neighborsId if node.id < neighborId]
+
+        root = next((node.id for node in nodes if node.holderId == node.id), ids[0])
+
+        parents = from_edges(edges, root, ids)[0] if edges else [-1]
+
+        shard, self.crossTraffic = partition(parents, self.shards, [node.askingPrivRate for node in nodes])
+
+        self.assignment = dict(zip(ids, shard))
+
+        members = [[] for _ in range(max(shard) + 1)]
+
+        for nodeId in ids :
+
+            members[self.assignment[nodeId]].append(nodeId)
+
+        #the failure rate of the network is shared by the nodes that can fail
+        interior = [sum(all(self.assignment[neighborId] == i for neighborId in self.nodes[nodeId].neighborsId)
+                        for nodeId in nodeIds) for i, nodeIds in enumerate(members)]
+
+        total = sum(interior)
+
+        self.distances = boundary_distances({node.id : node.neighborsId for node in nodes}, self.assignment)
+
+        return [self.shard_spec(i, nodeIds, self.failureRate * interior[i] / total if total else 0., self.distances)
+                for i, nodeIds in enumerate(members)]
+
+
+    def receive(self, connection):
+
+        status, payload = connection.recv()
+
+        if status == 'error' :
+
+            raise RuntimeError('a shard failed :\n' + payload)
+
+        return payload
+
+
+    def run(self, duration = 3600., max_requests = None):
+        """
+        Extended description of function.
+
+        This function starts a worker process by shard, runs the windows of the simulation
+        until duration virtual seconds or max_requests privilege requests, and merges the
+        metrics and the usage of the ressource of the shards. A network runs once.
+
+        Parameters
+        ----------
+        duration : float
+            The virtual duration to simulate in seconds.
+
+        max_requests : int
+            The run stops once this number of privilege requests is made, checked at the
+            end of every window.
+
+        Returns
+        -------
+        This function returns a RunResult.
+
+        """
+        if not self.nodes :
+
+            raise ValueError('the network has no node')
+
+        specs = self.split()
+
+        context = multiprocessing.get_context(self.startMethod)
+
+        connections, workers = [], []
+
+        for spec in specs :
+
+            connection, workerConnection = context.Pipe()
+
+            worker = context.Process(target = run_shard, args = (workerConnection, spec), daemon = True)
+
+            worker.start()
+
+            workerConnection.close()
+
+            connections.append(connection)
+
+            workers.append(worker)
+
+        shardOf, distances = self.assignment, self.distances
+
+        reason = 'duration'
+
+        try :
+
+            count = len(connections)
+
+            #the first times the shards can send a message to another shard
+            nextTimes = [self.receive(connection) for connection in connections]
+
+            inboxes = [[] for _ in connections]
+
+            firstMessages = [float('inf')] * count
+
+            ends = [self.now] * count
+
+            asks = [0] * count
+
+            #a shard's own messages come back through another shard 2 latencies later at best
+            roundTrip = 2 * self.latency if count > 1 else float('inf')
+
+            while True :
+
+                nexts = [min(nextTime, firstMessage) for nextTime, firstMessage in zip(nextTimes, firstMessages)]
+
+                first = min(range(count), key = nexts.__getitem__)
+
+                if nexts[first] > duration :
+
+                    break
+
+                if self.terminate :
+
+                    reason = 'stop'
+
+                    break
+
+                #a shard runs until the first message another shard can send it
+                second = min((nexts[i] for i in range(count) if i != first), default = float('inf'))
+
+                for i, connection in enumerate(connections) :
+
+                    others = second if i == first else nexts[first]
+
+                    ends[i] = max(ends[i], min(duration, nexts[i] + roundTrip, others + self.latency))
+
+                    connection.send(('step', ends[i], inboxes[i]))
+
+                inboxes = [[] for _ in connections]
+
+                firstMessages = [float('inf')] * count
+
+                for i, connection in enumerate(connections) :
+
+                    outbox, nextTimes[i], asks[i] = self.receive(connection)
+
+                    for message in outbox :
+
+                        shard = shardOf[message[1]]
+
+                        inboxes[shard].append(message)
+
+                        emission = message[0] + distances[message[1]] * self.latency
+
+                        if emission < firstMessages[shard] :
+
+                            firstMessages[shard] = emission
+
+                self.windows += 1
+
+                self.now = min(ends)
+
+                if max_requests is not None and sum(asks) >= max_requests :
+
+                    reason = 'max_requests'
+
+                    break
+
+            #the shards reach the end of the run unless it is stopped, the messages in flight
+            #after it are left undelivered, as in Simulator.run
+            end = duration if reason == 'duration' else max(ends)
+
+            intervals = []
+
+            for connection, inbox in zip(connections, inboxes) :
+
+                connection.send(('finish', end if reason == 'duration' else None, inbox))
+
+            for connection in connections :
+
+                snapshot, shardIntervals = self.receive(connection)
+
+                self.metrics.merge(snapshot)
+
+                intervals.extend(shardIntervals)
+
+        finally :
+
+            for connection, worker in zip(connections, workers) :
+
+                connection.close()
+
+                worker.join(1.)
+
+                if worker.is_alive() :
+
+                    worker.terminate()
+
+        self.now = end
+
+        self.terminate = True
+
+        return RunResult(reason, end, self.metrics.snapshot(), merge_usage(intervals, 0., end))
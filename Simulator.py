@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+Discrete-event simulation of the network : the nodes run the same state machine
+as the threaded nodes, but time is a virtual clock driven by a priority queue of
+events, so hours of activity are simulated in seconds on a single thread.
+"""
+
+import random
+from Node import RaymondNode
+from Network import Network, RunResult
+from Scheduler import Scheduler
+
+
+class Flag():
+    """
+    A single threaded replacement of threading.Event, used as the inRecovery signal
+    of the simulated nodes.
+
+    Methods
+    -------
+    set()
+        Sets the flag.
+
+    clear()
+        Clears the flag.
+
+    is_set()
+        Returns the state of the flag.
+    """
+    __slots__ = ('state',)
+
+    def __init__(self):
+
+        self.state = False
+
+    def set(self):
+
+        self.state = True
+
+    def clear(self):
+
+        self.state = False
+
+    def is_set(self):
+
+        return self.state
+
+
+class NoLock():
+    """
+    A context manager that does nothing, the simulated nodes never run concurrently
+    so they don't need the canWork lock.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *excInfo):
+
+        return False
+
+
+NOLOCK = NoLock()
+
+
+class SimNode(RaymondNode):
+    """
+    This class is used to simulate a node in virtual time.
+
+    Instead of sleeping, the node schedules events in its simulator : its next asking
+    for privilege, the end of its critical section, its restart after a failure and the
+    delivery of the messages it sends.
+
+    A node that is already waiting for the privilege stops its think timer and starts
+    it again once served. As think times are exponential, this is the same as a timer
+    that never stops, with much fewer events.
+
+    Attributes
+    ----------
+    See RaymondNode for the attributes of the algorithm.
+
+    simulator : Simulator
+        The simulator the node belongs to.
+
+    inRecovery : Flag
+        A flag that indicates if the node is in recovery state or not
+
+    thinking : bool
+        True while the next asking for privilege of the node is scheduled
+
+    epoch : int
+        Incremented at each failure, to drop the events scheduled before it.
+
+    Methods
+    -------
+    think()
+        Schedules the next time the node will ask for privilege.
+
+    wake()
+        The think timer of the node expired.
+    """
+
+    def __init__(self, simulator, id, holderId = None, askingPrivRate = .05):
+
+        RaymondNode.__init__(self, id, holderId, askingPrivRate, simulator.metrics)
+
+        self.simulator = simulator
+
+        self.rng = simulator.rng
+
+        self.inRecovery = Flag()
+
+        self.canWork = NOLOCK
+
+        self.thinking = False
+
+        self.epoch = 0
+
+
+    def think(self):
+        """
+        Extended description of function.
+
+        Schedules the next time the node will ask for privilege, if it has a non zero
+        asking for privilege rate.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        if self.askingPrivRate > 0 :
+
+            self.thinking = True
+
+            self.simulator.schedule(self.next_time(), self.wake)
+
+
+    def wake(self):
+        """
+        Extended description of function.
+
+        The think timer expired, the node asks for privilege. If it is still waiting for
+        the previous one the timer is stopped until it is served.
+
+        Parameters
+        ----------
+        This function takes no argument.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        if self.id in self.requestQ and not self.inRecovery.is_set() :
+
+            self.thinking = False
+
+            return
+
+        self.ask()
+
+        self.simulator.schedule(self.next_time(), self.wake)
+
+
+    def enter_critical_section(self):
+
+        self.simulator.schedule(self.service_time(), self.end_critical_section, self.epoch)
+
+        if not self.thinking :
+
+            self.think()
+
+
+    def end_critical_section(self, epoch):
+
+        if epoch == self.epoch :
+
+            self.leave_critical_section()
+
+
+    def transmit(self, msgType, dest, advice):
+
+        simulator = self.simulator
+
+        simulator.schedule(simulator.latency, simulator.nodes[dest].on_message, msgType, self.id, advice)
+
+
+    def fail(self):
+
+        self.epoch += 1
+
+        if self.using :
+
+            #the node fails inside the critical section, the ressource is freed
+            self.ressource.release()
+
+        RaymondNode.fail(self)
+
+        if not self.thinking :
+
+            self.think()
+
+
+    def wait_restart(self):
+
+        self.simulator.schedule(self.down_time(), self.end_downtime, self.epoch)
+
+
+    def end_downtime(self, epoch):
+
+        if epoch == self.epoch :
+
+            self.restart()
+
+
+    def wait_advise(self, delay):
+
+        self.simulator.schedule(delay, self.end_advise_wait, self.epoch)
+
+
+    def end_advise_wait(self, epoch):
+
+        if epoch == self.epoch :
+
+            self.advise_timeout()
+
+
+    def wait_hold(self, delay, hold):
+
+        #release_hold drops the holds over, a failure included
+        self.simulator.schedule(delay, self.release_hold, hold)
+
+
+    def recover(self):
+
+        RaymondNode.recover(self)
+
+        self.simulator.node_recovered(self)
+
+
+
+class Simulator(Network):
+    """
+    This class simulates the network with a discrete-event engine.
+
+    It is built like a Network (addNode) and runs the same algorithm, but the clock
+    is virtual : events are kept in a priority queue ordered by time and executed one
+    after the other. Runs are deterministic for a given seed.
+
+    Attributes
+    ----------
+    See Network.
+
+    latency : float
+        Time in seconds a message takes to be delivered.
+
+    rng : random.Random
+        The random generator of the simulation.
+
+    metrics : Metrics
+        The metrics of the simulation, timed with the virtual clock.
+
+    scheduler : Scheduler
+        The scheduler of the simulation, in virtual time.
+
+    now : float
+        The virtual time in seconds.
+
+    Methods
+    -------
+    schedule() :
+        Schedules an action.
+
+    start():
+        Runs the simulation for a given virtual duration.
+
+    stop():
+        Stops the simulation and returns the complexity data.
+    """
+    #no event log by default, see Network.log_events
+    logLevel = None
+
+    def __init__(self, failureRate = 1e-4, activityRate = .05, latency = 1e-3, seed = None):
+
+        Network.__init__(self, failureRate, activityRate)
+
+        self.latency = latency
+
+        self.rng = random.Random(seed)
+
+        self.scheduler = Scheduler()
+
+        #the simulator schedules an event by message, without indirection
+        self.schedule = self.scheduler.schedule
+
+        self.started = False
+
+
+    @property
+    def now(self):
+
+        return self.scheduler.now
+
+
+    def clock(self):
+
+        return self.scheduler.now
+
+
+    def make_node(self, nodeId, holderId, askingPrivRate):
+
+        return SimNode(self, nodeId, holderId, askingPrivRate)
+
+
+    def start(self, duration = 3600.):
+        """
+        Extended description of function.
+
+        This function runs the simulation for duration virtual seconds, it can be called
+        again to continue the simulation. A node is picked randomly from time to time and
+        made to fail.
+
+        Parameters
+        ----------
+        duration : float
+            The virtual duration to simulate in seconds.
+
+        Returns
+        -------
+        This function returns the number of messages sent and the number of privilege
+        requests since the beginning of the simulation.
+
+        """
+        self.advance(duration)
+
+        return self.metrics.messages(), self.metrics.asks()
+
+
+    def run(self, duration = 3600., max_requests = None, until = None):
+        """
+        Extended description of function.
+
+        This function runs the simulation until one of the stop conditions is met or stop()
+        is called. The virtual time is over as soon as a condition is met, so the messages in
+        flight are left in the event queue, a next run handles them.
+
+        Parameters
+        ----------
+        duration : float
+            The virtual duration to simulate in seconds.
+
+        max_requests : int
+            The run stops once this number of privilege requests is made.
+
+        until : callable
+            The run stops once until(simulator) returns True, it is checked after every event.
+
+        Returns
+        -------
+        This function returns a RunResult.
+
+        """
+        begin = self.now
+
+        reason = self.advance(duration, max_requests, until)
+
+        return RunResult(reason, self.now - begin, self.metrics.snapshot(), self.ressource.usage())
+
+
+    def advance(self, duration, max_requests = None, until = None):
+
+        if not self.started :
+
+            self.started = True
+
+            #the usage of the ressource is measured from the start
+            self.ressource.start()
+
+            self.nodesIds = list( self.nodes.keys() )
+
+            for node in self.nodes.values() :
+
+                node.think()
+
+            if self.failureRate :
+
+                self.schedule(self.next_time(), self.inject_failure)
+
+        return self.scheduler.run(self.now + duration, self.stop_check(max_requests, until))
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:58:31 2026
+
+Topologies of the network. A tree is described by a parent array : parents[i] is the
+position of the parent of the i-th node and the root has a negative parent. The holder
+of every node is its parent, so the root holds the privilege.
+
+Network.addTree builds a network from a parent array in O(n), this module loads parent
+arrays from edge lists and files, and generates the usual shapes of trees.
+
+    network = Simulator(activityRate = .1)
+
+    network.addTree(Topology.kary(10**6, 2))
+"""
+
+import csv
+import json
+import random
+from collections import deque
+
+
+def check_tree(parents):
+    """
+    Extended description of function.
+
+    This function checks in O(n) that a parent array is a tree : one root and no cycle.
+
+    Parameters
+    ----------
+    parents : list of int
+        parents[i] is the position of the parent of node i, negative for the root.
+
+    Returns
+    -------
+    This function returns the position of the root.
+
+    """
+    n = len(parents)
+
+    roots = [i for i in range(n) if parents[i] < 0]
+
+    if len(roots) != 1 :
+
+        raise ValueError('a tree must have exactly one root, found ' + str(len(roots)))
+
+    if any(parent >= n for parent in parents) :
+
+        raise ValueError('parent position out of range')
+
+    #0 : not visited, 1 : on the current path, 2 : reaches the root
+    state = bytearray(n)
+
+    state[roots[0]] = 2
+
+    for i in range(n) :
+
+        path = []
+
+        node = i
+
+        while state[node] == 0 :
+
+            state[node] = 1
+
+            path.append(node)
+
+            node = parents[node]
+
+        if state[node] == 1 :
+
+            raise ValueError('the parent array contains a cycle through node ' + str(node))
+
+        for node in path :
+
+            state[node] = 2
+
+    return roots[0]
+
+
+def from_edges(edges, root = None, ids = None):
+    """
+    Extended description of function.
+
+    Orients an undirected edge list from a root, in O(n).
+
+    Parameters
+    ----------
+    edges : iterable of pairs
+        The edges (u, v) of the tree, u and v are node ids.
+
+    root : int
+        The id of the root, the first node of the first edge by default.
+
+    ids : sequence of int
+        The order of the nodes in the returned arrays, by order of appearance in the
+        edges by default.
+
+    Returns
+    -------
+    This function returns the parent array and the ids of the nodes.
+
+    """
+    adjacency = {}
+
+    for u, v in edges :
+
+        adjacency.setdefault(u, []).append(v)
+
+        adjacency.setdefault(v, []).append(u)
+
+    if ids is None :
+
+        ids = list(adjacency)
+
+    if root is None :
+
+        root = ids[0]
+
+    if set(adjacency) != set(ids) or root not in adjacency :
+
+        raise ValueError('the edges must connect exactly the nodes of ids, root included')
+
+    position = {nodeId : i for i, nodeId in enumerate(ids)}
+
+    parents = [None] * len(ids)
+
+    parents[position[root]] = -1
+
+    queue = deque([root])
+
+    while queue :
+
+        u = queue.popleft()
+
+        for v in adjacency.get(u, ()) :
+
+            if parents[position[v]] is None :
+
+                parents[position[v]] = position[u]
+
+                queue.append(v)
+
+    if None in parents or 2 * (len(ids) - 1) != sum(len(neighbors) for neighbors in adjacency.values()) :
+
+        raise ValueError('the edges are not a tree')
+
+    return parents, ids
+
+
+def reroot(parents, root):
+    """
+    Extended description of function.
+
+    Returns the parent array of the same tree rooted at another node, in O(n).
+
+    Parameters
+    ----------
+    parents : list of int
+        The parent array.
+
+    root : int
+        The position of the new root.
+
+    Returns
+    -------
+    This function returns the new parent array.
+
+    """
+    parents = list(parents)
+
+    previous = -1
+
+    node = root
+
+    while node >= 0 :
+
+        #reverse the edges on the path from the new root to the old one
+        parents[node], previous, node = previous, node, parents[node]
+
+    return parents
+
+
+def load(path, root = None):
+    """
+    Extended description of function.
+
+    Loads a tree from a file :
+
+    .csv : rows nodeId,holderId[,askingPrivRate], holderId is empty for the root.
+    .json : {"parents" : [...]} or {"edges" : [[u, v], ...], "root" : r}, with optional
+            "ids" and "askingPrivRates".
+    .npy : a parent array, or an edge list of shape (n - 1, 2) (requires numpy).
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    root : int
+        The id of the root for the edge lists, see from_edges.
+
+    Returns
+    -------
+    This function returns the parent array, the ids of the nodes and their asking
+    privilege rates (None if the file has none), ready for Network.addTree.
+
+    """
+    askingPrivRates = None
+
+    if path.endswith('.csv') :
+
+        with open(path, newline = '') as csvFile :
+
+            rows = [row for row in csv.reader(csvFile) if row and not row[0].startswith('#')]
+
+        if rows and not rows[0][0].strip().lstrip('-').isdigit() :
+
+            #header
+            rows = rows[1:]
+
+        ids = [int(row[0]) for row in rows]
+
+        position = {nodeId : i for i, nodeId in enumerate(ids)}
+
+        parents = [position[int(row[1])] if row[1].strip() else -1 for row in rows]
+
+        if rows and all(len(row) > 2 and row[2].strip() for row in rows) :
+
+            askingPrivRates = [float(row[2]) for row in rows]
+
+    elif path.endswith('.json') :
+
+        with open(path) as jsonFile :
+
+            tree = json.load(jsonFile)
+
+        askingPrivRates = tree.get('askingPrivRates')
+
+        if 'parents' in tree :
+
+            parents = tree['parents']
+
+            ids = tree.get('ids', list(range(len(parents))))
+
+        else :
+
+            parents, ids = from_edges(tree['edges'], tree.get('root', root), tree.get('ids'))
+
+    elif path.endswith('.npy') :
+
+        import numpy
+
+        array = numpy.load(path)
+
+        if array.ndim == 1 :
+
+            parents = array.tolist()
+
+            ids = list(range(len(parents)))
+
+        else :
+
+            parents, ids = from_edges(array.tolist(), root)
+
+    else :
+
+        raise ValueError('unknown tree file format : ' + path)
+
+    check_tree(parents)
+
+    return parents, ids, askingPrivRates
+
+
+def save(path, parents, ids = None, askingPrivRates = None):
+    """
+    Extended description of function.
+
+    Saves a tree in one of the formats of load.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    parents : sequence of int
+        The parent array.
+
+    ids : sequence of int
+        The ids of the nodes, range(len(parents)) by default.
+
+    askingPrivRates : sequence of float
+        The asking privilege rates of the nodes.
+
+    Returns
+    -------
+    This function returns no value.
+
+    """
+    ids = list(range(len(parents))) if ids is None else list(ids)
+
+    if path.endswith('.csv') :
+
+        with open(path, 'w', newline = '') as csvFile :
+
+            writer = csv.writer(csvFile)
+
+            writer.writerow(['nodeId', 'holderId'] + (['askingPrivRate'] if askingPrivRates is not None else []))
+
+            for i, parent in enumerate(parents) :
+
+                row = [ids[i], ids[parent] if parent >= 0 else '']
+
+                if askingPrivRates is not None :
+
+                    row.append(askingPrivRates[i])
+
+                writer.writerow(row)
+
+    elif path.endswith('.json') :
+
+        tree = {'parents' : list(parents), 'ids' : ids}
+
+        if askingPrivRates is not None :
+
+            tree['askingPrivRates'] = list(askingPrivRates)
+
+        with open(path, 'w') as jsonFile :
+
+            json.dump(tree, jsonFile)
+
+    elif path.endswith('.npy') :
+
+        import numpy
+
+        numpy.save(path, numpy.asarray(parents, dtype = numpy.int64))
+
+    else :
+
+        raise ValueError('unknown tree file format : ' + path)
+
+
+def kary(n, k = 2):
+    """
+    Extended description of function.
+
+    Balanced k-ary tree of n nodes, rooted at node 0.
+
+    Returns
+    -------
+    This function returns the parent array.
+
+    """
+    return [-1] + [(i - 1) // k for i in range(1, n)]
+
+
+def random_recursive(n, seed = None):
+    """
+    Extended description of function.
+
+    Random recursive tree of n nodes : node i is attached to a node chosen uniformly
+    among the nodes 0 to i - 1.
+
+    Returns
+    -------
+    This function returns the parent array.
+
+    """
+    rng = random.Random(seed)
+
+    return [-1] + [int(rng.random() * i) for i in range(1, n)]
+
+
+def star(n):
+    """
+    Extended description of function.
+
+    Star of n nodes, node 0 is the center.
+
+    Returns
+    -------
+    This function returns the parent array.
+
+    """
+    return [-1] + [0] * (n - 1)
+
+
+def chain(n):
+    """
+    Extended description of function.
+
+    Chain of n nodes, rooted at node 0, one of its ends.
+
+    Returns
+    -------
+    This function returns the parent array.
+
+    """
+    return list(range(-1, n - 1))
+
+
+def caterpillar(spine, legs):
+    """
+    Extended description of function.
+
+    Caterpillar : a chain of spine nodes, each of them with legs leaves. The spine is
+    made of the nodes 0 to spine - 1 and the tree is rooted at node 0.
+
+    Returns
+    -------
+    This function returns the parent array.
+
+    """
+    return chain(spine) + [i // legs for i in range(spine * legs)]
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:22:36 2026
+
+Tracing of the privilege requests. A Tracer attached to a network (Network.trace) records
+structured events in a ring buffer : the requests, the messages sent and received, the
+grants and releases of the critical section, the failures and recoveries.
+
+Every request gets a causal id when the node asks. The id follows the request through the
+request queues of the nodes : the REQUEST messages forwarded on its behalf and the ASSIGN
+messages bringing back the privilege carry it. A grant also records the number of ASSIGN
+hops the privilege made since the previous grant.
+
+The buffer is flushed to a JSON lines file, and this module analyzes such files :
+
+    python Trace.py trace.jsonl [tree.csv]
+
+prints the p50/p99 waiting time and hop counts, the nodes with the worst tail latency and,
+given the tree, the subtrees of the root with the worst tail latency.
+"""
+
+from collections import deque
+import json
+import sys
+import threading
+import time
+import Topology
+
+FIELDS = ('time', 'kind', 'node', 'peer', 'msgType', 'cause')
+
+
+class Tracer():
+    """
+    This class records the trace events of a network in a ring buffer.
+
+    An event is a tuple (time, kind, node, peer, msgType, cause), kind is one of 'ask',
+    'send', 'receive', 'grant', 'release', 'fail' and 'recover'. For a grant, peer is
+    the number of ASSIGN hops since the previous grant, for a recovery the holder found.
+
+    Attributes
+    ----------
+    events : deque
+        The ring buffer, the oldest events are dropped when it is full.
+
+    clock : callable
+        The monotonic clock of the network, set by Network.trace.
+
+    dropped : int
+        The number of events dropped by the ring buffer.
+
+    sink : callable
+        Called with every event as it is recorded, under the lock of the tracer, for
+        instance Checker.feed. The events reach it in order, even when the ring buffer
+        drops them.
+
+    Methods
+    -------
+    flush() :
+        Appends the buffered events to a file and empties the buffer.
+    """
+
+    def __init__(self, capacity = 1 << 20, sink = None):
+
+        self.events = deque(maxlen = capacity)
+
+        self.clock = time.monotonic
+
+        self.lock = threading.Lock()
+
+        self.dropped = 0
+
+        self.requests = 0
+
+        #causal id of every entry of the request queues, by (node, entry)
+        self.entries = {}
+
+        #causal ids of the messages in flight, by edge
+        self.inflight = {}
+
+        self.hops = 0
+
+        self.sink = sink
+
+
+    def record(self, kind, node, peer = None, msgType = None, cause = None):
+
+        events = self.events
+
+        if len(events) == events.maxlen :
+
+            self.dropped += 1
+
+        event = (self.clock(), kind, node, peer, msgType, cause)
+
+        events.append(event)
+
+        if self.sink is not None :
+
+            self.sink(event)
+
+
+    def ask(self, node):
+
+        with self.lock :
+
+            self.requests += 1
+
+            self.entries[(node, node)] = self.requests
+
+            self.record('ask', node, cause = self.requests)
+
+
+    def send(self, msgType, node, dest, head = None):
+
+        with self.lock :
+
+            cause = None
+
+            if msgType == 'R' :
+
+                #a request is forwarded on behalf of the head of the queue
+                cause = self.entries.get((node, head))
+
+            elif msgType == 'A' :
+
+                #the privilege goes to serve the entry just popped from the queue
+                cause = self.entries.pop((node, dest), None)
+
+                self.hops += 1
+
+            self.inflight.setdefault((node, dest), deque()).append(cause)
+
+            self.record('send', node, dest, msgType, cause)
+
+
+    def receive(self, msgType, node, sender):
+
+        with self.lock :
+
+            inflight = self.inflight.get((sender, node))
+
+            cause = inflight.popleft() if inflight else None
+
+            if msgType == 'R' :
+
+                self.entries[(node, sender)] = cause
+
+            self.record('receive', node, sender, msgType, cause)
+
+
+    def grant(self, node):
+
+        with self.lock :
+
+            self.record('grant', node, self.hops, cause = self.entries.pop((node, node), None))
+
+            self.hops = 0
+
+
+    def release(self, node):
+
+        with self.lock :
+
+            self.record('release', node)
+
+
+    def fail(self, node):
+
+        with self.lock :
+
+            for key in [key for key in self.entries if key[0] == node] :
+
+                del self.entries[key]
+
+            self.record('fail', node)
+
+
+    def recover(self, node, holderId):
+
+        with self.lock :
+
+            self.record('recover', node, holderId)
+
+
+    def flush(self, path):
+        """
+        Extended description of function.
+
+        Appends the buffered events to a JSON lines file and empties the buffer.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        This function returns the number of events written.
+
+        """
+        with self.lock :
+
+            events = list(self.events)
+
+            self.events.clear()
+
+        with open(path, 'a') as traceFile :
+
+            for event in events :
+
+                traceFile.write(json.dumps(dict(zip(FIELDS, event))) + '\n')
+
+        return len(events)
+
+
+def read(path):
+    """
+    Extended description of function.
+
+    Reads the events of a trace file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    Returns
+    -------
+    This function returns a generator of event dictionaries.
+
+    """
+    with open(path) as traceFile :
+
+        for line in traceFile :
+
+            if line.strip() :
+
+                yield json.loads(line)
+
+
+def percentile(values, q):
+
+    if not values :
+
+        return None
+
+    values = sorted(values)
+
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def analyze(events, parents = None, ids = None, top = 10):
+    """
+    Extended description of function.
+
+    Computes the waiting time (from the request to the grant) and the number of ASSIGN
+    hops of every granted request of a trace.
+
+    Parameters
+    ----------
+    events : iterable of dict
+        The events of the trace.
+
+    parents, ids : lists
+        The tree of the network (see Topology), to aggregate the waiting times by subtree
+        of the root.
+
+    top : int
+        The number of nodes and subtrees reported.
+
+    Returns
+    -------
+    This function returns a dictionary with the p50/p99 waiting time and hops, and the
+    nodes and subtrees with the highest p99 waiting time.
+
+    """
+    askTimes = {}
+
+    waits = []
+
+    hops = []
+
+    waitsByNode = {}
+
+    for event in events :
+
+        kind = event['kind']
+
+        if kind == 'ask' :
+
+            askTimes[event['cause']] = event['time']
+
+        elif kind == 'grant' :
+
+            askTime = askTimes.pop(event['cause'], None)
+
+            hops.append(event['peer'])
+
+            if askTime is not None :
+
+                wait = event['time'] - askTime
+
+                waits.append(wait)
+
+                waitsByNode.setdefault(event['node'], []).append(wait)
+
+    nodes = sorted(((percentile(values, .99), node) for node, values in waitsByNode.items()), reverse = True)
+
+    report = {'grants' : len(hops), 'unserved' : len(askTimes),
+              'wait' : {'p50' : percentile(waits, .5), 'p99' : percentile(waits, .99)},
+              'hops' : {'p50' : percentile(hops, .5), 'p99' : percentile(hops, .99)},
+              'worstNodes' : [(node, p99) for p99, node in nodes[:top]]}
+
+    if parents is not None :
+
+        ids = list(range(len(parents))) if ids is None else ids
+
+        root = Topology.check_tree(parents)
+
+        #child of the root whose subtree contains each node
+        subtree = [None] * len(parents)
+
+        for i in range(len(parents)) :
+
+            path = []
+
+            node = i
+
+            while node != root and subtree[node] is None and parents[node] != root :
+
+                path.append(node)
+
+                node = parents[node]
+
+            if node != root :
+
+                if subtree[node] is None :
+
+                    subtree[node] = node
+
+                for child in path :
+
+                    subtree[child] = subtree[node]
+
+        waitsBySubtree = {}
+
+        position = {nodeId : i for i, nodeId in enumerate(ids)}
+
+        for node, values in waitsByNode.items() :
+
+            child = subtree[position[node]]
+
+            if child is not None :
+
+                waitsBySubtree.setdefault(ids[child], []).extend(values)
+
+        subtrees = sorted(((percentile(values, .99), child, len(values)) for child, values in waitsBySubtree.items()), reverse = True)
+
+        report['worstSubtrees'] = [(child, p99, count) for p99, child, count in subtrees[:top]]
+
+    return report
+
+
+if __name__ == '__main__' :
+
+    if len(sys.argv) < 2 :
+
+        print('usage : python Trace.py trace.jsonl [tree file]')
+
+        sys.exit(1)
+
+    parents, ids = None, None
+
+    if len(sys.argv) > 2 :
+
+        parents, ids, _ = Topology.load(sys.argv[2])
+
+    report = analyze(read(sys.argv[1]), parents, ids)
+
+    print('granted requests :', report['grants'], ', unserved :', report['unserved'])
+
+    print('waiting time p50 :', report['wait']['p50'], ' p99 :', report['wait']['p99'])
+
+    print('hops         p50 :', report['hops']['p50'], ' p99 :', report['hops']['p99'])
+
+    print('nodes with the worst p99 waiting time :')
+
+    for node, p99 in report['worstNodes'] :
+
+        print('   ', node, p99)
+
+    for root, p99, count in report.get('worstSubtrees', []) :
+
+        print('    subtree of', root, ':', p99, '(' + str(count), 'requests)')
@@ -0,0 +1,1145 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:17 2026
+
+Message transports of the threaded network. A transport gives each node an endpoint
+to send messages to the other nodes and to listen to its own messages.
+
+Any transport can be wrapped in a BatchingTransport, which sends the messages to the
+same node in batch frames :
+
+    network = Network(transport = BatchingTransport(RabbitMQTransport('localhost'), window = 2e-3))
+
+PooledRabbitMQTransport shares a few connections among all the nodes of the process, and
+LocalAMQP stands in for the broker to run it without one :
+
+    network = Network(transport = PooledRabbitMQTransport('localhost', workers = 4))
+
+    network = Network(transport = PooledRabbitMQTransport(connect = LocalAMQP().connect))
+"""
+
+import functools
+import queue
+import threading
+import time
+from Scheduler import RealTimeScheduler
+from Wire import BATCH_CODE, encode_batch
+
+
+class Transport():
+    """
+    This class is the interface of the transports.
+
+    Methods
+    -------
+    endpoint() :
+        Opens the endpoint of a node.
+
+    close() :
+        Releases the ressources of the transport.
+    """
+
+    def endpoint(self, nodeId):
+        """
+        Extended description of function.
+
+        Opens the endpoint of a node. It is called by the node thread, the endpoint is
+        used by the node and its listener.
+
+        Parameters
+        ----------
+        nodeId : int
+            The id of the node.
+
+        Returns
+        -------
+        This function returns an Endpoint.
+
+        """
+        raise NotImplementedError
+
+
+    def close(self):
+
+        pass
+
+
+class Endpoint():
+    """
+    This class is the interface of the endpoint of a node.
+
+    Methods
+    -------
+    send() :
+        Sends a message to a node.
+
+    listen() :
+        Calls a function for each message received, until the endpoint is closed.
+
+    close() :
+        Closes the endpoint and stops the listener.
+    """
+
+    def send(self, dest, body):
+        """
+        Extended description of function.
+
+        Sends a message to a node.
+
+        Parameters
+        ----------
+        dest : int
+            The id of the receiver.
+
+        body : bytes
+            The encoded message.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        raise NotImplementedError
+
+
+    def listen(self, callback):
+        """
+        Extended description of function.
+
+        Blocks and calls callback(body) for each message received until the endpoint is closed.
+
+        Parameters
+        ----------
+        callback : callable
+            The function called with the body of each message.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        raise NotImplementedError
+
+
+    def close(self):
+
+        raise NotImplementedError
+
+
+CLOSE = object()
+
+
+class InMemoryTransport(Transport):
+    """
+    This class delivers the messages inside the process : each node has a queue and
+    sending a message is putting it in the queue of the receiver.
+
+    Attributes
+    ----------
+    queues : dict
+        The queue of each node, created the first time a node is addressed.
+    """
+
+    def __init__(self):
+
+        self.queues = {}
+
+
+    def queue(self, nodeId):
+
+        nodeQueue = self.queues.get(nodeId)
+
+        if nodeQueue is None :
+
+            #setdefault is atomic, two threads addressing a new node get the same queue
+            nodeQueue = self.queues.setdefault(nodeId, queue.SimpleQueue())
+
+        return nodeQueue
+
+
+    def endpoint(self, nodeId):
+
+        return InMemoryEndpoint(self, nodeId)
+
+
+
+class InMemoryEndpoint(Endpoint):
+    """
+    The endpoint of a node in an InMemoryTransport.
+    """
+
+    def __init__(self, transport, nodeId):
+
+        self.transport = transport
+
+        self.inbox = transport.queue(nodeId)
+
+        #queues of the receivers, to avoid a lookup by message
+        self.outboxes = {}
+
+
+    def send(self, dest, body):
+
+        outbox = self.outboxes.get(dest)
+
+        if outbox is None :
+
+            outbox = self.outboxes[dest] = self.transport.queue(dest)
+
+        outbox.put(body)
+
+
+    def listen(self, callback):
+
+        inbox = self.inbox
+
+        while True :
+
+            body = inbox.get()
+
+            if body is CLOSE :
+
+                break
+
+            callback(body)
+
+
+    def close(self):
+
+        self.inbox.put(CLOSE)
+
+
+
+class BatchingTransport(Transport):
+    """
+    This class batches the messages of another transport : the messages an endpoint sends
+    to the same node are accumulated for window seconds, or until maxSize messages, and
+    sent as one batch frame (see Wire.encode_batch). The frames of a node to another keep
+    the order of the messages.
+
+    Attributes
+    ----------
+    transport : Transport
+        The transport carrying the frames.
+
+    window : float
+        The longest time in seconds a message waits in a batch.
+
+    maxSize : int
+        The number of messages that sends a batch at once.
+
+    scheduler : RealTimeScheduler
+        Sends the batches whose window is over, in its own thread.
+
+    flusher : threading.Thread
+        The thread running the scheduler.
+    """
+
+    def __init__(self, transport, window = 1e-3, maxSize = 64):
+
+        self.transport = transport
+
+        self.window = window
+
+        self.maxSize = maxSize
+
+        self.scheduler = RealTimeScheduler()
+
+        self.flusher = threading.Thread(target = self.scheduler.run)
+
+        self.flusher.daemon = True
+
+        self.flusher.start()
+
+
+    def endpoint(self, nodeId):
+
+        return BatchingEndpoint(self, self.transport.endpoint(nodeId))
+
+
+    def close(self):
+
+        self.scheduler.stop()
+
+        self.flusher.join()
+
+        #every batch has a pending flush, the windows still open are sent at once
+        self.scheduler.expedite()
+
+        self.transport.close()
+
+
+
+class BatchingEndpoint(Endpoint):
+    """
+    The endpoint of a node in a BatchingTransport.
+
+    Attributes
+    ----------
+    endpoint : Endpoint
+        The endpoint of the node in the underlying transport.
+
+    batches : dict
+        The messages waiting to be sent, by receiver.
+    """
+
+    def __init__(self, transport, endpoint):
+
+        self.transport = transport
+
+        self.endpoint = endpoint
+
+        self.batches = {}
+
+        self.lock = threading.Lock()
+
+
+    def send(self, dest, body):
+
+        with self.lock :
+
+            batch = self.batches.get(dest)
+
+            if batch is None :
+
+                batch = self.batches[dest] = []
+
+                #the flush is tagged with its batch, a batch sent full leaves it armed
+                self.transport.scheduler.schedule(self.transport.window, self.flush, dest, batch)
+
+            batch.append(body)
+
+            if len(batch) >= self.transport.maxSize :
+
+                #the frame is sent holding the lock, to keep the order of the frames
+                del self.batches[dest]
+
+                self.endpoint.send(dest, encode_batch(batch))
+
+
+    def flush(self, dest, window = None):
+        """
+        Extended description of function.
+
+        Sends the messages waiting for a receiver in one frame.
+
+        Parameters
+        ----------
+        dest : int
+            The id of the receiver.
+
+        window : list
+            The batch the flush was scheduled for : the flush does nothing if this batch
+            was already sent full. Any batch waiting is sent if None.
+
+        Returns
+        -------
+        This function returns no value.
+
+        """
+        with self.lock :
+
+            batch = self.batches.get(dest)
+
+            if batch is None or window is not None and batch is not window :
+
+                return
+
+            del self.batches[dest]
+
+            if batch :
+
+                #a single message is sent as it is
+                self.endpoint.send(dest, batch[0] if len(batch) == 1 else encode_batch(batch))
+
+
+    def listen(self, callback):
+
+        self.endpoint.listen(callback)
+
+
+    def close(self):
+
+        for dest in list(self.batches) :
+
+            self.flush(dest)
+
+        self.endpoint.close()
+
+
+
+def pika_connect(host):
+    """
+    Extended description of function.
+
+    Opens a blocking connection to a rabbitMQ broker.
+
+    Parameters
+    ----------
+    host : str
+        The host of the broker.
+
+    Returns
+    -------
+    This function returns a pika.BlockingConnection.
+
+    """
+    import pika
+
+    return pika.BlockingConnection(pika.ConnectionParameters(host = host))
+
+
+class RabbitMQTransport(Transport):
+    """
+    This class exchanges the messages through a rabbitMQ broker : each node opens its
+    own blocking connection and consumes the queue 'channel' + node id.
+
+    Attributes
+    ----------
+    host : str
+        The host of the broker.
+
+    connect : callable
+        Opens a connection, to the broker of host by default, see LocalAMQP.
+    """
+
+    def __init__(self, host = 'localhost', connect = None):
+
+        self.host = host
+
+        self.connect = functools.partial(pika_connect, host) if connect is None else connect
+
+
+    def endpoint(self, nodeId):
+
+        return RabbitMQEndpoint(self.connect, nodeId)
+
+
+
+class RabbitMQEndpoint(Endpoint):
+    """
+    The endpoint of a node in a RabbitMQTransport.
+
+    Attributes
+    ----------
+    connection : pika.BlockingConnection
+        RabbitMQ blocking connection
+
+    channel : pika.BlockingConnection.channel
+        The node's rabbitMQ connection channel
+    """
+
+    def __init__(self, connect, nodeId):
+
+        self.nodeId = nodeId
+
+        self.connection = connect()
+
+        self.channel = self.connection.channel()
+
+        self.channel.queue_declare(queue = 'channel'+ str(nodeId) )
+
+
+    def send(self, dest, body):
+
+        self.channel.basic_publish(exchange='', routing_key='channel' + str(dest), body = body)
+
+
+    def listen(self, callback):
+
+        self.channel.basic_consume(queue = 'channel'+ str(self.nodeId),
+        on_message_callback = lambda ch, method, properties, body : callback(body),
+        auto_ack = True)
+
+        self.channel.start_consuming()
+
+
+    def close(self):
+
+        #closing the connection stops the listening thread
+        self.connection.close()
+
+
+
+class PooledRabbitMQTransport(Transport):
+    """
+    This class exchanges the messages through a rabbitMQ broker over a pool of connections
+    shared by all the nodes of the process, instead of a connection by node. Each worker
+    thread of the pool owns a connection and its channel, as pika connections are not
+    thread safe : it declares and consumes the queues of its nodes, and publishes the
+    messages they send.
+
+    A node sends from any thread by handing the message to its worker, which is woken up
+    by its connection. The worker publishes the messages accumulated meanwhile to the same
+    node in one batch frame (see Wire.encode_batch), so a busy network publishes fewer,
+    larger frames. The frames of a node to another keep the order of the messages.
+
+    The blocking channels of pika wait for the confirm of every publish, so the frames of
+    a flush are published in a transaction instead, confirmed together by one commit. A
+    failed flush is rolled back and published again, retries times, then its error is
+    raised by the next send of the nodes of the worker.
+
+    Attributes
+    ----------
+    workers : int
+        The number of connections of the pool.
+
+    confirm : bool
+        Publishes the frames of a flush in a transaction committed by the broker, see
+        above. Without it a publish is never retried, nothing tells which frames the
+        broker has.
+
+    retries : int
+        The number of times a failed flush is published again.
+
+    maxFrame : int
+        The largest number of messages in a frame.
+
+    connect : callable
+        Opens a connection, to the broker of host by default, see LocalAMQP.
+
+    pool : list
+        The workers, started with the first endpoints.
+    """
+
+    def __init__(self, host = 'localhost', workers = 4, confirm = True, maxFrame = 256, connect = None, retries = 3):
+
+        self.workers = workers
+
+        self.confirm = confirm
+
+        self.retries = retries
+
+        self.maxFrame = maxFrame
+
+        self.connect = functools.partial(pika_connect, host) if connect is None else connect
+
+        self.pool = []
+
+        self.endpoints = 0
+
+        self.lock = threading.Lock()
+
+
+    def endpoint(self, nodeId):
+
+        with self.lock :
+
+            #the nodes are spread over the workers in turn
+            if len(self.pool) < self.workers :
+
+                worker = AMQPWorker(self)
+
+                worker.start()
+
+                self.pool.append(worker)
+
+            worker = self.pool[self.endpoints % self.workers]
+
+            self.endpoints += 1
+
+        worker.ready.wait()
+
+        if worker.error is not None :
+
+            raise worker.error
+
+        endpoint = PooledRabbitMQEndpoint(worker, nodeId)
+
+        #the node listens at once, its messages wait in its queue until it is consumed
+        worker.call(worker.declare, endpoint)
+
+        return endpoint
+
+
+    def close(self):
+
+        for worker in self.pool :
+
+            #a worker whose connection failed has no loop to halt
+            if worker.running :
+
+                worker.call(worker.halt)
+
+        for worker in self.pool :
+
+            worker.join()
+
+
+
+class AMQPWorker(threading.Thread):
+    """
+    A worker of a PooledRabbitMQTransport, the only thread using its connection.
+
+    Attributes
+    ----------
+    connection, channel :
+        The connection of the worker and its channel.
+
+    pending : list
+        The messages (dest, body) to publish at the next flush.
+
+    queues : set
+        The queues declared by the worker : a queue is declared before the first message
+        to it, so that the messages sent before its node listens wait in the queue.
+
+    error : Exception
+        The error raised opening the connection, or publishing frames after all the
+        retries, raised by the next send. None if there is none.
+
+    frames, messages, retried : int
+        The number of frames and messages published, and of flushes published again.
+    """
+
+    def __init__(self, transport):
+
+        threading.Thread.__init__(self)
+
+        self.daemon = True
+
+        self.transport = transport
+
+        self.connection = None
+
+        self.channel = None
+
+        self.pending = []
+
+        self.queues = set()
+
+        self.lock = threading.Lock()
+
+        self.ready = threading.Event()
+
+        self.error = None
+
+        self.running = True
+
+        self.frames = 0
+
+        self.messages = 0
+
+        self.retried = 0
+
+
+    def run(self):
+
+        try :
+
+            self.connection = self.transport.connect()
+
+            self.channel = self.connection.channel()
+
+            if self.transport.confirm :
+
+                self.channel.tx_select()
+
+        except Exception as error :
+
+            self.error = error
+
+            self.running = False
+
+            if self.connection is not None :
+
+                self.connection.close()
+
+            return
+
+        finally :
+
+            self.ready.set()
+
+        while self.running :
+
+            #dispatches the deliveries and the calls of the other threads
+            self.connection.process_data_events(time_limit = None)
+
+        self.connection.close()
+
+
+    def call(self, function, *args):
+
+        #runs function(*args) in the worker thread
+        self.connection.add_callback_threadsafe(functools.partial(function, *args))
+
+
+    def halt(self):
+
+        self.flush()
+
+        self.running = False
+
+
+    def declare(self, endpoint):
+
+        name = 'channel' + str(endpoint.nodeId)
+
+        if name not in self.queues :
+
+            self.channel.queue_declare(queue = name)
+
+            self.queues.add(name)
+
+        self.channel.basic_consume(queue = name, on_message_callback = lambda ch, method, properties, body : endpoint.inbox.put(body),
+                                   auto_ack = True)
+
+
+    def send(self, dest, body):
+
+        if self.error is not None :
+
+            raise self.error
+
+        with self.lock :
+
+            self.pending.append((dest, body))
+
+            first = len(self.pending) == 1
+
+        if first :
+
+            self.call(self.flush)
+
+
+    def flush(self):
+
+        with self.lock :
+
+            pending, self.pending = self.pending, []
+
+        frames = self.frames_of(pending)
+
+        if not frames :
+
+            return
+
+        attempts = 1 + self.transport.retries if self.transport.confirm else 1
+
+        for attempt in range(attempts) :
+
+            if attempt :
+
+                self.retried += 1
+
+            try :
+
+                self.publish(frames)
+
+                return
+
+            except Exception as error :
+
+                failure = error
+
+                if self.transport.confirm :
+
+                    self.rollback()
+
+        self.error = failure
+
+
+    def frames_of(self, pending):
+
+        #the frames (dest, body, number of messages) of the messages, in order by dest
+        frames = []
+
+        byDest = {}
+
+        for dest, body in pending :
+
+            byDest.setdefault(dest, []).append(body)
+
+        maxFrame = self.transport.maxFrame
+
+        for dest, bodies in byDest.items() :
+
+            batch = []
+
+            for body in bodies :
+
+                if body[0] == BATCH_CODE :
+
+                    #the frames of a BatchingTransport go as they are, in order
+                    add_frame(frames, dest, batch)
+
+                    add_frame(frames, dest, [body])
+
+                    batch = []
+
+                else :
+
+                    batch.append(body)
+
+                    if len(batch) == maxFrame :
+
+                        add_frame(frames, dest, batch)
+
+                        batch = []
+
+            add_frame(frames, dest, batch)
+
+        return frames
+
+
+    def publish(self, frames):
+
+        channel = self.channel
+
+        for dest, body, count in frames :
+
+            name = 'channel' + str(dest)
+
+            if name not in self.queues :
+
+                channel.queue_declare(queue = name)
+
+                self.queues.add(name)
+
+            channel.basic_publish(exchange = '', routing_key = name, body = body)
+
+        if self.transport.confirm :
+
+            #one round trip confirms all the frames, they are delivered at once
+            channel.tx_commit()
+
+        self.frames += len(frames)
+
+        self.messages += sum(count for _, _, count in frames)
+
+
+    def rollback(self):
+
+        try :
+
+            self.channel.tx_rollback()
+
+        except Exception :
+
+            #the channel is closed, the next attempt raises the error again
+            pass
+
+
+
+def add_frame(frames, dest, bodies):
+
+    if bodies :
+
+        frames.append((dest, bodies[0] if len(bodies) == 1 else encode_batch(bodies), len(bodies)))
+
+
+
+class PooledRabbitMQEndpoint(Endpoint):
+    """
+    The endpoint of a node in a PooledRabbitMQTransport : its worker puts the messages
+    of the node in its inbox, and publishes the messages it sends.
+    """
+
+    def __init__(self, worker, nodeId):
+
+        self.worker = worker
+
+        self.nodeId = nodeId
+
+        self.inbox = queue.SimpleQueue()
+
+
+    def send(self, dest, body):
+
+        self.worker.send(dest, body)
+
+
+    def listen(self, callback):
+
+        inbox = self.inbox
+
+        while True :
+
+            body = inbox.get()
+
+            if body is CLOSE :
+
+                break
+
+            callback(body)
+
+
+    def close(self):
+
+        self.inbox.put(CLOSE)
+
+
+
+class LocalAMQP():
+    """
+    This class is an in-process stand-in of a rabbitMQ broker, with the subset of the pika
+    blocking API the transports use : connect() replaces the connection to the broker.
+    It delivers the messages of the default exchange to the queue named by their routing
+    key, in the thread of the connection consuming it. It counts the connections, the
+    publishes and the round trips to the broker, and can wait roundTrip seconds for each,
+    to measure the setup time and the overhead of a transport.
+
+    Attributes
+    ----------
+    roundTrip : float
+        The time in seconds of a round trip to the broker.
+
+    queues : dict
+        The queues by name : the consuming connection and callback, and the messages
+        waiting for a consumer.
+
+    connections, publishes, roundTrips : int
+        The counts of the broker.
+
+    Methods
+    -------
+    connect() :
+        Opens a connection.
+    """
+
+    #the round trips of the handshake of a connection
+    handshake = 3
+
+    def __init__(self, roundTrip = 0.):
+
+        self.roundTrip = roundTrip
+
+        self.queues = {}
+
+        self.lock = threading.Lock()
+
+        self.connections = 0
+
+        self.publishes = 0
+
+        self.roundTrips = 0
+
+
+    def connect(self):
+
+        with self.lock :
+
+            self.connections += 1
+
+        self.wait(self.handshake)
+
+        return LocalConnection(self)
+
+
+    def wait(self, trips):
+
+        with self.lock :
+
+            self.roundTrips += trips
+
+        if self.roundTrip :
+
+            time.sleep(trips * self.roundTrip)
+
+
+    def publish(self, name, body):
+
+        with self.lock :
+
+            self.publishes += 1
+
+            entry = self.queues.get(name)
+
+            if entry is None :
+
+                #no queue, the default exchange drops the message
+                return False
+
+            if entry[0] is None :
+
+                entry[1].append(body)
+
+                return True
+
+            connection, callback = entry[0]
+
+        connection.events.put((callback, body))
+
+        return True
+
+
+    def consume(self, name, connection, callback):
+
+        with self.lock :
+
+            entry = self.queues.setdefault(name, [None, []])
+
+            entry[0] = (connection, callback)
+
+            backlog, entry[1] = entry[1], []
+
+        for body in backlog :
+
+            connection.events.put((callback, body))
+
+
+
+class LocalConnection():
+    """
+    A connection to a LocalAMQP broker, see pika.BlockingConnection.
+    """
+
+    def __init__(self, broker):
+
+        self.broker = broker
+
+        self.events = queue.SimpleQueue()
+
+        self.is_open = True
+
+
+    def channel(self):
+
+        self.broker.wait(1)
+
+        return LocalChannel(self)
+
+
+    def add_callback_threadsafe(self, callback):
+
+        self.events.put((callback, None))
+
+
+    def process_data_events(self, time_limit = 0):
+
+        #runs the deliveries and the callbacks, waiting at most time_limit seconds for the
+        #first one, forever if None
+        try :
+
+            event = self.events.get(timeout = time_limit) if time_limit != 0 else self.events.get_nowait()
+
+        except queue.Empty :
+
+            return
+
+        while event is not None :
+
+            callback, body = event
+
+            if callback is CLOSE :
+
+                return
+
+            if body is None :
+
+                callback()
+
+            else :
+
+                callback(body)
+
+            try :
+
+                event = self.events.get_nowait()
+
+            except queue.Empty :
+
+                event = None
+
+
+    def close(self):
+
+        self.is_open = False
+
+        self.events.put((CLOSE, None))
+
+
+
+class LocalChannel():
+    """
+    A channel of a LocalConnection, see pika.adapters.blocking_connection.BlockingChannel.
+    """
+
+    def __init__(self, connection):
+
+        self.connection = connection
+
+        self.broker = connection.broker
+
+        self.confirm = False
+
+        #the publishes of the transaction in progress, None out of a transaction
+        self.transaction = None
+
+
+    def confirm_delivery(self):
+
+        self.broker.wait(1)
+
+        self.confirm = True
+
+
+    def queue_declare(self, queue):
+
+        self.broker.wait(1)
+
+        with self.broker.lock :
+
+            self.broker.queues.setdefault(queue, [None, []])
+
+
+    def basic_consume(self, queue, on_message_callback, auto_ack = False):
+
+        self.broker.wait(1)
+
+        self.broker.consume(queue, self.connection, functools.partial(on_message_callback, self, None, None))
+
+
+    def tx_select(self):
+
+        self.broker.wait(1)
+
+        self.transaction = []
+
+
+    def tx_commit(self):
+
+        #the publishes of the transaction are delivered with one round trip
+        self.broker.wait(1)
+
+        transaction, self.transaction = self.transaction, []
+
+        for routing_key, body in transaction :
+
+            self.broker.publish(routing_key, body)
+
+
+    def tx_rollback(self):
+
+        self.broker.wait(1)
+
+        self.transaction = []
+
+
+    def basic_publish(self, exchange, routing_key, body, properties = None, mandatory = False):
+
+        if self.transaction is not None :
+
+            self.transaction.append((routing_key, body))
+
+            return
+
+        routed = self.broker.publish(routing_key, body)
+
+        if self.confirm :
+
+            #waits for the confirm of the broker
+            self.broker.wait(1)
+
+            if mandatory and not routed :
+
+                raise LookupError('unroutable message to ' + routing_key)
+
+
+    def start_consuming(self):
+
+        connection = self.connection
+
+        while connection.is_open :
+
+            connection.process_data_events(time_limit = None)
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:20:44 2026
+
+Binary encoding of the protocol messages.
+
+Binary format :
+
+    type byte | varint sender id [| varint holder id]
+
+The 3 low bits of the type byte are the message type code, for advise messages the
+next 3 bits carry the flags inSenderReqQ, senderAsked and 'holder unknown' (the sender
+is itself recovering) and the holder id follows the sender id. Ids are unsigned LEB128
+varints, so a message between nodes with ids below 128 is 2 bytes and an advise 3 bytes.
+A binary type byte is always below 0x40, lower than the letters of the text format.
+
+Batch format, the messages sent at once to the same node (see BatchingTransport) :
+
+    batch code | varint count | (varint length | message) * count
+
+The text format 'type*sender id*holder,inReqQ,asked' of the first versions is still
+decoded, it is recognised by its first byte, a letter of MsgType.
+"""
+
+#codes of the MsgType constants
+TYPE_CODES = {'R' : 1, 'A' : 2, 'S' : 3, 'D' : 4}
+
+CODE_TYPES = {code : msgType for msgType, code in TYPE_CODES.items()}
+
+TYPE_MASK = 0x07
+
+IN_REQ_Q = 0x08
+
+ASKED = 0x10
+
+NO_HOLDER = 0x20
+
+ADVISE_CODE = TYPE_CODES['D']
+
+BATCH_CODE = 5
+
+TEXT_TYPES = frozenset(ord(msgType) for msgType in TYPE_CODES)
+
+
+def write_varint(buffer, value):
+    """
+    Extended description of function.
+
+    Appends an unsigned integer to a buffer as a LEB128 varint.
+
+    Parameters
+    ----------
+    buffer : bytearray
+        The buffer to write to.
+
+    value : int
+        The non negative integer to write.
+
+    Returns
+    -------
+    This function returns no value.
+
+    """
+    if value < 0 :
+
+        raise ValueError('node ids must be non negative to be encoded')
+
+    while value > 0x7F :
+
+        buffer.append((value & 0x7F) | 0x80)
+
+        value >>= 7
+
+    buffer.append(value)
+
+
+def read_varint(data, position):
+    """
+    Extended description of function.
+
+    Reads a LEB128 varint.
+
+    Parameters
+    ----------
+    data : bytes, bytearray or memoryview
+        The buffer to read from.
+
+    position : int
+        The position of the varint.
+
+    Returns
+    -------
+    This function returns the value and the position following the varint.
+
+    """
+    byte = data[position]
+
+    if byte < 0x80 :
+
+        return byte, position + 1
+
+    value = byte & 0x7F
+
+    shift = 7
+
+    while True :
+
+        position += 1
+
+        byte = data[position]
+
+        value |= (byte & 0x7F) << shift
+
+        if byte < 0x80 :
+
+            return value, position + 1
+
+        shift += 7
+
+
+def encode(msgType, senderId, advice = None):
+    """
+    Extended description of function.
+
+    Encodes a message in the binary format.
+
+    Parameters
+    ----------
+    msgType : str
+        A constant of MsgType.
+
+    senderId : int
+        The id of the sender.
+
+    advice : tuple
+        For advise messages only, the (holderId, inSenderReqQ, senderAsked) of the sender.
+
+    Returns
+    -------
+    This function returns the message as bytes.
+
+    """
+    code = TYPE_CODES[msgType]
+
+    if advice is None and 0 <= senderId < 0x80 :
+
+        return bytes((code, senderId))
+
+    buffer = bytearray()
+
+    if advice is not None :
+
+        holderId, inSenderReqQ, senderAsked = advice
+
+        if inSenderReqQ :
+
+            code |= IN_REQ_Q
+
+        if senderAsked :
+
+            code |= ASKED
+
+        if holderId is None :
+
+            code |= NO_HOLDER
+
+    buffer.append(code)
+
+    write_varint(buffer, senderId)
+
+    if advice is not None and holderId is not None :
+
+        write_varint(buffer, holderId)
+
+    return bytes(buffer)
+
+
+def decode(body):
+    """
+    Extended description of function.
+
+    Decodes a message, in the binary or in the text format. The binary format is
+    decoded in place, body can be a memoryview on a larger buffer.
+
+    Parameters
+    ----------
+    body : bytes, bytearray or memoryview
+        The encoded message.
+
+    Returns
+    -------
+    This function returns a tuple (msgType, senderId, advice), advice is None except
+    for advise messages.
+
+    """
+    code = body[0]
+
+    if code in TEXT_TYPES :
+
+        return decode_text(body)
+
+    senderId, position = read_varint(body, 1)
+
+    if code & TYPE_MASK != ADVISE_CODE :
+
+        return CODE_TYPES[code & TYPE_MASK], senderId, None
+
+    holderId = None
+
+    if not code & NO_HOLDER :
+
+        holderId = read_varint(body, position)[0]
+
+    return CODE_TYPES[ADVISE_CODE], senderId, (holderId, bool(code & IN_REQ_Q), bool(code & ASKED))
+
+
+def encode_batch(bodies):
+    """
+    Extended description of function.
+
+    Encodes encoded messages in one batch frame.
+
+    Parameters
+    ----------
+    bodies : list of bytes
+        The encoded messages, in the order they are to be received.
+
+    Returns
+    -------
+    This function returns the frame as bytes.
+
+    """
+    buffer = bytearray((BATCH_CODE,))
+
+    write_varint(buffer, len(bodies))
+
+    for body in bodies :
+
+        write_varint(buffer, len(body))
+
+        buffer += body
+
+    return bytes(buffer)
+
+
+def decode_batch(body):
+    """
+    Extended description of function.
+
+    Decodes the messages of a batch frame, in place.
+
+    Parameters
+    ----------
+    body : bytes, bytearray or memoryview
+        The frame.
+
+    Returns
+    -------
+    This function returns a list of tuples (msgType, senderId, advice), see decode.
+
+    """
+    view = memoryview(body)
+
+    count, position = read_varint(view, 1)
+
+    messages = []
+
+    for _ in range(count) :
+
+        length, position = read_varint(view, position)
+
+        messages.append(decode(view[position:position + length]))
+
+        position += length
+
+    return messages
+
+
+def decode_text(body):
+    """
+    Extended description of function.
+
+    Decodes a message in the text format : msgType | '*' | node id | '*' | msgBody
+
+    Parameters
+    ----------
+    body : bytes
+        The encoded message.
+
+    Returns
+    -------
+    See decode.
+
+    """
+    msgType, senderId, msg = bytes(body).decode().split('*')
+
+    advice = None
+
+    if msgType == 'D' :
+
+        senderHolderId , inSenderReqQ, senderAsked = msg.split(',')
+
+        advice = (None if senderHolderId == 'None' else int(senderHolderId), inSenderReqQ == 'True', senderAsked == 'True')
+
+    return msgType, int(senderId), advice
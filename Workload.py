@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:12:47 2026
+
+Workloads of the critical section : the distribution of the time a node holds the
+ressource once it is granted the privilege. A workload is given to all the nodes of a
+network or node by node :
+
+    network.set_workload(Exponential(.01))
+
+    network.set_workload({5 : LogNormal(-4, .5), 7 : TraceReplay('service_times.txt')})
+
+The downtime of the failed nodes is drawn from a workload too, several nodes being down
+at once :
+
+    network.set_downtime(Exponential(5))
+
+The samples are drawn from the random generator of the node, so the simulations stay
+deterministic for a given seed.
+"""
+
+import math
+
+
+class Workload():
+    """
+    This class is the interface of the workloads.
+
+    Methods
+    -------
+    sample() :
+        Draws a service time.
+
+    mean() :
+        The mean service time.
+    """
+
+    def sample(self, rng):
+        """
+        Extended description of function.
+
+        Draws the time in seconds the node holds the ressource.
+
+        Parameters
+        ----------
+        rng : random.Random
+            The random generator of the node.
+
+        Returns
+        -------
+        This function returns a float.
+
+        """
+        raise NotImplementedError
+
+
+    def mean(self):
+
+        raise NotImplementedError
+
+
+class Constant(Workload):
+    """
+    The node holds the ressource for a fixed time.
+    """
+
+    def __init__(self, value):
+
+        self.value = value
+
+
+    def sample(self, rng):
+
+        return self.value
+
+
+    def mean(self):
+
+        return self.value
+
+
+    def __repr__(self):
+
+        return 'Constant(%r)' % self.value
+
+
+class Exponential(Workload):
+    """
+    Service times drawn from an exponential distribution of mean meanTime.
+    """
+
+    def __init__(self, meanTime):
+
+        self.meanTime = meanTime
+
+
+    def sample(self, rng):
+
+        return -math.log(1.0 - rng.random()) * self.meanTime
+
+
+    def mean(self):
+
+        return self.meanTime
+
+
+    def __repr__(self):
+
+        return 'Exponential(%r)' % self.meanTime
+
+
+class LogNormal(Workload):
+    """
+    Service times drawn from a lognormal distribution : their logarithm is normal of mean
+    mu and standard deviation sigma.
+    """
+
+    def __init__(self, mu, sigma):
+
+        self.mu = mu
+
+        self.sigma = sigma
+
+
+    def sample(self, rng):
+
+        return rng.lognormvariate(self.mu, self.sigma)
+
+
+    def mean(self):
+
+        return math.exp(self.mu + self.sigma ** 2 / 2)
+
+
+    def __repr__(self):
+
+        return 'LogNormal(%r, %r)' % (self.mu, self.sigma)
+
+
+class TraceReplay(Workload):
+    """
+    Service times replayed from a recorded trace, in order. The nodes sharing a
+    TraceReplay consume the same sequence.
+
+    Attributes
+    ----------
+    durations : list of float
+        The recorded service times.
+
+    loop : bool
+        Starts the trace again once it is over, otherwise the last time is repeated.
+    """
+
+    def __init__(self, durations, loop = True):
+
+        if isinstance(durations, str) :
+
+            #a file with one duration by line
+            with open(durations) as traceFile :
+
+                durations = [float(line.split(',')[0]) for line in traceFile if line.strip() and not line.startswith('#')]
+
+        self.durations = list(durations)
+
+        if not self.durations :
+
+            raise ValueError('a trace replay needs at least one duration')
+
+        self.loop = loop
+
+        self.position = 0
+
+
+    def sample(self, rng):
+
+        durations = self.durations
+
+        if self.position == len(durations) :
+
+            if not self.loop :
+
+                return durations[-1]
+
+            self.position = 0
+
+        self.position += 1
+
+        return durations[self.position - 1]
+
+
+    def mean(self):
+
+        return sum(self.durations) / len(self.durations)
+
+
+    def __repr__(self):
+
+        return 'TraceReplay(%d durations)' % len(self.durations)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Invariants found by the Checker on hand made traces and on simulated ones.
+"""
+
+import unittest
+from Checker import Checker, check
+from Simulator import Simulator
+from Trace import Tracer
+import Topology
+
+#0 is the root, 1 and 2 its children
+PARENTS = [-1, 0, 0]
+
+
+def invariants(checker):
+
+    return [violation[1] for violation in checker.violations]
+
+
+class CheckerTest(unittest.TestCase):
+
+    def test_valid_trace(self):
+
+        events = [(0., 'ask', 1, None, None, 1),
+                  (0., 'send', 1, 0, 'R', 1),
+                  (.1, 'receive', 0, 1, 'R', 1),
+                  (.1, 'send', 0, 1, 'A', 1),
+                  (.2, 'receive', 1, 0, 'A', 1),
+                  (.2, 'grant', 1, None, None, 1),
+                  (.5, 'release', 1, None, None, None)]
+
+        checker = check(events, maxWait = 1., parents = PARENTS)
+
+        self.assertEqual(checker.violations, [])
+
+        self.assertEqual(checker.holds, {1})
+
+        self.assertEqual(checker.events, len(events))
+
+
+    def test_two_nodes_inside(self):
+
+        events = [(0., 'grant', 0, None, None, 1),
+                  (.1, 'grant', 1, None, None, 2)]
+
+        checker = check(events, parents = PARENTS)
+
+        self.assertEqual(invariants(checker), ['single token', 'single token'])
+
+        self.assertEqual(checker.violations[0][2], 1)
+
+
+    def test_duplicated_token(self):
+
+        #1 receives an ASSIGN the root never sent
+        checker = check([(0., 'receive', 1, 0, 'A', None)], parents = PARENTS)
+
+        self.assertEqual(invariants(checker), ['single token'])
+
+        self.assertIn('2 tokens', checker.violations[0][3])
+
+
+    def test_lost_token(self):
+
+        #the ASSIGN sent by the root never arrives, and 2 uses the token
+        events = [(0., 'send', 0, 1, 'A', None),
+                  (.1, 'grant', 2, None, None, 1)]
+
+        checker = check(events, parents = PARENTS)
+
+        self.assertEqual(invariants(checker), ['single token'])
+
+        self.assertEqual(checker.violations[0][2], 2)
+
+
+    def test_starvation(self):
+
+        events = [(0., 'ask', 1, None, None, 1),
+                  (5., 'ask', 2, None, None, 2),
+                  (5., 'grant', 0, None, None, None),
+                  (20., 'release', 0, None, None, None)]
+
+        checker = check(events, maxWait = 10., parents = PARENTS)
+
+        #reported once, while the trace runs for 1 and at the end for 2
+        self.assertEqual(checker.violations, [(20., 'no starvation', 1, 'waits for the privilege since 0.0'),
+                                              (20., 'no starvation', 2, 'waits for the privilege since 5.0')])
+
+        #without maxWait, the requests never granted are not violations
+        self.assertEqual(check(events, parents = PARENTS).violations, [])
+
+
+    def test_failed_request(self):
+
+        #the request of a node that fails is dropped
+        events = [(0., 'ask', 1, None, None, 1),
+                  (1., 'fail', 1, None, None, None),
+                  (2., 'recover', 1, 0, None, None),
+                  (30., 'release', 0, None, None, None)]
+
+        self.assertEqual(check(events, maxWait = 10., parents = PARENTS).violations, [])
+
+
+    def test_cycle(self):
+
+        #1 recovers believing 0 holds the token, while 0 sent it to 1
+        events = [(0., 'send', 0, 1, 'A', None),
+                  (.1, 'receive', 1, 0, 'A', None),
+                  (.2, 'recover', 1, 0, None, None)]
+
+        checker = check(events, parents = PARENTS)
+
+        self.assertIn('acyclic holders', invariants(checker))
+
+
+    def test_strict(self):
+
+        checker = Checker(parents = PARENTS, strict = True)
+
+        checker.feed((0., 'grant', 0, None, None, 1))
+
+        self.assertRaises(AssertionError, checker.feed, (.1, 'grant', 1, None, None, 2))
+
+
+    def test_simulated_runs(self):
+
+        parents = Topology.kary(30, 2)
+
+        for failureRate in (0, .05) :
+
+            simulator = Simulator(failureRate = failureRate, activityRate = .5, seed = 1)
+
+            simulator.addTree(parents)
+
+            tracer = Tracer()
+
+            simulator.trace(tracer)
+
+            simulator.run(300)
+
+            events = list(tracer.events)
+
+            self.assertEqual(check(events, parents = parents).violations, [])
+
+            #the same run, an ASSIGN lost on the way
+            lost = next(k for k, event in enumerate(events) if event[1] == 'receive' and event[4] == 'A')
+
+            self.assertIn('single token', invariants(check(events[:lost] + events[lost + 1:], parents = parents)))
+
+
+if __name__ == '__main__' :
+
+    unittest.main()
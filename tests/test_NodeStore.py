@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Ring buffers of the request queues of a NodeStore, see PooledQueue.
+"""
+
+from collections import deque
+import unittest
+from NodeStore import NodeStore, PooledQueue, StoreSimulator
+from Policy import Priority, Sweep, HoldAndServe
+from Simulator import Simulator
+from Workload import Constant
+import Topology
+
+
+class PooledQueueTest(unittest.TestCase):
+
+    def setUp(self):
+
+        #node 0 has 2 neighbors, its ring buffer 3 entries, node 1 is a leaf with 2 entries
+        self.store = NodeStore([-1, 0, 0])
+
+        self.queue = PooledQueue(self.store, 0)
+
+
+    def check(self, expected):
+
+        self.assertEqual(list(self.queue), list(expected))
+
+        self.assertEqual(len(self.queue), len(expected))
+
+        self.assertEqual(bool(self.queue), bool(expected))
+
+
+    def test_capacity(self):
+
+        self.assertEqual(self.store.queueCapacity.tolist(), [3, 2, 2])
+
+
+    def test_wrap(self):
+
+        queue, expected = self.queue, deque()
+
+        #the head goes around the buffer several times
+        for value in range(10) :
+
+            queue.append(value)
+
+            expected.append(value)
+
+            if value % 2 :
+
+                self.assertEqual(queue.popleft(), expected.popleft())
+
+                self.assertEqual(queue.popleft(), expected.popleft())
+
+            self.check(expected)
+
+        self.assertNotIn(0, self.store.spilled)
+
+
+    def test_spill(self):
+
+        queue = self.queue
+
+        for value in (1, 2, 3, 4, 5) :
+
+            queue.append(value)
+
+        #the entries past the capacity spill, and keep their order
+        self.assertEqual(list(self.store.spilled[0]), [4, 5])
+
+        self.check([1, 2, 3, 4, 5])
+
+        self.assertIn(5, queue)
+
+        self.assertEqual(queue[3], 4)
+
+        self.assertEqual(queue.popleft(), 1)
+
+        #appended after the spilled entries, even though a slot is free
+        queue.append(6)
+
+        self.check([2, 3, 4, 5, 6])
+
+        self.assertEqual([queue.popleft() for _ in range(5)], [2, 3, 4, 5, 6])
+
+        self.assertNotIn(0, self.store.spilled)
+
+        self.check([])
+
+        self.assertRaises(IndexError, queue.popleft)
+
+
+    def test_clear(self):
+
+        queue = self.queue
+
+        for value in range(5) :
+
+            queue.append(value)
+
+        queue.clear()
+
+        self.check([])
+
+        self.assertNotIn(0, self.store.spilled)
+
+        queue.append(7)
+
+        self.check([7])
+
+
+    def test_queues_are_separate(self):
+
+        other = PooledQueue(self.store, 1)
+
+        for value in (1, 2) :
+
+            self.queue.append(value)
+
+            other.append(value + 10)
+
+        other.append(13)
+
+        self.check([1, 2])
+
+        self.assertEqual(list(other), [11, 12, 13])
+
+
+
+class StoreSimulatorTest(unittest.TestCase):
+
+    def test_policies(self):
+
+        parents = Topology.kary(60, 3)
+
+        #the views run the same simulation as the nodes of a Simulator
+        for policy in (None, Priority({0 : 0, 5 : 0}), Sweep(), HoldAndServe(.002)) :
+
+            results = []
+
+            for simulatorClass in (Simulator, StoreSimulator) :
+
+                simulator = simulatorClass(failureRate = 1e-2, activityRate = .5, seed = 1)
+
+                simulator.addTree(parents)
+
+                simulator.set_workload(Constant(1e-3))
+
+                simulator.set_saturation()
+
+                simulator.set_policy(policy)
+
+                result = simulator.run(10)
+
+                results.append((result.snapshot['grantsByNode'], result.complexity))
+
+            self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__' :
+
+    unittest.main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Round trips of the binary and text encodings of the protocol messages, see Wire.
+"""
+
+import unittest
+from Wire import encode, decode, encode_batch, decode_batch, decode_text, BATCH_CODE
+
+
+class WireTest(unittest.TestCase):
+
+    def test_round_trip(self):
+
+        for msgType in 'RAS' :
+
+            for senderId in (0, 1, 127, 128, 300, 2**40) :
+
+                self.assertEqual(decode(encode(msgType, senderId)), (msgType, senderId, None))
+
+
+    def test_advise_round_trip(self):
+
+        for holderId in (None, 0, 5, 127, 128, 2**33) :
+
+            for inSenderReqQ in (False, True) :
+
+                for senderAsked in (False, True) :
+
+                    advice = (holderId, inSenderReqQ, senderAsked)
+
+                    self.assertEqual(decode(encode('D', 9, advice)), ('D', 9, advice))
+
+
+    def test_sizes(self):
+
+        #ids below 128 take one byte
+        self.assertEqual(len(encode('R', 127)), 2)
+
+        self.assertEqual(len(encode('R', 128)), 3)
+
+        self.assertEqual(len(encode('D', 3, (7, True, False))), 3)
+
+        self.assertEqual(len(encode('D', 3, (None, False, True))), 2)
+
+        #a binary type byte never reads as a letter of the text format
+        self.assertLess(encode('D', 3, (None, True, True))[0], ord('A'))
+
+
+    def test_batch_round_trip(self):
+
+        messages = [('R', 1, None), ('A', 200, None), ('D', 3, (None, True, False)), ('D', 70000, (12, False, True))]
+
+        frame = encode_batch([encode(*message) for message in messages])
+
+        self.assertEqual(frame[0], BATCH_CODE)
+
+        self.assertEqual(decode_batch(frame), messages)
+
+        #decoded in place, from a view on a larger buffer
+        self.assertEqual(decode_batch(memoryview(b'..' + frame)[2:]), messages)
+
+        self.assertEqual(decode_batch(encode_batch([])), [])
+
+
+    def test_batch_of_long_messages(self):
+
+        #a message of 128 bytes or more has a 2 bytes length
+        bodies = [b'R*1*', encode('R', 2), 'D*4*{},True,True'.format(10**130).encode()]
+
+        self.assertEqual(decode_batch(encode_batch(bodies)), [('R', 1, None), ('R', 2, None), ('D', 4, (10**130, True, True))])
+
+
+    def test_text(self):
+
+        self.assertEqual(decode_text(b'R*5*'), ('R', 5, None))
+
+        self.assertEqual(decode_text(b'D*3*7,True,False'), ('D', 3, (7, True, False)))
+
+        self.assertEqual(decode_text(b'D*3*None,False,True'), ('D', 3, (None, False, True)))
+
+        #decode recognises the text format by its first byte
+        self.assertEqual(decode(b'A*12*'), ('A', 12, None))
+
+
+if __name__ == '__main__' :
+
+    unittest.main()